@@ -1,10 +1,120 @@
+"""
+SOS-only launch mode.
+
+Shows one big SOS button plus contacts, location and medical info, with no
+database, no login and no images, so it is usable as fast as possible.
+Everything else is loaded on a background thread after the first frame:
+plyer for the phone call and the full app module ('tubes 3/Tubes 3.py')
+for the stored user, the emergency contacts and the SMS notifier. Only
+Clock callbacks touch widgets. An SOS pressed before that is
+done still dials right away; the contacts are alerted once the backend
+is ready. Every SOS is written to the emergency journal before it is
+dialed, so the full app logs it on its next start even if this one is
+killed during the call.
+
+Started by main.py with --sos (or EMERGENCY_SOS=1) from the working
+directory of the full app, so both share the same database.
+"""
+import importlib.util
+import os
+import sys
+import threading
+
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.logger import Logger
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.popup import Popup
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tubes 3', 'Tubes 3.py')
+# Modul tanpa Kivy dan tanpa database dari folder aplikasi lengkap
+if os.path.dirname(APP_PATH) not in sys.path:
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+from emergency_journal import EmergencyJournal
+
+# Nomor darurat terpadu di Indonesia
+SOS_NUMBER = '112'
+MEDICAL_INFO_PATH = 'medical_info.json'
+MEDICAL_FIELDS = (('blood_type', 'Golongan Darah'), ('allergies', 'Alergi'), ('history', 'Riwayat'))
+
+
+def load_full_app(path=APP_PATH):
+    """
+    Import 'Tubes 3.py' as the module 'tubes3' without starting it
+    """
+    if 'tubes3' in sys.modules:
+        return sys.modules['tubes3']
+    spec = importlib.util.spec_from_file_location('tubes3', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['tubes3'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class SosBackend:
+    """
+    Database, user and contacts of the full app, loaded in the background
+    """
+    def __init__(self, app_path=APP_PATH):
+        self.app_path = app_path
+        self.tubes = None
+        self.ready = threading.Event()
+        self.db_manager = None
+        self.notifier = None
+        self.user = None
+        self.contacts = []
+        self.error = None
+
+    def load(self):
+        try:
+            tubes = self.tubes = load_full_app(self.app_path)
+            device_manager = tubes.DeviceManager()
+            self.db_manager = tubes.open_database()
+            self.notifier = tubes.EmergencyNotifier(self.db_manager, tubes.SmsTransport())
+            self.user = (device_manager.get_stored_user()
+                         or self.db_manager.get_user_by_device(device_manager.get_device_id()))
+            if self.user:
+                self.contacts = self.db_manager.get_emergency_contacts(self.user.id)
+        except Exception as e:
+            Logger.exception(f'SosApp: Could not load backend: {e}')
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def alert_contacts(self, location=None, latitude=None, longitude=None, journal_id=None):
+        """
+        Log the SOS and send SMS to the emergency contacts
+        """
+        if self.user is None or self.db_manager is None:
+            return
+        event_id = self.db_manager.log_emergency(self.user.id, 'sos', location, latitude, longitude,
+                                                 journal_id)
+        if not self.contacts:
+            return
+        message = f"EMERGENCY: {self.user.name} pressed SOS."
+        if location:
+            message += f" Location: {location}"
+        self.notifier.notify_in_background(event_id, self.contacts, message)
+
+    def close(self):
+        if self.db_manager is not None:
+            self.db_manager.close()
+
 
 class EmergencyApp(App):
+    def __init__(self, app_path=APP_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.app_path = app_path
+        self.backend = None
+        self.plyer = None
+        self.location = None
+        self.coordinates = (None, None)
+        self.sos_pressed = False
+        self.journal = EmergencyJournal()
+        self.journal_id = None
+
     def build(self):
         layout = BoxLayout(orientation='vertical', padding=20, spacing=20)
 
@@ -12,58 +122,193 @@ class EmergencyApp(App):
         title_label = Label(text="Aplikasi Darurat", font_size=24, size_hint=(1, 0.2))
         layout.add_widget(title_label)
 
-        # Tombol SOS besar
-        sos_button = Button(text="SOS", font_size=32, background_color=(1, 0, 0, 1), size_hint=(1, 0.3))
-        sos_button.bind(on_release=self.show_sos_alert)
-        layout.add_widget(sos_button)
+        # Tombol SOS besar, tanpa gambar latar supaya tidak ada decoding gambar
+        self.sos_button = Button(text="SOS", font_size=32, background_normal='',
+                                 background_color=(1, 0, 0, 1), size_hint=(1, 0.3))
+        self.sos_button.bind(on_release=self.send_sos)
+        layout.add_widget(self.sos_button)
 
         # Tombol untuk kontak darurat
-        contact_button = Button(text="Kontak Darurat", font_size=20, size_hint=(1, 0.2))
+        contact_button = Button(text="Kontak Darurat", font_size=20, background_normal='',
+                                background_color=(0.3, 0.3, 0.3, 1), size_hint=(1, 0.2))
         contact_button.bind(on_release=self.show_contacts)
         layout.add_widget(contact_button)
 
         # Tombol untuk lokasi
-        location_button = Button(text="Lokasi", font_size=20, size_hint=(1, 0.2))
+        location_button = Button(text="Lokasi", font_size=20, background_normal='',
+                                 background_color=(0.3, 0.3, 0.3, 1), size_hint=(1, 0.2))
         location_button.bind(on_release=self.show_location)
         layout.add_widget(location_button)
 
         # Tombol untuk informasi medis
-        medical_info_button = Button(text="Info Medis", font_size=20, size_hint=(1, 0.2))
+        medical_info_button = Button(text="Info Medis", font_size=20, background_normal='',
+                                     background_color=(0.3, 0.3, 0.3, 1), size_hint=(1, 0.2))
         medical_info_button.bind(on_release=self.show_medical_info)
         layout.add_widget(medical_info_button)
 
         return layout
 
-    # Fungsi untuk menampilkan popup SOS
-    def show_sos_alert(self, instance):
-        popup = Popup(title="SOS Alert",
-                      content=Label(text="Panggilan Darurat Dikirim!"),
-                      size_hint=(0.7, 0.5))
-        popup.open()
+    def on_start(self):
+        Window.bind(on_flip=self.on_first_frame)
+
+    def on_first_frame(self, *args):
+        """
+        Load the rest once the SOS button is on screen
+        """
+        Window.unbind(on_flip=self.on_first_frame)
+        Clock.schedule_once(lambda dt: self.load_backend(), 0)
+
+    def load_backend(self):
+        self.backend = SosBackend(self.app_path)
+        threading.Thread(target=self.load_in_background, name='sos-backend', daemon=True).start()
+        if self.sos_pressed:
+            self.alert_contacts()
+
+    def load_in_background(self):
+        """
+        Import plyer and the full app module off the main thread. The
+        module only defines widget classes; no widget is created here.
+        """
+        try:
+            import plyer
+        except Exception as e:
+            Logger.warning(f'SosApp: plyer not available: {e}')
+        else:
+            Clock.schedule_once(lambda dt: setattr(self, 'plyer', self.plyer or plyer))
+        self.backend.load()
+
+    def on_stop(self):
+        if self.backend is not None:
+            self.backend.ready.wait(5)
+            self.backend.close()
+        self.journal.close()
+
+    def send_sos(self, instance):
+        """
+        Journal the SOS, call the emergency number, then alert the emergency contacts
+        """
+        self.sos_pressed = True
+        self.write_journal()
+        try:
+            if self.plyer is None:
+                import plyer
+                self.plyer = plyer
+            self.plyer.call.makecall(SOS_NUMBER)
+        except Exception as e:
+            Logger.exception(f'SosApp: Could not call {SOS_NUMBER}: {e}')
+            self.popup("SOS Alert", f"Hubungi {SOS_NUMBER} secara manual")
+        else:
+            self.popup("SOS Alert", "Panggilan Darurat Dikirim!")
+        if self.backend is not None:
+            self.alert_contacts()
+
+    def write_journal(self):
+        """
+        Save the SOS before dialing. The user is only known once the
+        backend is loaded; a failing journal never stops the call.
+        """
+        backend = self.backend
+        user = backend.user if backend is not None and backend.ready.is_set() else None
+        latitude, longitude = self.coordinates
+        try:
+            self.journal_id = self.journal.append(user.id if user else None, 'sos',
+                                                  latitude, longitude)
+        except Exception as e:
+            Logger.exception(f'SosApp: Could not write journal: {e}')
+            self.journal_id = None
+
+    def alert_contacts(self):
+        backend = self.backend
+        location = self.location
+        latitude, longitude = self.coordinates
+        journal_id = self.journal_id
+
+        def run():
+            backend.ready.wait()
+            try:
+                backend.alert_contacts(location, latitude, longitude, journal_id)
+            except Exception as e:
+                Logger.exception(f'SosApp: Could not alert contacts: {e}')
+
+        threading.Thread(target=run, name='sos-alert', daemon=True).start()
+
+    def popup(self, title, text):
+        from kivy.uix.popup import Popup
+        Popup(title=title, content=Label(text=text), size_hint=(0.7, 0.5)).open()
 
     # Fungsi untuk menampilkan popup kontak darurat
     def show_contacts(self, instance):
-        contacts = "1. Keluarga: 0812xxxxxx\n2. Teman: 0857xxxxxx"
-        popup = Popup(title="Kontak Darurat",
-                      content=Label(text=contacts),
-                      size_hint=(0.7, 0.5))
-        popup.open()
+        if self.backend is None or not self.backend.ready.is_set():
+            contacts = "Memuat kontak..."
+        elif not self.backend.contacts:
+            contacts = "Belum ada kontak darurat"
+        else:
+            contacts = '\n'.join(f"{number}. {contact.label or 'Kontak'}: {contact.phone}"
+                                 for number, contact in enumerate(self.backend.contacts, 1))
+        self.popup("Kontak Darurat", contacts)
 
     # Fungsi untuk menampilkan popup lokasi
     def show_location(self, instance):
-        popup = Popup(title="Lokasi Anda",
-                      content=Label(text="Lokasi: Jl. Contoh, Kota ABC"),
-                      size_hint=(0.7, 0.5))
-        popup.open()
+        try:
+            if self.plyer is None:
+                import plyer
+                self.plyer = plyer
+            self.plyer.gps.configure(on_location=self.on_location)
+            self.plyer.gps.start()
+        except Exception as e:
+            Logger.warning(f'SosApp: GPS not available: {e}')
+        self.popup("Lokasi Anda", f"Lokasi: {self.location or 'Mencari lokasi...'}")
+
+    def on_location(self, **kwargs):
+        self.coordinates = (kwargs.get('lat'), kwargs.get('lon'))
+        self.location = f"{kwargs.get('lat')}, {kwargs.get('lon')}"
 
     # Fungsi untuk menampilkan popup informasi medis
     def show_medical_info(self, instance):
-        medical_info = "Golongan Darah: A\nAlergi: Tidak Ada\nRiwayat: Hipertensi"
-        popup = Popup(title="Info Medis",
-                      content=Label(text=medical_info),
-                      size_hint=(0.7, 0.5))
+        from kivy.storage.jsonstore import JsonStore
+        from kivy.uix.popup import Popup
+        store = JsonStore(MEDICAL_INFO_PATH)
+        info = store.get('medical') if store.exists('medical') else {}
+
+        content = BoxLayout(orientation='vertical', spacing=10)
+        content.add_widget(Label(text='\n'.join(f"{label}: {info.get(key) or '-'}"
+                                                for key, label in MEDICAL_FIELDS)))
+        edit_button = Button(text="Ubah", size_hint=(1, 0.25))
+        content.add_widget(edit_button)
+        popup = Popup(title="Info Medis", content=content, size_hint=(0.8, 0.6))
+
+        def edit(instance):
+            popup.dismiss()
+            self.edit_medical_info(info)
+
+        edit_button.bind(on_release=edit)
+        popup.open()
+
+    def edit_medical_info(self, info):
+        """
+        Form for the medical info, saved in MEDICAL_INFO_PATH on this device
+        """
+        from kivy.storage.jsonstore import JsonStore
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
+
+        content = BoxLayout(orientation='vertical', spacing=10)
+        inputs = {}
+        for key, label in MEDICAL_FIELDS:
+            inputs[key] = TextInput(hint_text=label, text=info.get(key, ''), multiline=False)
+            content.add_widget(inputs[key])
+        save_button = Button(text="Simpan")
+        content.add_widget(save_button)
+        popup = Popup(title="Ubah Info Medis", content=content, size_hint=(0.9, 0.7))
+
+        def save(instance):
+            JsonStore(MEDICAL_INFO_PATH).put(
+                'medical', **{key: text_input.text.strip() for key, text_input in inputs.items()})
+            popup.dismiss()
+
+        save_button.bind(on_release=save)
         popup.open()
 
 # Menjalankan aplikasi
 if __name__ == "__main__":
-    EmergencyApp().run()
\ No newline at end of file
+    EmergencyApp().run()
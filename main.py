@@ -0,0 +1,40 @@
+"""
+Entry point for the emergency app.
+
+    python main.py          full app with login, news and contacts
+    python main.py --sos    SOS-only screen, usable before anything else loads
+
+Home screen widgets and shortcuts that cannot pass arguments can set
+EMERGENCY_SOS=1 instead. Both modes run from the 'tubes 3' directory so
+they share the database and device_info.json.
+"""
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tubes 3')
+
+
+def sos_requested(argv):
+    return '--sos' in argv or os.getenv('EMERGENCY_SOS') == '1'
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Argumen milik launcher ini, jangan sampai dibaca Kivy
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.chdir(APP_DIR)
+
+    if sos_requested(argv):
+        from app_frs import EmergencyApp
+        EmergencyApp().run()
+        return 0
+
+    import asyncio
+    from app_frs import load_full_app
+    tubes = load_full_app()
+    asyncio.run(tubes.EmergencyApp().async_run(async_lib='asyncio'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
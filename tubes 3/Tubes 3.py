@@ -1,13 +1,30 @@
 import os
+import asyncio
 import json
+import math
+import random
 import re
 import uuid
+import csv
 import hashlib
+import heapq
+import hmac
+import importlib
 import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, deque, namedtuple
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 import kivy
 kivy.require('2.1.0')
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.logger import Logger
 from kivy.core.window import Window
 from kivy.graphics import Color, Rectangle
 from kivy.uix.screenmanager import ScreenManager, Screen
@@ -18,312 +35,3193 @@ from kivy.uix.scrollview import ScrollView
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.image import Image
-from kivy.uix.popup import Popup
 from kivy.metrics import dp
-from plyer import call
 from kivy.storage.jsonstore import JsonStore
-from kivy.utils import platform
-from kivy.properties import StringProperty
+from kivy.utils import escape_markup, platform
+from kivy.properties import NumericProperty, ObjectProperty, StringProperty
 import uuid
 
-try:
-    from plyer import gps
-except ImportError:
-    gps = None
+# Modul pendamping tanpa Kivy di folder ini, juga saat file ini dimuat dari luar folder
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+from emergency_journal import EmergencyJournal
+from security_utils import SecurityUtils
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    bool() imports it too and is False when the module is not installed.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+        self.error = None
+
+    def load(self):
+        if self.module is None and self.error is None:
+            start = time.perf_counter()
+            try:
+                self.module = importlib.import_module(self.name)
+            except ImportError as e:
+                self.error = e
+            metrics.record('import', (time.perf_counter() - start) * 1000, module=self.name)
+        if self.error is not None:
+            raise self.error
+        return self.module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __bool__(self):
+        try:
+            self.load()
+        except ImportError:
+            return False
+        return True
+
+    def __repr__(self):
+        state = 'loaded' if self.module is not None else 'not loaded'
+        return f'<LazyModule {self.name} ({state})>'
+
+# Tidak dibutuhkan untuk frame pertama: telepon, GPS, SMS, popup dan NumPy
+# baru dimuat saat pertama dipakai atau oleh EmergencyApp.preload()
+plyer = LazyModule('plyer')
+uix_popup = LazyModule('kivy.uix.popup')
+numpy = LazyModule('numpy')
+
+MODERATION_STATUSES = ('approved', 'rejected')
+SQL_BATCH_SIZE = 500
+DB_BUSY_TIMEOUT = 10  # detik
+WRITE_TIMEOUT = 10  # detik, batas tunggu WriteCoordinator.execute
+STATEMENT_CACHE_SIZE = 128
+SESSION_TOKEN_TTL = 7 * 24 * 3600  # detik
+BACKUP_DIR = 'backups'
+BACKUP_KEEP = 3
+BACKUP_INTERVAL = 24 * 3600  # detik
+BACKUP_STEP_PAGES = 256  # 1 MB per langkah dengan halaman 4 KB
+SHARD_MAP_PATH = 'shards.json'
+SHARD_ID_BITS = 40  # id = nomor shard << 40 + urutan di shard
+SHARD_LIMIT = 11  # shard rumah + 10 ATTACH, batas bawaan SQLite
+USER_REGION_CACHE_SIZE = 1024
+SYNC_BATCH_SIZE = 500
+SYNC_COMPRESSION_LEVEL = 6
+# Kolom berita yang dikirim ke perangkat lain, tanpa data moderasi dan deduplikasi
+SYNC_NEWS_COLUMNS = ('id', 'title', 'description', 'category', 'created_at', 'report_count',
+                     'image_path')
+# Tabel per wilayah; pengguna, perangkat, sesi dan kontak ada di shard rumah
+SHARDED_TABLES = ('news', 'news_moderation_log', 'emergency_logs', 'notification_deliveries')
+
+EMERGENCY_NUMBERS = {
+    'police': '110',
+    'fire': '113',
+    'medical': '119',
+}
+
+FEED_SNIPPET_LENGTH = 80
+FEED_ROW_HEIGHT = 150  # dp
+FEED_PAGE_ROWS = 20  # berita per query feed, halaman berikutnya dimuat saat digulir
+FRAME_BUDGET_MS = 6  # dari 16.7 ms per frame pada 60 fps, sisanya untuk layout dan render
+DETAIL_CACHE_SIZE = 32
+DEDUP_THRESHOLD = 0.6
+DEDUP_WINDOW_HOURS = 24
+
+GEOCELL_SIZE = 0.1  # derajat, sekitar 11 km
+KM_PER_DEGREE = 111.2
+RESPONDER_MAX_DISTANCE_KM = 25
+RESPONDERS_PATH = 'responders.csv'
+LOCATION_TIMEOUT = 3  # detik menunggu posisi GPS pertama sebelum menelepon
+LAST_LOCATION_MAX_AGE = 30 * 60  # detik
+
+def geocell(latitude, longitude, size=GEOCELL_SIZE):
+    """
+    Name of the grid cell containing a coordinate, e.g. '-70:1076'
+    """
+    if latitude is None or longitude is None:
+        return 'unknown'
+    return f'{math.floor(latitude / size)}:{math.floor(longitude / size)}'
+
+FRAME_TIME_BUCKETS_MS = (8, 16.7, 33.3, 50, 100, 250)
+
+class NullTimer:
+    """
+    Timer returned while metrics are disabled, does nothing
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class MetricTimer:
+    def __init__(self, metrics, name, tags):
+        self.metrics = metrics
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            self.tags['error'] = exc_type.__name__
+        self.metrics.record(self.name, elapsed_ms, **self.tags)
+        return False
+
+class PerformanceMetrics:
+    """
+    Collect performance samples in an in-memory ring buffer.
+    Every call returns immediately while metrics are disabled.
+    """
+    def __init__(self, enabled=False, capacity=10000):
+        self.enabled = enabled
+        self.samples = deque(maxlen=capacity)
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, value, **tags):
+        """
+        Add one sample, e.g. a duration in milliseconds
+        """
+        if not self.enabled:
+            return
+        sample = {'name': name, 'value': value, 'ts': time.time()}
+        sample.update(tags)
+        self.samples.append(sample)
+
+    def timer(self, name, **tags):
+        """
+        Context manager that records how long its block took in milliseconds
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return MetricTimer(self, name, tags)
+
+    def observe(self, name, value, buckets=FRAME_TIME_BUCKETS_MS):
+        """
+        Count `value` in a histogram; the last bucket holds everything larger
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = (buckets, [0] * (len(buckets) + 1))
+            buckets, counts = self.histograms[name]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+
+    def export_jsonl(self, path):
+        """
+        Append all buffered samples and histograms to a JSON Lines file
+        """
+        samples = list(self.samples)
+        self.samples.clear()
+
+        with open(path, 'a', encoding='utf-8') as f:
+            for sample in samples:
+                f.write(json.dumps(sample, default=str) + '\n')
+            with self.lock:
+                for name, (buckets, counts) in self.histograms.items():
+                    f.write(json.dumps({
+                        'name': name,
+                        'histogram': dict(zip([str(b) for b in buckets] + ['inf'], counts)),
+                        'ts': time.time()
+                    }) + '\n')
+        return len(samples)
+
+    @staticmethod
+    def sql_fingerprint(sql):
+        """
+        Short id of a statement with whitespace and literal values removed
+        """
+        fingerprint = SQL_FINGERPRINTS.get(sql)
+        if fingerprint is None:
+            normalized = re.sub(r"'[^']*'|\b\d+\b", '?', ' '.join(sql.split()))
+            fingerprint = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+            SQL_FINGERPRINTS[sql] = fingerprint
+        return fingerprint
+
+SQL_FINGERPRINTS = {}
+
+metrics = PerformanceMetrics(enabled=os.getenv('EMERGENCY_METRICS') == '1')
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor that records the duration of every statement
+    """
+    def execute(self, sql, parameters=()):
+        with metrics.timer('db.query', sql=PerformanceMetrics.sql_fingerprint(sql)):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with metrics.timer('db.query', sql=PerformanceMetrics.sql_fingerprint(sql), many=True):
+            return super().executemany(sql, seq_of_parameters)
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors are TimedCursor
+    """
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
 
 class DeviceManager:
     def __init__(self):
         """
-        Initialize device manager with storage
+        Initialize device manager with storage
+        """
+        self.store = JsonStore('device_info.json')
+        
+    def get_device_id(self):
+        """
+        Generate or retrieve a unique device identifier using a combination of available system information
+        """
+        import platform as platform_lib
+        
+        def generate_device_hash():
+            
+            system_info = [
+                platform_lib.system(),           
+                platform_lib.machine(),        
+                platform_lib.processor(),        
+                str(os.getenv('USER', '')),    
+                str(os.getenv('HOME', '')),     
+            ]
+            
+            system_str = '|'.join(filter(None, system_info))
+            return hashlib.sha256(system_str.encode('utf-8')).hexdigest()
+            
+        if not self.store.exists('device_id'):
+            device_id = str(uuid.uuid4())
+            self.store.put('device_id', value=device_id)
+        else:
+            device_id = self.store.get('device_id')['value']
+
+        return device_id
+
+
+    def save_user_session(self, user, token=None):
+        """
+        Save user session data securely
+        """
+        self.store.put('user_session', 
+                      device_id=self.get_device_id(),
+                      user_data=user.to_dict(),
+                      token=token,
+                      is_logged_in=True)
+
+    def save_last_location(self, latitude, longitude):
+        """
+        Remember a GPS fix for calls made before the next fix arrives
+        """
+        self.store.put('last_location', latitude=latitude, longitude=longitude, time=time.time())
+
+    def get_last_location(self, max_age=LAST_LOCATION_MAX_AGE):
+        """
+        (latitude, longitude) of the last saved fix, or None when there is
+        none or it is older than `max_age` seconds
+        """
+        if not self.store.exists('last_location'):
+            return None
+        fix = self.store.get('last_location')
+        if time.time() - fix['time'] > max_age:
+            return None
+        return fix['latitude'], fix['longitude']
+
+    def get_session_token(self):
+        """
+        Get the signed session token if one is stored
+        """
+        if self.is_logged_in():
+            return self.store.get('user_session').get('token')
+        return None
+
+    def clear_session(self):
+        """
+        Clear stored session data
+        """
+        if self.store.exists('user_session'):
+            self.store.delete('user_session')
+
+    def is_logged_in(self):
+        """
+        Check if there's an active session
+        """
+        return (self.store.exists('user_session') and 
+                self.store.get('user_session')['is_logged_in'])
+
+    def get_stored_user(self):
+        """
+        Get stored user data if available
+        """
+        if self.is_logged_in():
+            return User.from_dict(self.store.get('user_session')['user_data'])
+        return None
+
+class WriteCoordinator:
+    """
+    Single writer thread of a database file. Every write is a function that
+    receives a cursor; writes that queue up while a commit is running are
+    committed together in the next transaction (group commit), each inside
+    its own SAVEPOINT so a failing write does not undo the others.
+    `max_delay` can hold a batch open a little longer to gather more writes.
+    execute() waits at most WRITE_TIMEOUT seconds by default; a write that
+    has not started by then is cancelled and sqlite3.OperationalError raised.
+    """
+    coordinators = {}
+    coordinators_lock = threading.Lock()
+
+    def __init__(self, db_manager, max_batch=64, max_delay=0):
+        self.db_manager = db_manager
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db_manager):
+        """
+        Share one coordinator between all DatabaseManagers of the same file
+        """
+        # Per proses: anak hasil fork tidak punya thread writer milik induknya
+        key = (os.getpid(), os.path.abspath(db_manager.db_name))
+        with cls.coordinators_lock:
+            if key not in cls.coordinators:
+                cls.coordinators[key] = cls(db_manager)
+            return cls.coordinators[key]
+
+    def submit(self, write):
+        """
+        Queue a write and return a Future with its result
+        """
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True, name='db-writer')
+                self.thread.start()
+
+        future = Future()
+        self.queue.put((write, future))
+        return future
+
+    def execute(self, write, timeout=WRITE_TIMEOUT):
+        """
+        Queue a write and wait until it is committed. `timeout=None` waits
+        as long as it takes, for startup migrations and bulk jobs.
+        """
+        if threading.current_thread() is self.thread:
+            raise RuntimeError('execute() called from the writer thread')
+        future = self.submit(write)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Belum mulai: batalkan. Sudah berjalan: tetap di-commit oleh writer
+            started = not future.cancel()
+            metrics.record('error', 1, where='db.write', error='timeout')
+            raise sqlite3.OperationalError(
+                f'write {"still running" if started else "not started"} after {timeout} s')
+
+    def close(self):
+        with self.lock:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+
+    def next_batch(self):
+        """
+        Wait for one write, then collect the ones already queued
+        """
+        first = self.queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self.queue.get(timeout=max(timeout, 0)) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        conn = self.db_manager.get_connection()
+        conn.isolation_level = None
+        cursor = conn.cursor()
+
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                conn.close()
+                return
+
+            batch = [(write, future) for write, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            results = []
+            try:
+                with metrics.timer('db.group_commit', writes=len(batch)):
+                    cursor.execute('BEGIN IMMEDIATE')
+                    for write, future in batch:
+                        cursor.execute('SAVEPOINT write')
+                        try:
+                            results.append((future, write(cursor), None))
+                            cursor.execute('RELEASE write')
+                        except Exception as e:
+                            cursor.execute('ROLLBACK TO write')
+                            cursor.execute('RELEASE write')
+                            results.append((future, None, e))
+                    cursor.execute('COMMIT')
+            except Exception as e:
+                if conn.in_transaction:
+                    cursor.execute('ROLLBACK')
+                for write, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+class Model:
+    """
+    Base of the compact models. The fields are the __slots__, in the same
+    order as the columns of the statements that load them, so there is no
+    per-object __dict__.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    def to_row(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a model from JSON data, ignoring unknown keys
+        """
+        return cls(*(data.get(name) for name in cls.__slots__))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_row() == other.to_row()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class User(Model):
+    __slots__ = ('id', 'phone', 'name', 'email', 'registration_date', 'is_moderator')
+
+    def __init__(self, id, phone, name, email=None, registration_date=None, is_moderator=False):
+        self.id = id
+        self.phone = phone
+        self.name = name
+        self.email = email
+        self.registration_date = registration_date
+        self.is_moderator = bool(is_moderator)
+
+class NewsItem(Model):
+    __slots__ = ('id', 'title', 'description', 'category', 'status', 'created_at', 'report_count')
+
+    def __init__(self, id, title, description, category, status, created_at, report_count=1):
+        self.id = id
+        self.title = title
+        self.description = description
+        # Kategori dan status hanya beberapa nilai, simpan satu objek string saja
+        self.category = sys.intern(category) if category else category
+        self.status = sys.intern(status) if status else status
+        self.created_at = created_at
+        self.report_count = report_count
+
+class NewsSummary(Model):
+    """
+    A feed row: everything the news list shows, without the description
+    """
+    __slots__ = ('id', 'title', 'category', 'created_at', 'report_count', 'snippet')
+
+    def __init__(self, id, title, category, created_at, report_count=1, snippet=''):
+        self.id = id
+        self.title = title
+        self.category = sys.intern(category) if category else category
+        self.created_at = created_at
+        self.report_count = report_count
+        self.snippet = snippet
+
+class LRUCache:
+    """
+    Small least recently used cache
+    """
+    def __init__(self, capacity=DETAIL_CACHE_SIZE):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+class EmergencyEvent(Model):
+    __slots__ = ('id', 'user_id', 'emergency_type', 'location', 'latitude',
+                 'longitude', 'geocell', 'timestamp', 'status')
+
+    def __init__(self, id, user_id, emergency_type, location=None, latitude=None,
+                 longitude=None, geocell=None, timestamp=None, status=None):
+        self.id = id
+        self.user_id = user_id
+        self.emergency_type = sys.intern(emergency_type) if emergency_type else emergency_type
+        self.location = location
+        self.latitude = latitude
+        self.longitude = longitude
+        self.geocell = geocell
+        self.timestamp = timestamp
+        self.status = sys.intern(status) if status else status
+
+class Responder(Model):
+    __slots__ = ('emergency_type', 'name', 'phone', 'latitude', 'longitude', 'distance_km')
+
+    def __init__(self, emergency_type, name, phone, latitude, longitude, distance_km=None):
+        self.emergency_type = sys.intern(emergency_type)
+        self.name = name
+        self.phone = phone
+        self.latitude = latitude
+        self.longitude = longitude
+        self.distance_km = distance_km
+
+class MinHasher:
+    """
+    MinHash signatures of report text for near-duplicate detection.
+
+    Text is lowercased, reduced to its words and cut into overlapping
+    character shingles. For each of `permutations` hash functions the
+    signature keeps the smallest hash over all shingles, so the share of
+    equal positions in two signatures estimates the Jaccard similarity of
+    their shingle sets. Signatures are split into `bands`; reports sharing
+    any band bucket are candidates (LSH), found without scanning all news.
+    """
+    prime = 4294967311  # bilangan prima di atas 2**32
+
+    def __init__(self, permutations=64, bands=16, shingle_size=5, seed=1):
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, 2 ** 32) for _ in range(permutations)]
+        self.b = [rng.randrange(0, 2 ** 32) for _ in range(permutations)]
+        self.rows = permutations // bands
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.a_array = self.b_array = None
+
+    def shingles(self, text):
+        normalized = ' '.join(re.findall(r'\w+', text.lower()))
+        size = self.shingle_size
+        return {zlib.crc32(normalized[i:i + size].encode('utf-8'))
+                for i in range(max(len(normalized) - size + 1, 1))}
+
+    def signature(self, text):
+        shingles = self.shingles(text)
+        if numpy:
+            if self.a_array is None:
+                self.a_array = numpy.array(self.a, dtype=numpy.uint64)[:, None]
+                self.b_array = numpy.array(self.b, dtype=numpy.uint64)[:, None]
+            # a, x < 2**32 sehingga a * x + b tidak melebihi uint64
+            x = numpy.fromiter(shingles, dtype=numpy.uint64, count=len(shingles))
+            hashes = (self.a_array * x + self.b_array) % numpy.uint64(self.prime)
+            return [int(value) for value in hashes.min(axis=1)]
+        return [min((a * x + b) % self.prime for x in shingles)
+                for a, b in zip(self.a, self.b)]
+
+    def band_keys(self, signature):
+        """
+        (band, bucket) pairs of a signature, bucket being a 64 bit hash of the band
+        """
+        keys = []
+        for band in range(self.bands):
+            values = array('q', signature[band * self.rows:(band + 1) * self.rows]).tobytes()
+            bucket = int.from_bytes(hashlib.blake2b(values, digest_size=8).digest(), 'big', signed=True)
+            keys.append((band, bucket))
+        return keys
+
+    @staticmethod
+    def similarity(first, second):
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+    @staticmethod
+    def pack(signature):
+        return array('q', signature).tobytes()
+
+    @staticmethod
+    def unpack(blob):
+        values = array('q')
+        values.frombytes(blob)
+        return values.tolist()
+
+ModerationLogRow = namedtuple('ModerationLogRow', 'old_status new_status moderator_id note created_at')
+ContactRow = namedtuple('ContactRow', 'phone label priority')
+DeliveryRow = namedtuple('DeliveryRow', 'phone status attempts latency_ms error')
+
+class Statement:
+    """
+    A SQL statement and the row type (a Model or namedtuple) its results
+    are returned as
+    """
+    __slots__ = ('sql', 'row_type', 'row_factory')
+
+    def __init__(self, sql, row_type=None):
+        self.sql = sql
+        self.row_type = row_type
+        self.row_factory = None
+        if row_type is not None:
+            make = row_type.from_row if issubclass(row_type, Model) else row_type._make
+            self.row_factory = lambda cursor, row: make(row)
+
+    def format(self, **names):
+        """
+        SQL of a template statement with its table, column and placeholder
+        lists filled in. Only names from the code, never user input.
+        """
+        return self.sql.format(**names)
+
+# Semua query DatabaseManager didaftarkan di sini, jangan tulis SQL di layar
+STATEMENTS = {
+    'insert_user': Statement('''
+        INSERT INTO users (phone, name, password, email, region)
+        VALUES (?, ?, ?, ?, ?)
+    '''),
+    'user_region': Statement('''
+        SELECT region FROM users WHERE id = ?
+    '''),
+    'user_password': Statement('''
+        SELECT password FROM users WHERE phone = ?
+    '''),
+    'upsert_device': Statement('''
+        INSERT OR REPLACE INTO device_auth
+        (user_id, device_id, device_hash, last_access, is_active)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP, 1)
+    '''),
+    'deactivate_other_users': Statement('''
+        UPDATE device_auth SET is_active = 0
+        WHERE device_id = ? AND user_id != ?
+    '''),
+    'deactivate_device': Statement('''
+        UPDATE device_auth SET is_active = 0 WHERE device_id = ?
+    '''),
+    'device_hash': Statement('''
+        SELECT device_hash FROM device_auth
+        WHERE device_id = ? AND user_id = ? AND is_active = 1
+    '''),
+    'insert_revoked_session': Statement('''
+        INSERT OR IGNORE INTO session_denylist (signature, expires_at)
+        VALUES (?, ?)
+    '''),
+    'revoked_sessions': Statement('''
+        SELECT signature FROM session_denylist WHERE expires_at > ?
+    '''),
+    'purge_revoked_sessions': Statement('''
+        DELETE FROM session_denylist WHERE expires_at <= ?
+    '''),
+    'user_by_device': Statement('''
+        SELECT u.id, u.phone, u.name, u.email, u.registration_date, u.is_moderator
+        FROM users u
+        JOIN device_auth d ON u.id = d.user_id
+        WHERE d.device_id = ? AND d.is_active = 1
+    ''', User),
+    'user_by_phone': Statement('''
+        SELECT id, phone, name, email, registration_date, is_moderator
+        FROM users
+        WHERE phone = ?
+    ''', User),
+    'is_moderator': Statement('''
+        SELECT is_moderator FROM users WHERE id = ?
+    '''),
+    'set_moderator': Statement('''
+        UPDATE users SET is_moderator = ? WHERE id = ?
+    '''),
+    'update_profile': Statement('''
+        UPDATE users
+        SET name = ?, email = ?
+        WHERE phone = ?
+    '''),
+    'insert_news': Statement('''
+        INSERT INTO news
+        (title, description, category, author_id, status, created_at, duplicate_of)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''),
+    'count_report': Statement('''
+        UPDATE news SET report_count = report_count + 1 WHERE id = ?
+    '''),
+    'insert_minhash': Statement('''
+        INSERT INTO news_minhash (news_id, signature) VALUES (?, ?)
+    '''),
+    'insert_lsh_bucket': Statement('''
+        INSERT OR IGNORE INTO news_lsh_buckets (band, bucket, news_id) VALUES (?, ?, ?)
+    '''),
+    'lsh_candidates': Statement('''
+        SELECT b.news_id, m.signature
+        FROM news_lsh_buckets b
+        JOIN news n ON n.id = b.news_id
+        JOIN news_minhash m ON m.news_id = b.news_id
+        WHERE b.band = ? AND b.bucket = ?
+          AND n.created_at >= ? AND n.status != 'rejected'
+        ORDER BY b.news_id DESC
+        LIMIT 8
+    '''),
+    'approved_news': Statement('''
+        SELECT id, title, description, category, status, created_at, report_count
+        FROM news
+        WHERE status = 'approved'
+        ORDER BY created_at DESC
+    ''', NewsItem),
+    'news_feed': Statement('''
+        SELECT id, title, category, created_at, report_count
+        FROM news
+        WHERE status = 'approved'
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', NewsSummary),
+    'news_feed_snippet': Statement('''
+        SELECT id, title, category, created_at, report_count, substr(description, 1, ?)
+        FROM news
+        WHERE status = 'approved'
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', NewsSummary),
+    # Halaman berikutnya mulai dari (created_at, id) baris terakhir, tanpa OFFSET
+    'news_feed_after': Statement('''
+        SELECT id, title, category, created_at, report_count
+        FROM news
+        WHERE status = 'approved' AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', NewsSummary),
+    'news_feed_snippet_after': Statement('''
+        SELECT id, title, category, created_at, report_count, substr(description, 1, ?)
+        FROM news
+        WHERE status = 'approved' AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', NewsSummary),
+    'news_changes': Statement('''
+        SELECT c.seq, c.news_id, n.status, n.title, n.description, n.category, n.created_at,
+               n.report_count, n.image_path
+        FROM news_changes c
+        LEFT JOIN news n ON n.id = c.news_id
+        WHERE c.seq > ?
+        ORDER BY c.seq
+        LIMIT ?
+    '''),
+    'upsert_synced_news': Statement('''
+        INSERT INTO news (sync_source, remote_id, title, description, category, created_at,
+                          report_count, image_path, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'approved')
+        ON CONFLICT (sync_source, remote_id) DO UPDATE SET
+            title = excluded.title, description = excluded.description,
+            category = excluded.category, created_at = excluded.created_at,
+            report_count = excluded.report_count, image_path = excluded.image_path,
+            status = 'approved'
+    '''),
+    'delete_synced_news': Statement('''
+        DELETE FROM news WHERE sync_source = ? AND remote_id = ?
+    '''),
+    'sync_mark': Statement('''
+        SELECT value FROM sync_state WHERE name = ?
+    '''),
+    'sync_marks': Statement('''
+        SELECT name, value FROM sync_state WHERE name = ? OR name GLOB ?
+    '''),
+    'set_sync_mark': Statement('''
+        INSERT INTO sync_state (name, value) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET value = excluded.value
+    '''),
+    'responders': Statement('''
+        SELECT emergency_type, name, phone, latitude, longitude
+        FROM responders
+    ''', Responder),
+    'upsert_responder': Statement('''
+        INSERT INTO responders (emergency_type, name, phone, latitude, longitude)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (emergency_type, phone) DO UPDATE SET
+            name = excluded.name,
+            latitude = excluded.latitude,
+            longitude = excluded.longitude
+    '''),
+    'news_detail': Statement('''
+        SELECT id, title, description, category, status, created_at, report_count
+        FROM news
+        WHERE id = ?
+    ''', NewsItem),
+    'pending_news': Statement('''
+        SELECT id, title, description, category, status, created_at, report_count
+        FROM news
+        WHERE status = 'pending'
+        ORDER BY created_at ASC
+        LIMIT ?
+    ''', NewsItem),
+    'moderation_log': Statement('''
+        SELECT old_status, new_status, moderator_id, note, created_at
+        FROM news_moderation_log
+        WHERE news_id = ?
+        ORDER BY id
+    ''', ModerationLogRow),
+    'upsert_contact': Statement('''
+        INSERT INTO emergency_contacts (user_id, phone, label, priority)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, phone)
+        DO UPDATE SET label = excluded.label, priority = excluded.priority
+    '''),
+    'delete_contacts': Statement('''
+        DELETE FROM emergency_contacts WHERE user_id = ?
+    '''),
+    'insert_contact': Statement('''
+        INSERT INTO emergency_contacts (user_id, phone, label, priority)
+        VALUES (?, ?, ?, ?)
+    '''),
+    'contacts': Statement('''
+        SELECT phone, label, priority
+        FROM emergency_contacts
+        WHERE user_id = ?
+        ORDER BY priority, id
+    ''', ContactRow),
+    'insert_emergency': Statement('''
+        INSERT INTO emergency_logs
+        (user_id, emergency_type, location, latitude, longitude, geocell, journal_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''),
+    'replay_emergency': Statement('''
+        INSERT OR IGNORE INTO emergency_logs
+        (user_id, emergency_type, location, latitude, longitude, geocell, timestamp, journal_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''),
+    'emergency_events': Statement('''
+        SELECT id, user_id, emergency_type, location, latitude, longitude,
+               geocell, timestamp, status
+        FROM emergency_logs
+        WHERE user_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', EmergencyEvent),
+    'upsert_delivery': Statement('''
+        INSERT INTO notification_deliveries
+        (event_id, phone, status, attempts, latency_ms, error, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(event_id, phone) DO UPDATE SET
+            status = excluded.status,
+            attempts = excluded.attempts,
+            latency_ms = excluded.latency_ms,
+            error = excluded.error,
+            updated_at = CURRENT_TIMESTAMP
+    '''),
+    'deliveries': Statement('''
+        SELECT phone, status, attempts, latency_ms, error
+        FROM notification_deliveries
+        WHERE event_id = ?
+        ORDER BY id
+    ''', DeliveryRow),
+    'log_moderation': Statement('''
+        INSERT INTO news_moderation_log
+        (news_id, moderator_id, old_status, new_status, note)
+        SELECT id, ?, status, ?, ?
+        FROM news
+        WHERE status = 'pending' AND id IN ({placeholders})
+    '''),
+    'moderate_news': Statement('''
+        UPDATE news
+        SET status = ?
+        WHERE status = 'pending' AND id IN ({placeholders})
+    '''),
+    'clear_rollups': Statement('''
+        DELETE FROM emergency_rollup_hourly
+    '''),
+    'backfill_rollups': Statement('''
+        INSERT INTO emergency_rollup_hourly (emergency_type, hour, geocell, count)
+        SELECT COALESCE(emergency_type, 'unknown'),
+               strftime('%Y-%m-%d %H:00', timestamp),
+               COALESCE(geocell, 'unknown'),
+               COUNT(*)
+        FROM emergency_logs
+        GROUP BY 1, 2, 3
+    '''),
+    'incidents_by_type': Statement('''
+        SELECT emergency_type, SUM(count)
+        FROM emergency_rollup_hourly
+        WHERE hour >= ?
+        GROUP BY emergency_type
+        ORDER BY 2 DESC
+    '''),
+    'incidents_by_hour': Statement('''
+        SELECT substr(hour, 12, 2), SUM(count)
+        FROM emergency_rollup_hourly
+        WHERE hour >= ? AND (? IS NULL OR emergency_type = ?)
+        GROUP BY 1
+        ORDER BY 1
+    '''),
+    'incidents_by_region': Statement('''
+        SELECT geocell, SUM(count)
+        FROM emergency_rollup_hourly
+        WHERE hour >= ? AND (? IS NULL OR emergency_type = ?)
+        GROUP BY geocell
+        ORDER BY 2 DESC
+        LIMIT ?
+    '''),
+    # Templat RetentionManager: tabel dan kolom berasal dari RetentionPolicy
+    'create_archive_table': Statement('''
+        CREATE TABLE IF NOT EXISTS {table} ({definitions})
+    '''),
+    'add_archive_column': Statement('''
+        ALTER TABLE {table} ADD COLUMN {name} {type}
+    '''),
+    'create_archive_index': Statement('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_id ON {table} (id)
+    '''),
+    'retention_candidates': Statement('''
+        SELECT {columns} FROM {table}
+        WHERE {timestamp_column} < datetime('now', ?) AND ({condition})
+        ORDER BY id
+        LIMIT ?
+    '''),
+    'retention_rows': Statement('''
+        SELECT {columns} FROM {table} WHERE {column} IN ({placeholders})
+    '''),
+    'archive_rows': Statement('''
+        INSERT OR REPLACE INTO {table} ({columns})
+        VALUES ({placeholders})
+    '''),
+    'retention_delete': Statement('''
+        DELETE FROM {table} WHERE {column} IN ({placeholders})
+    '''),
+}
+
+class DatabaseManager:
+    def register_user(self, phone, name, password, email=None, region=None):
+        """
+    Register a new user in the database.
+    `region` picks the shard of their news with ShardedDatabaseManager.
+    """
+
+        try:
+            with metrics.timer('security.pbkdf2'):
+                hashed_password = SecurityUtils.hash_password(password)
+
+            def write(cursor):
+                cursor.execute(STATEMENTS['insert_user'].sql,
+                               (phone, name, hashed_password, email, region))
+
+            self.writer.execute(write)
+            return True
+        except sqlite3.IntegrityError:
+            return False 
+          
+    def get_connection(self, **options):
+      """
+       Create and return a connection to the SQLite database.
+       `options` are passed on to sqlite3.connect.
+      """
+      factory = TimedConnection if metrics.enabled else sqlite3.Connection
+      return sqlite3.connect(self.db_name, timeout=DB_BUSY_TIMEOUT, factory=factory, **options)
+
+    def read_connection(self):
+        """
+        Persistent read connection of the calling thread. sqlite3 caches the
+        compiled statements of a connection, so a registered query is only
+        parsed once per thread.
+        """
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.get_connection(cached_statements=STATEMENT_CACHE_SIZE,
+                                       check_same_thread=False)
+            self.local.conn = conn
+            with self.read_lock:
+                self.read_connections.append(conn)
+        return conn
+
+    def query(self, name, parameters=()):
+        """
+        Run a registered statement and return all rows as its row type
+        """
+        statement = STATEMENTS[name]
+        with metrics.timer('db.statement', statement=name):
+            cursor = self.read_connection().cursor()
+            cursor.row_factory = statement.row_factory
+            return cursor.execute(statement.sql, parameters).fetchall()
+
+    def query_one(self, name, parameters=()):
+        """
+        Run a registered statement and return the first row or None
+        """
+        statement = STATEMENTS[name]
+        with metrics.timer('db.statement', statement=name):
+            cursor = self.read_connection().cursor()
+            cursor.row_factory = statement.row_factory
+            return cursor.execute(statement.sql, parameters).fetchone()
+
+    def close(self):
+        """
+        Close the read connections of all threads
+        """
+        with self.read_lock:
+            for conn in self.read_connections:
+                conn.close()
+            self.read_connections = []
+        self.local = threading.local()
+
+    def __init__(self, db_name='emergency_app.db', shard_index=0):
+        """
+        Initialize database connection and create tables.
+        `shard_index` is the number of this file in a ShardMap.
+        """
+        self.db_name = db_name
+        self.shard_index = shard_index
+        self.local = threading.local()
+        self.read_lock = threading.Lock()
+        self.read_connections = []
+        self.minhasher = MinHasher()
+        self.writer = WriteCoordinator.for_database(self)
+        self.create_tables()
+        if shard_index:
+            self.reserve_ids(shard_index << SHARD_ID_BITS)
+
+    def reserve_ids(self, base):
+        """
+        Start the ids of the sharded tables after `base`, so the id of a
+        row also tells which shard holds it
+        """
+        def write(cursor):
+            for table in SHARDED_TABLES:
+                cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?',
+                               (base, table))
+                cursor.execute('''
+                INSERT INTO sqlite_sequence (name, seq)
+                SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+                ''', (table, base, table))
+
+        self.writer.execute(write)
+
+    def databases(self):
+        """
+        Every DatabaseManager holding data, for backups and retention
+        """
+        return [self]
+
+    def region_for_point(self, latitude, longitude):
+        """
+        Region to register a user at this location with; a single
+        database has no regions
+        """
+        return None
+
+    def restored(self):
+        """
+        Called by BackupManager.restore after the file was replaced: bring
+        a snapshot of an older version up to the current schema
+        """
+        self.create_tables()
+
+    def create_tables(self):
+        """
+         Create necessary tables with enhanced schema
+        """
+        # PRAGMA ini tidak bisa dijalankan di dalam transaksi writer
+        conn = self.get_connection()
+        try:
+            # Hanya berlaku untuk database baru, lihat RetentionManager.convert_auto_vacuum
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            # WAL: pembaca tetap jalan saat ada yang menulis
+            conn.execute('PRAGMA journal_mode = WAL')
+        finally:
+            conn.close()
+
+        def write(cursor):
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                phone TEXT UNIQUE NOT NULL,
+                name TEXT NOT NULL,
+                password TEXT NOT NULL,
+                email TEXT,
+                emergency_contact_1 TEXT,
+                emergency_contact_2 TEXT,
+                registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_login DATETIME,
+                login_attempts INTEGER DEFAULT 0,
+                is_locked BOOLEAN DEFAULT 0,
+                lock_time DATETIME
+            )
+            ''')
+
+            
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS news (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                category TEXT,
+                author_id INTEGER,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                image_path TEXT,
+                status TEXT DEFAULT 'pending',
+                FOREIGN KEY(author_id) REFERENCES users(id)
+            )
+            ''')
+
+            
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS emergency_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                emergency_type TEXT,
+                location TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                status TEXT DEFAULT 'initiated',
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS device_auth (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                device_id TEXT NOT NULL,
+                device_hash TEXT NOT NULL,
+                last_access DATETIME DEFAULT CURRENT_TIMESTAMP,
+                is_active BOOLEAN DEFAULT 1,
+                FOREIGN KEY(user_id) REFERENCES users(id),
+                UNIQUE(user_id, device_id)
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS news_moderation_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                news_id INTEGER NOT NULL,
+                moderator_id INTEGER,
+                old_status TEXT,
+                new_status TEXT NOT NULL,
+                note TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(news_id) REFERENCES news(id),
+                FOREIGN KEY(moderator_id) REFERENCES users(id)
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS emergency_contacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                phone TEXT NOT NULL,
+                label TEXT,
+                priority INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id),
+                UNIQUE(user_id, phone)
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER NOT NULL,
+                phone TEXT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                latency_ms REAL,
+                error TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(event_id) REFERENCES emergency_logs(id),
+                UNIQUE(event_id, phone)
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_news_status_created
+            ON news (status, created_at)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_moderation_log_news
+            ON news_moderation_log (news_id)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_emergency_contacts_user
+            ON emergency_contacts (user_id, priority)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_device_auth_device
+            ON device_auth (device_id, is_active)
+            ''')
+
+            # Token sesi yang dicabut sebelum kedaluwarsa
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_denylist (
+                signature TEXT PRIMARY KEY,
+                expires_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+            ''')
+
+        self.writer.execute(write, timeout=None)
+        self.run_migrations()
+
+    def run_migrations(self):
+        """
+        Upgrade data of older databases, tracked with PRAGMA user_version.
+        All steps run in one writer transaction, so a failed upgrade leaves
+        the database at its old version.
+        """
+        def write(cursor):
+            version = cursor.execute('PRAGMA user_version').fetchone()[0]
+
+            if version < 1:
+                # Pindahkan kontak darurat dari kolom lama ke tabel emergency_contacts
+                for priority, column in enumerate(('emergency_contact_1', 'emergency_contact_2'), 1):
+                    cursor.execute(f'''
+                    INSERT OR IGNORE INTO emergency_contacts (user_id, phone, label, priority)
+                    SELECT id, {column}, 'Contact {priority}', {priority}
+                    FROM users
+                    WHERE {column} IS NOT NULL AND {column} != ''
+                    ''')
+                cursor.execute('PRAGMA user_version = 1')
+
+            if version < 2:
+                # Koordinat dan geocell untuk analitik insiden per wilayah
+                cursor.execute('ALTER TABLE emergency_logs ADD COLUMN latitude REAL')
+                cursor.execute('ALTER TABLE emergency_logs ADD COLUMN longitude REAL')
+                cursor.execute("ALTER TABLE emergency_logs ADD COLUMN geocell TEXT DEFAULT 'unknown'")
+                EmergencyAnalytics.create_rollups(cursor)
+                EmergencyAnalytics.backfill_rollups(cursor)
+                cursor.execute('PRAGMA user_version = 2')
+
+            if version < 3:
+                # Deduplikasi laporan: MinHash per berita dan bucket LSH per band
+                cursor.execute('ALTER TABLE news ADD COLUMN duplicate_of INTEGER REFERENCES news(id)')
+                cursor.execute('ALTER TABLE news ADD COLUMN report_count INTEGER NOT NULL DEFAULT 1')
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_minhash (
+                    news_id INTEGER PRIMARY KEY,
+                    signature BLOB NOT NULL
+                )
+                ''')
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_lsh_buckets (
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    news_id INTEGER NOT NULL,
+                    PRIMARY KEY (band, bucket, news_id)
+                ) WITHOUT ROWID
+                ''')
+                cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_lsh_buckets_news
+                ON news_lsh_buckets (news_id)
+                ''')
+                cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_news_dedupe_cleanup
+                AFTER DELETE ON news
+                BEGIN
+                    DELETE FROM news_minhash WHERE news_id = old.id;
+                    DELETE FROM news_lsh_buckets WHERE news_id = old.id;
+                END
+                ''')
+                cursor.execute('PRAGMA user_version = 3')
+
+            if version < 4:
+                # Id jurnal darurat, supaya replay tidak mencatat kejadian dua kali
+                cursor.execute('ALTER TABLE emergency_logs ADD COLUMN journal_id INTEGER')
+                cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_emergency_logs_journal
+                ON emergency_logs (journal_id)
+                ''')
+                cursor.execute('PRAGMA user_version = 4')
+
+            if version < 5:
+                # Wilayah pengguna untuk memilih shard
+                cursor.execute('ALTER TABLE users ADD COLUMN region TEXT')
+                cursor.execute('PRAGMA user_version = 5')
+
+            if version < 6:
+                # Log perubahan berita publik untuk sinkronisasi delta antar perangkat:
+                # satu baris per berita dengan nomor urut perubahan terakhirnya
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_changes (
+                    news_id INTEGER PRIMARY KEY,
+                    seq INTEGER NOT NULL UNIQUE
+                )
+                ''')
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                ) WITHOUT ROWID
+                ''')
+                for event, row, condition in (
+                        ('INSERT', 'NEW', "NEW.status = 'approved'"),
+                        ('UPDATE', 'NEW', "OLD.status = 'approved' OR NEW.status = 'approved'"),
+                        ('DELETE', 'OLD', "OLD.status = 'approved'")):
+                    cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_news_sync_{event.lower()}
+                    AFTER {event} ON news
+                    WHEN {condition}
+                    BEGIN
+                        INSERT INTO news_changes (news_id, seq)
+                        VALUES ({row}.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM news_changes))
+                        ON CONFLICT (news_id) DO UPDATE SET seq = excluded.seq;
+                    END
+                    ''')
+                cursor.execute('''
+                INSERT INTO news_changes (news_id, seq)
+                SELECT id, ROW_NUMBER() OVER (ORDER BY id) FROM news WHERE status = 'approved'
+                ''')
+                cursor.execute('PRAGMA user_version = 6')
+
+            if version < 7:
+                # Hanya moderator yang boleh menyetujui atau menolak berita
+                cursor.execute('ALTER TABLE users ADD COLUMN is_moderator INTEGER NOT NULL DEFAULT 0')
+                cursor.execute('PRAGMA user_version = 7')
+
+            if version < 8:
+                # Berita hasil sinkronisasi mendapat id lokal sendiri; id server disimpan
+                # per sumber, supaya tidak menimpa atau menghapus berita lokal dengan id sama
+                cursor.execute('ALTER TABLE news ADD COLUMN sync_source TEXT')
+                cursor.execute('ALTER TABLE news ADD COLUMN remote_id INTEGER')
+                cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_news_remote
+                ON news (sync_source, remote_id)
+                ''')
+                cursor.execute('PRAGMA user_version = 8')
+
+            if version < 9:
+                # Waktu berita lokal dulu ditulis dengan jam lokal; sekarang UTC
+                # seperti CURRENT_TIMESTAMP dan perbandingan datetime('now')
+                cursor.execute('''
+                UPDATE news SET created_at = datetime(created_at, 'utc')
+                WHERE sync_source IS NULL
+                ''')
+                cursor.execute('PRAGMA user_version = 9')
+
+            if version < 10:
+                # Kantor polisi, pemadam dan ambulans dengan nomor langsungnya
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS responders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    emergency_type TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    UNIQUE (emergency_type, phone)
+                )
+                ''')
+                cursor.execute('PRAGMA user_version = 10')
+
+        self.writer.execute(write, timeout=None)
+
+    def authenticate_user(self, phone, password):
+        """
+         Authenticate user with phone number and password.
+         """
+        result = self.query_one('user_password', (phone,))
+        if not result:
+            return False
+        with metrics.timer('security.pbkdf2'):
+            return SecurityUtils.verify_password(result[0], password)
+
+    def register_device(self, user_id, device_id):
+        """
+        Register a device for automatic login
+        """
+        device_hash = SecurityUtils.get_device_hash(device_id, user_id)
+        
+        def write(cursor):
+            # Satu perangkat hanya untuk satu pengguna aktif
+            cursor.execute(STATEMENTS['deactivate_other_users'].sql, (device_id, user_id))
+            cursor.execute(STATEMENTS['upsert_device'].sql, (user_id, device_id, device_hash))
+
+        try:
+            self.writer.execute(write)
+            return True
+        except sqlite3.Error:
+            return False
+    
+
+    def deactivate_device(self, device_id):
+        """
+        Stop automatic login on a device
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['deactivate_device'].sql, (device_id,))
+
+        self.writer.execute(write)
+
+    def verify_device(self, user_id, device_id):
+        """
+        Check that the device is still trusted for the user and that its
+        stored device_hash matches
+        """
+        row = self.query_one('device_hash', (device_id, user_id))
+        return bool(row) and hmac.compare_digest(
+            row[0], SecurityUtils.get_device_hash(device_id, user_id))
+
+    def revoke_session(self, signature, expires_at):
+        def write(cursor):
+            cursor.execute(STATEMENTS['insert_revoked_session'].sql, (signature, expires_at))
+
+        self.writer.execute(write)
+
+    def get_revoked_sessions(self, now):
+        """
+        Get the signatures of revoked tokens that have not expired yet.
+        Expired ones are purged by the writer without waiting for it.
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['purge_revoked_sessions'].sql, (now,))
+
+        self.writer.submit(write)
+        return {row[0] for row in self.query('revoked_sessions', (now,))}
+
+    def get_user_by_device(self, device_id):
+        """
+        Get user data if device is registered
+        """
+        return self.query_one('user_by_device', (device_id,))
+
+    def get_user_by_phone(self, phone):
+        """
+        Get user data by phone number
+        """
+        return self.query_one('user_by_phone', (phone,))
+
+    def submit_news(self, title, description, category, author_id=None, deduplicate=True):
+        """
+        Insert a news report into the moderation queue and return its id.
+        A near-duplicate of a report from the last DEDUP_WINDOW_HOURS is
+        stored with status 'duplicate' and counted on the original instead.
+        """
+        # UTC, sama seperti CURRENT_TIMESTAMP dan datetime('now') di SQLite
+        now = time.time()
+        created_at = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now))
+        since = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now - DEDUP_WINDOW_HOURS * 3600))
+        signature = self.minhasher.signature(f'{title} {description}') if deduplicate else None
+
+        def write(cursor):
+            duplicate_of = self.find_duplicate(cursor, signature, since) if signature else None
+            status = 'pending' if duplicate_of is None else 'duplicate'
+            cursor.execute(STATEMENTS['insert_news'].sql,
+                           (title, description, category, author_id, status, created_at,
+                            duplicate_of))
+            news_id = cursor.lastrowid
+
+            if duplicate_of is not None:
+                cursor.execute(STATEMENTS['count_report'].sql, (duplicate_of,))
+            elif signature:
+                cursor.execute(STATEMENTS['insert_minhash'].sql,
+                               (news_id, MinHasher.pack(signature)))
+                cursor.executemany(STATEMENTS['insert_lsh_bucket'].sql,
+                                   [(band, bucket, news_id)
+                                    for band, bucket in self.minhasher.band_keys(signature)])
+            return news_id
+
+        return self.writer.execute(write)
+
+    def find_duplicate(self, cursor, signature, since):
+        """
+        Id of the most similar recent report sharing an LSH bucket with
+        `signature`, if it is similar enough. Only a few bucket rows are
+        read per band, however many reports exist.
+        """
+        candidates = {}
+        for band, bucket in self.minhasher.band_keys(signature):
+            for news_id, blob in cursor.execute(STATEMENTS['lsh_candidates'].sql,
+                                                (band, bucket, since)):
+                candidates[news_id] = blob
+
+        best_id, best_similarity = None, DEDUP_THRESHOLD
+        for news_id, blob in candidates.items():
+            similarity = MinHasher.similarity(signature, MinHasher.unpack(blob))
+            if similarity >= best_similarity:
+                best_id, best_similarity = news_id, similarity
+        return best_id
+
+    def get_approved_news(self):
+        """
+        Get the public news feed, newest first
+        """
+        return self.query('approved_news')
+
+    def get_news_feed(self, snippet_length=0, limit=-1, after=None):
+        """
+        Get the news list newest first, with only the columns the feed
+        shows and the first `snippet_length` characters of the description.
+        At most `limit` rows (-1 for all), starting after `after`, the
+        (created_at, id) of the last row of the previous page.
+        """
+        name = 'news_feed_snippet' if snippet_length else 'news_feed'
+        parameters = (snippet_length,) if snippet_length else ()
+        if after is not None:
+            name += '_after'
+            parameters += tuple(after)
+        return self.query(name, parameters + (limit,))
+
+    def update_profile(self, phone, name, email):
+        """
+        Update the name and email of a user
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['update_profile'].sql, (name, email, phone))
+            return cursor.rowcount
+
+        return self.writer.execute(write)
+
+    def get_news(self, news_id):
+        """
+        Get the details of one news item
+        """
+        return self.query_one('news_detail', (news_id,))
+
+    def get_pending_news(self, limit=100):
+        """
+        Get the moderation queue, oldest first
+        """
+        return self.query('pending_news', (limit,))
+
+    def is_moderator(self, user_id):
+        row = self.query_one('is_moderator', (user_id,)) if user_id is not None else None
+        return bool(row and row[0])
+
+    def set_moderator(self, user_id, is_moderator=True):
+        """
+        Grant or take away the right to moderate news
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['set_moderator'].sql, (int(is_moderator), user_id))
+            return cursor.rowcount
+
+        return self.writer.execute(write)
+
+    def moderate_news(self, news_ids, new_status, moderator_id, note=None):
+        """
+        Move pending news to 'approved' or 'rejected' and write the audit trail.
+        Only a moderator may do this. Returns the number of news items that
+        changed status.
+        """
+        if new_status not in MODERATION_STATUSES:
+            raise ValueError(f'Invalid moderation status: {new_status}')
+        if not self.is_moderator(moderator_id):
+            raise PermissionError('Only moderators can moderate news')
+
+        return self.update_news_status([int(news_id) for news_id in news_ids], new_status,
+                                       moderator_id, note)
+
+    def update_news_status(self, news_ids, new_status, moderator_id, note):
+        def write(cursor):
+            changed = 0
+            for start in range(0, len(news_ids), SQL_BATCH_SIZE):
+                chunk = news_ids[start:start + SQL_BATCH_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(STATEMENTS['log_moderation'].format(placeholders=placeholders),
+                               (moderator_id, new_status, note, *chunk))
+                cursor.execute(STATEMENTS['moderate_news'].format(placeholders=placeholders),
+                               (new_status, *chunk))
+                changed += cursor.rowcount
+            return changed
+
+        return self.writer.execute(write)
+
+    def approve_news(self, news_ids, moderator_id, note=None):
+        return self.moderate_news(news_ids, 'approved', moderator_id, note)
+
+    def reject_news(self, news_ids, moderator_id, note=None):
+        return self.moderate_news(news_ids, 'rejected', moderator_id, note)
+
+    def get_moderation_log(self, news_id):
+        """
+        Get the audit trail of a news item
+        """
+        return self.query('moderation_log', (news_id,))
+
+    def add_emergency_contact(self, user_id, phone, label=None, priority=0):
+        """
+        Add an emergency contact, or update it if the phone is already saved
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['upsert_contact'].sql, (user_id, phone, label, priority))
+
+        self.writer.execute(write)
+
+    def save_emergency_contacts(self, user_id, contacts):
+        """
+        Replace all emergency contacts of a user in one transaction.
+        `contacts` is a list of (phone, label) in priority order.
+        """
+        rows = []
+        seen = set()
+        for phone, label in contacts:
+            if phone and phone not in seen:
+                seen.add(phone)
+                rows.append((user_id, phone, label, len(rows) + 1))
+
+        def write(cursor):
+            cursor.execute(STATEMENTS['delete_contacts'].sql, (user_id,))
+            cursor.executemany(STATEMENTS['insert_contact'].sql, rows)
+
+        self.writer.execute(write)
+
+    def get_emergency_contacts(self, user_id):
+        """
+        Get the emergency contacts of a user, highest priority first
+        """
+        return self.query('contacts', (user_id,))
+
+    def log_emergency(self, user_id, emergency_type, location=None, latitude=None, longitude=None,
+                      journal_id=None):
+        """
+        Record an emergency event and return its id
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['insert_emergency'].sql,
+                           (user_id, emergency_type, location, latitude, longitude,
+                            geocell(latitude, longitude), journal_id))
+            return cursor.lastrowid
+
+        return self.writer.execute(write)
+
+    def replay_emergencies(self, entries):
+        """
+        Add JournalEntry rows to emergency_logs, skipping the ones already
+        logged, and return how many were added
+        """
+        rows = [(entry.user_id, entry.emergency_type,
+                 f'Lat: {entry.latitude}, Lon: {entry.longitude}' if entry.latitude is not None else None,
+                 entry.latitude, entry.longitude, geocell(entry.latitude, entry.longitude),
+                 # CURRENT_TIMESTAMP SQLite juga UTC
+                 time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(entry.timestamp)),
+                 entry.journal_id)
+                for entry in entries]
+
+        def write(cursor):
+            cursor.executemany(STATEMENTS['replay_emergency'].sql, rows)
+            return cursor.rowcount
+
+        return self.writer.execute(write) if rows else 0
+
+    def get_emergency_events(self, user_id, limit=20):
+        """
+        Get the latest emergencies of a user, newest first
+        """
+        return self.query('emergency_events', (user_id, limit))
+
+    def record_delivery(self, event_id, phone, status, attempts, latency_ms=None, error=None):
+        """
+        Save the delivery status of an emergency notification
+        """
+        def write(cursor):
+            cursor.execute(STATEMENTS['upsert_delivery'].sql,
+                           (event_id, phone, status, attempts, latency_ms, error))
+
+        self.writer.execute(write)
+
+    def get_deliveries(self, event_id):
+        """
+        Get the delivery status of every contact notified for an event
+        """
+        return self.query('deliveries', (event_id,))
+
+    def get_news_changes(self, since, limit=SYNC_BATCH_SIZE):
+        """
+        Changes of public news after the change numbers in `since`, which
+        maps a shard number (a string, like a JSON key) to the last change
+        seen from that shard. Change numbers count per database file, so
+        rows are (shard, seq, news_id, status, *SYNC_NEWS_COLUMNS[1:]),
+        oldest first within a shard. A status other than 'approved' means
+        the news is no longer public.
+        """
+        shard = str(self.shard_index)
+        return [(shard, *row) for row in self.query('news_changes', (since.get(shard, 0), limit))]
+
+    def get_responders(self):
+        """
+        All police, fire and medical stations as Responder models
+        """
+        return self.query('responders')
+
+    def import_responders(self, path=RESPONDERS_PATH):
+        """
+        Save the stations of a CSV with the columns type, name, phone,
+        latitude, longitude, once per version of the file. Stations are
+        matched by type and phone. Returns the number of rows imported.
+        """
+        if not os.path.exists(path):
+            return 0
+        mark_name = f'responders:{os.path.basename(path)}'
+        version = int(os.path.getmtime(path))
+        if self.get_sync_mark(mark_name) == version:
+            return 0
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [(row['type'], row['name'], row['phone'],
+                     float(row['latitude']), float(row['longitude']))
+                    for row in csv.DictReader(f)]
+
+        def write(cursor):
+            cursor.executemany(STATEMENTS['upsert_responder'].sql, rows)
+            cursor.execute(STATEMENTS['set_sync_mark'].sql, (mark_name, version))
+
+        self.writer.execute(write)
+        return len(rows)
+
+    def get_sync_mark(self, name):
+        """
+        Last change number received from sync source `name`
+        """
+        row = self.query_one('sync_mark', (name,))
+        return row[0] if row else 0
+
+    @staticmethod
+    def sync_mark_name(name, shard):
+        # Shard 0 memakai nama lama, jadi tanda dari sebelum sharding tetap berlaku
+        return name if shard == '0' else f'{name}:{shard}'
+
+    def get_sync_marks(self, name):
+        """
+        Last change number received from each shard of sync source `name`,
+        as {shard: seq}
+        """
+        return {mark_name[len(name) + 1:] or '0': value
+                for mark_name, value in self.query('sync_marks', (name, f'{name}:*'))}
+
+    def apply_news_changes(self, name, rows, deleted, marks):
+        """
+        Save synced news and remove the deleted ones in one transaction,
+        together with the new marks {shard: seq} of sync source `name`.
+        Rows are matched by (source, server id) and get their own local id.
+        """
+        def write(cursor):
+            cursor.executemany(STATEMENTS['upsert_synced_news'].sql, [(name, *row) for row in rows])
+            cursor.executemany(STATEMENTS['delete_synced_news'].sql,
+                               [(name, news_id) for news_id in deleted])
+            cursor.executemany(STATEMENTS['set_sync_mark'].sql,
+                               [(self.sync_mark_name(name, shard), seq) for shard, seq in marks.items()])
+
+        self.writer.execute(write)
+
+class ShardMap:
+    """
+    Regions of a multi-city deployment and the database file of each.
+    The first region is the home shard, which also keeps the users.
+    `bounds` maps a region to (south, west, north, east); emergencies are
+    routed by the centre of their geocell, so a whole cell always lands
+    in the same shard, and cells outside every bound go to `default`.
+    Shard numbers follow the order of `shards` and are part of every row
+    id, so regions may only be added at the end.
+    """
+    def __init__(self, shards, bounds=None, default=None):
+        if not shards:
+            raise ValueError('A shard map needs at least one shard')
+        if len(shards) > SHARD_LIMIT:
+            raise ValueError(f'At most {SHARD_LIMIT} shards can be attached for global reads')
+        self.shards = dict(shards)
+        self.regions = list(self.shards)
+        self.home = self.regions[0]
+        self.bounds = bounds or {}
+        self.default = default or self.home
+        if self.default not in self.shards:
+            raise ValueError(f'Unknown default region: {self.default}')
+        self.cells = {}
+
+    @classmethod
+    def from_json(cls, path=SHARD_MAP_PATH):
+        """
+        Load {"shards": {region: path}, "bounds": {region: [s, w, n, e]}, "default": region}
+        """
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config['shards'], config.get('bounds'), config.get('default'))
+
+    def region_for_point(self, latitude, longitude):
+        if latitude is None or longitude is None:
+            return self.default
+        cell = geocell(latitude, longitude)
+        region = self.cells.get(cell)
+        if region is None:
+            center_lat = (math.floor(latitude / GEOCELL_SIZE) + 0.5) * GEOCELL_SIZE
+            center_lon = (math.floor(longitude / GEOCELL_SIZE) + 0.5) * GEOCELL_SIZE
+            region = next((name for name, (south, west, north, east) in self.bounds.items()
+                           if south <= center_lat <= north and west <= center_lon <= east),
+                          self.default)
+            self.cells[cell] = region
+        return region
+
+    def region_for_id(self, row_id):
+        return self.regions[int(row_id) >> SHARD_ID_BITS]
+
+class ShardedDatabaseManager(DatabaseManager):
+    """
+    DatabaseManager over one database file per region.
+
+    Users, devices, sessions and emergency contacts stay in the home shard
+    and use the inherited methods. News goes to the shard of the author's
+    region, emergencies to the shard of their geocell (or of the user when
+    there are no coordinates), and rows that belong to them follow their id.
+
+    Reads use one connection per thread with every shard attached and a
+    TEMP VIEW per sharded table that unions the shards. The view has the
+    table's name and shadows it, so the registered statements read all
+    regions unchanged and SQLite still uses each shard's indexes.
+
+    news_changes is not one of the views: its change numbers count per
+    file. The sync server reads the log of every shard with the shard
+    number next to each change, and synced news are stored in the shard
+    the map gives their server id.
+
+    Writes never go through that connection. One connection runs one
+    statement at a time, so writes on it would queue behind each other
+    for every region. Each shard writes through its own DatabaseManager
+    and write lock instead. Sharding does not add write throughput: the
+    writers still share the CPU and the disk. What it removes is the wait
+    for another region's write lock, which shows in the worst write
+    latency, not in writes per second.
+    """
+    def __init__(self, shard_map):
+        self.shard_map = shard_map
+        self.region_cache = LRUCache(USER_REGION_CACHE_SIZE)
+        self.region_lock = threading.Lock()
+        super().__init__(shard_map.shards[shard_map.home])
+        # Shard rumah memakai file yang sama dan berbagi WriteCoordinator dengan self
+        self.shards = {region: DatabaseManager(path, index)
+                       for index, (region, path) in enumerate(shard_map.shards.items())}
+
+    def databases(self):
+        # Shard rumah lewat self, supaya restored() juga mengosongkan cache wilayah
+        return [self] + [self.shards[region] for region in self.shard_map.regions[1:]]
+
+    def region_for_point(self, latitude, longitude):
+        if latitude is None or longitude is None:
+            return None
+        return self.shard_map.region_for_point(latitude, longitude)
+
+    def restored(self):
+        super().restored()
+        with self.region_lock:
+            self.region_cache.clear()
+
+    def read_connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        conn = super().read_connection()
+        schemas = ['main']
+        for index, path in enumerate(list(self.shard_map.shards.values())[1:], 1):
+            conn.execute(f'ATTACH DATABASE ? AS shard_{index}', (path,))
+            schemas.append(f'shard_{index}')
+        for table in SHARDED_TABLES + ('emergency_rollup_hourly',):
+            union = ' UNION ALL '.join(f'SELECT * FROM {schema}.{table}' for schema in schemas)
+            conn.execute(f'CREATE TEMP VIEW {table} AS {union}')
+        return conn
+
+    def close(self):
+        super().close()
+        for shard in self.shards.values():
+            shard.close()
+
+    def user_region(self, user_id):
+        """
+        Region of a user, the default region when it is not set
+        """
+        if user_id is None:
+            return self.shard_map.default
+        with self.region_lock:
+            region = self.region_cache.get(user_id)
+        if region is None:
+            row = self.query_one('user_region', (user_id,))
+            region = row[0] if row and row[0] in self.shards else self.shard_map.default
+            with self.region_lock:
+                self.region_cache.put(user_id, region)
+        return region
+
+    def shard_for_id(self, row_id):
+        return self.shards[self.shard_map.region_for_id(row_id)]
+
+    def synced_region(self, remote_id):
+        """
+        Region of a synced news item: the shard in its server id, or the
+        default region when that shard is not in this map
+        """
+        index = int(remote_id) >> SHARD_ID_BITS
+        if index < len(self.shard_map.regions):
+            return self.shard_map.regions[index]
+        return self.shard_map.default
+
+    def get_news_changes(self, since, limit=SYNC_BATCH_SIZE):
+        changes = []
+        for region in self.shard_map.regions:
+            changes += self.shards[region].get_news_changes(since, limit - len(changes))
+            if len(changes) >= limit:
+                break
+        return changes
+
+    def apply_news_changes(self, name, rows, deleted, marks):
+        """
+        Save synced news in the shard of their server id and remove them
+        from the others, then save the marks in the home shard. Shards are
+        separate transactions: after a crash in between, the next sync
+        repeats the batch, which writes the same rows again.
+        """
+        regions = [self.synced_region(row[0]) for row in rows]
+        for region, shard in self.shards.items():
+            own = [row for row, row_region in zip(rows, regions) if row_region == region]
+            # Juga berita yang dulu tersimpan di shard lain, sebelum disebar per shard
+            elsewhere = [row[0] for row, row_region in zip(rows, regions) if row_region != region]
+            if own or elsewhere or deleted:
+                shard.apply_news_changes(name, own, deleted + elsewhere, {})
+        super().apply_news_changes(name, [], [], marks)
+
+    def submit_news(self, title, description, category, author_id=None, deduplicate=True):
+        # Duplikat hanya dicari di wilayah yang sama
+        shard = self.shards[self.user_region(author_id)]
+        return shard.submit_news(title, description, category, author_id, deduplicate)
+
+    def update_news_status(self, news_ids, new_status, moderator_id, note):
+        # Hak moderator sudah diperiksa di shard rumah oleh moderate_news
+        by_region = {}
+        for news_id in news_ids:
+            by_region.setdefault(self.shard_map.region_for_id(news_id), []).append(news_id)
+        return sum(self.shards[region].update_news_status(ids, new_status, moderator_id, note)
+                   for region, ids in by_region.items())
+
+    def log_emergency(self, user_id, emergency_type, location=None, latitude=None, longitude=None,
+                      journal_id=None):
+        if latitude is None or longitude is None:
+            region = self.user_region(user_id)
+        else:
+            region = self.shard_map.region_for_point(latitude, longitude)
+        return self.shards[region].log_emergency(user_id, emergency_type, location,
+                                                 latitude, longitude, journal_id)
+
+    def replay_emergencies(self, entries):
+        by_region = {}
+        for entry in entries:
+            region = (self.user_region(entry.user_id) if entry.latitude is None or entry.longitude is None
+                      else self.shard_map.region_for_point(entry.latitude, entry.longitude))
+            by_region.setdefault(region, []).append(entry)
+        return sum(self.shards[region].replay_emergencies(region_entries)
+                   for region, region_entries in by_region.items())
+
+    def record_delivery(self, event_id, phone, status, attempts, latency_ms=None, error=None):
+        self.shard_for_id(event_id).record_delivery(event_id, phone, status, attempts,
+                                                    latency_ms, error)
+
+def open_database(shard_map_path=SHARD_MAP_PATH):
+    """
+    ShardedDatabaseManager when a shard map is configured, else the single database
+    """
+    if os.path.exists(shard_map_path):
+        return ShardedDatabaseManager(ShardMap.from_json(shard_map_path))
+    return DatabaseManager()
+
+class AsyncDatabase:
+    """
+    Runs DatabaseManager calls on a small thread pool so a slow disk never
+    stalls the UI. Results come back on the Kivy main thread, either as a
+    callback scheduled with Clock or by awaiting the coroutine methods when
+    the app runs under asyncio (App.async_run).
+    """
+    def __init__(self, db_manager, max_workers=4):
+        self.db_manager = db_manager
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='db-async')
+        self.pending = 0
+        self.idle = threading.Condition()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the pool and return its Future
+        """
+        with self.idle:
+            self.pending += 1
+        future = self.executor.submit(func, *args, **kwargs)
+        future.add_done_callback(self.finished)
+        return future
+
+    def finished(self, future):
+        with self.idle:
+            self.pending -= 1
+            self.idle.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every submitted call has finished
+        """
+        with self.idle:
+            return self.idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def call(self, func, *args, callback=None, on_error=None, **kwargs):
+        """
+        Run func on the pool and pass its result to callback on the main thread
+        """
+        future = self.submit(func, *args, **kwargs)
+        future.add_done_callback(
+            lambda f: Clock.schedule_once(lambda dt: self.resolve([f], callback, on_error, single=True))
+        )
+        return future
+
+    def gather(self, calls, callback=None, on_error=None):
+        """
+        Run several (func, *args) calls concurrently and pass the list of
+        results to callback on the main thread once all of them finished
+        """
+        futures = [self.submit(func, *args) for func, *args in calls]
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(future):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            Clock.schedule_once(lambda dt: self.resolve(futures, callback, on_error))
+
+        for future in futures:
+            future.add_done_callback(done)
+        return futures
+
+    @staticmethod
+    def resolve(futures, callback, on_error, single=False):
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    Logger.error(f'AsyncDatabase: {error!r}')
+                return
+
+        if callback:
+            results = [future.result() for future in futures]
+            callback(results[0] if single else results)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Await func(*args, **kwargs) from a coroutine on the asyncio loop
+        """
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    async def authenticate_user(self, phone, password):
+        return await self.run(self.db_manager.authenticate_user, phone, password)
+
+    async def register_user(self, phone, name, password, email=None, region=None):
+        return await self.run(self.db_manager.register_user, phone, name, password, email, region)
+
+    async def get_user_by_device(self, device_id):
+        return await self.run(self.db_manager.get_user_by_device, device_id)
+
+    async def get_user_by_phone(self, phone):
+        return await self.run(self.db_manager.get_user_by_phone, phone)
+
+    async def get_approved_news(self):
+        return await self.run(self.db_manager.get_approved_news)
+
+    async def get_pending_news(self, limit=100):
+        return await self.run(self.db_manager.get_pending_news, limit)
+
+    async def get_news_feed(self, snippet_length=0, limit=-1, after=None):
+        return await self.run(self.db_manager.get_news_feed, snippet_length, limit, after)
+
+    async def get_news(self, news_id):
+        return await self.run(self.db_manager.get_news, news_id)
+
+    async def submit_news(self, title, description, category, author_id=None):
+        return await self.run(self.db_manager.submit_news, title, description, category, author_id)
+
+    async def update_profile(self, phone, name, email):
+        return await self.run(self.db_manager.update_profile, phone, name, email)
+
+    async def get_emergency_contacts(self, user_id):
+        return await self.run(self.db_manager.get_emergency_contacts, user_id)
+
+    async def save_emergency_contacts(self, user_id, contacts):
+        return await self.run(self.db_manager.save_emergency_contacts, user_id, contacts)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+class SessionManager:
+    """
+    Device-trust auto-login with signed session tokens.
+
+    A token is 'user_id.device_id.expires.signature', signed with
+    HMAC-SHA256 and a key kept in `key_path`. Checking it only needs the
+    key and the in-memory denylist, which load_denylist() reads once at
+    startup; the database is read when the token has expired (the device
+    must still be trusted in device_auth to renew it) and when a token is
+    revoked. Everything except authenticate() runs on the main thread.
+    """
+    def __init__(self, db_manager, device_manager, key_path='session.key', ttl=SESSION_TOKEN_TTL):
+        self.db_manager = db_manager
+        self.device_manager = device_manager
+        self.key_path = key_path
+        self.ttl = ttl
+        self.key = None
+        self.denylist = set()
+        self.token = None
+        self.user = None
+
+    def load_denylist(self):
+        self.denylist = self.db_manager.get_revoked_sessions(int(time.time()))
+
+    def load_key(self):
+        if self.key is None:
+            try:
+                fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(os.urandom(32))
+            except FileExistsError:
+                pass
+            with open(self.key_path, 'rb') as f:
+                self.key = f.read()
+        return self.key
+
+    def sign(self, payload):
+        return hmac.new(self.load_key(), payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def issue(self, user):
+        """
+        Create a token for the user on this device and store the session
+        """
+        expires = int(time.time()) + self.ttl
+        payload = f'{user.id}.{self.device_manager.get_device_id()}.{expires}'
+        token = f'{payload}.{self.sign(payload)}'
+        self.device_manager.save_user_session(user, token)
+        self.token, self.user = token, user
+        return token
+
+    def verify(self, token, allow_expired=False):
+        """
+        Return (user_id, expires) of a genuine, not revoked token of this
+        device, or None. Expired tokens only pass with `allow_expired`.
+        """
+        try:
+            payload, signature = token.rsplit('.', 1)
+            user_id, device_id, expires = payload.split('.')
+            user_id, expires = int(user_id), int(expires)
+        except (AttributeError, ValueError):
+            return None
+
+        if not hmac.compare_digest(signature, self.sign(payload)):
+            return None
+        if device_id != self.device_manager.get_device_id():
+            return None
+        if expires <= time.time() and not allow_expired:
+            return None
+        if signature in self.denylist:
+            return None
+        return user_id, expires
+
+    def current_user(self):
+        """
+        Get the logged in user. A valid token is checked in memory; an
+        expired one is renewed if the device is still trusted. Without a
+        token nobody is logged in and the database is not touched.
+        """
+        if self.token is None:
+            self.token = self.device_manager.get_session_token()
+            self.user = self.device_manager.get_stored_user() if self.token else None
+
+        if self.token is None:
+            return None
+
+        claims = self.verify(self.token, allow_expired=True)
+        if claims is None or self.user is None or claims[0] != self.user.id:
+            # Token palsu atau sudah dicabut: perangkat tidak dipercaya lagi
+            self.db_manager.deactivate_device(self.device_manager.get_device_id())
+            self.forget()
+            return None
+        if claims[1] > time.time():
+            return self.user
+        return self.renew()
+
+    def renew(self):
+        """
+        Issue a new token when this device is still registered for the user
+        """
+        device_id = self.device_manager.get_device_id()
+        user = self.db_manager.get_user_by_device(device_id)
+        if user is None or not self.db_manager.verify_device(user.id, device_id):
+            self.forget()
+            return None
+        self.issue(user)
+        return user
+
+    def authenticate(self, phone, password, device_id):
+        """
+        Check the password and trust the device. Returns the User or None.
+        Safe on an AsyncDatabase worker; the session itself is started by
+        calling issue() with the user back on the main thread.
+        """
+        if not self.db_manager.authenticate_user(phone, password):
+            return None
+        user = self.db_manager.get_user_by_phone(phone)
+        self.db_manager.register_device(user.id, device_id)
+        return user
+
+    def logout(self):
+        """
+        Revoke the current token and stop trusting this device
+        """
+        token = self.token or self.device_manager.get_session_token()
+        verified = self.verify(token) if token else None
+        if verified:
+            signature = token.rsplit('.', 1)[1]
+            self.db_manager.revoke_session(signature, verified[1])
+            self.denylist.add(signature)
+        self.db_manager.deactivate_device(self.device_manager.get_device_id())
+        self.forget()
+
+    def forget(self):
+        self.token = None
+        self.user = None
+        self.device_manager.clear_session()
+
+class EmergencyAnalytics:
+    """
+    Incident dashboards read from emergency_rollup_hourly, a small table of
+    counts per (emergency_type, hour, geocell) that a trigger keeps up to
+    date on every insert into emergency_logs. Reads go through
+    read_connection(), so with ShardedDatabaseManager they sum all regions.
+    """
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    @staticmethod
+    def create_rollups(cursor):
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS emergency_rollup_hourly (
+            emergency_type TEXT NOT NULL,
+            hour TEXT NOT NULL,
+            geocell TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (emergency_type, hour, geocell)
+        ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rollup_hour
+        ON emergency_rollup_hourly (hour, count)
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_emergency_rollup
+        AFTER INSERT ON emergency_logs
+        BEGIN
+            INSERT INTO emergency_rollup_hourly (emergency_type, hour, geocell, count)
+            VALUES (COALESCE(NEW.emergency_type, 'unknown'),
+                    strftime('%Y-%m-%d %H:00', NEW.timestamp),
+                    COALESCE(NEW.geocell, 'unknown'),
+                    1)
+            ON CONFLICT (emergency_type, hour, geocell)
+            DO UPDATE SET count = count + 1;
+        END
+        ''')
+
+    @staticmethod
+    def backfill_rollups(cursor):
+        """
+        Recount the rollup table from the raw logs in one statement
+        """
+        cursor.execute(STATEMENTS['clear_rollups'].sql)
+        cursor.execute(STATEMENTS['backfill_rollups'].sql)
+
+    def rebuild(self):
+        """
+        Backfill the rollups, e.g. after bulk loading logs
+        """
+        self.db_manager.writer.execute(self.backfill_rollups, timeout=None)
+
+    def incidents_by_type(self, since='1970-01-01'):
+        return self.db_manager.query('incidents_by_type', (since,))
+
+    def incidents_by_hour(self, since='1970-01-01', emergency_type=None):
+        """
+        Incidents per hour of the day (00-23)
+        """
+        return self.db_manager.query('incidents_by_hour', (since, emergency_type, emergency_type))
+
+    def incidents_by_region(self, since='1970-01-01', emergency_type=None, limit=20):
+        """
+        Geocells with the most incidents
+        """
+        return self.db_manager.query('incidents_by_region',
+                                     (since, emergency_type, emergency_type, limit))
+
+class RetentionPolicy:
+    """
+    Rows of `table` older than `max_age_days` (by `timestamp_column`)
+    that also match the optional SQL `condition` get archived.
+    `children` are (table, column) pairs of rows that refer to an archived
+    row; they are archived with it. Rows of the `forget` (table, column)
+    pairs are only deleted.
+    """
+    def __init__(self, table, max_age_days, timestamp_column, condition=None,
+                 children=(), forget=()):
+        self.table = table
+        self.max_age_days = max_age_days
+        self.timestamp_column = timestamp_column
+        self.condition = condition
+        self.children = children
+        self.forget = forget
+
+DEFAULT_RETENTION_POLICIES = [
+    # Berita yang diarsipkan tidak dihapus di perangkat lain, jadi perubahan
+    # sinkronisasinya (termasuk tombstone dari trigger) ikut dibuang
+    RetentionPolicy('news', 90, 'created_at',
+                    children=(('news_moderation_log', 'news_id'),),
+                    forget=(('news_changes', 'news_id'),)),
+    # Status log darurat tidak pernah diubah dari 'initiated', jadi tidak dijadikan syarat
+    RetentionPolicy('emergency_logs', 365, 'timestamp',
+                    children=(('notification_deliveries', 'event_id'),)),
+]
+
+class RetentionManager:
+    """
+    Move old rows into an archive database in small transactions, then give
+    the free pages back to the file system with incremental VACUUM. Rows are
+    copied on a connection of the archive file; deletes and vacuum steps go
+    through the WriteCoordinator like every other write.
+    """
+    def __init__(self, db_manager, archive_path='emergency_archive.db',
+                 policies=None, batch_size=500, pause=0.01, vacuum_step=256):
+        self.db_manager = db_manager
+        self.archive_path = archive_path
+        self.policies = DEFAULT_RETENTION_POLICIES if policies is None else policies
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_step = vacuum_step
+
+    def run(self):
+        """
+        Apply every policy and return a report of moved rows and reclaimed bytes
+        """
+        report = {'archived': {}}
+        # Hanya membaca; semua perubahan database utama lewat writer
+        conn = self.db_manager.get_connection()
+        archive = sqlite3.connect(self.archive_path, timeout=DB_BUSY_TIMEOUT)
+        try:
+            size_before = self.database_size(conn)
+
+            for policy in self.policies:
+                report['archived'][policy.table] = self.archive(conn, archive, policy)
+
+            if not self.convert_auto_vacuum():
+                self.vacuum()
+            report['bytes_reclaimed'] = size_before - self.database_size(conn)
+        finally:
+            archive.close()
+            conn.close()
+
+        Logger.info(f"Retention: {report}")
+        return report
+
+    def run_in_background(self):
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def database_size(conn):
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        return page_count * page_size
+
+    @staticmethod
+    def sync_archive_table(conn, archive, table):
+        """
+        Create the archive copy of `table` and add columns added by later migrations
+        """
+        main_columns = [(row[1], row[2]) for row in conn.execute(f'PRAGMA table_info({table})')]
+        definitions = ', '.join(f'{name} {type_}' for name, type_ in main_columns)
+        archive.execute(STATEMENTS['create_archive_table'].format(table=table, definitions=definitions))
+        archive_columns = {row[1] for row in archive.execute(f'PRAGMA table_info({table})')}
+        for name, type_ in main_columns:
+            if name not in archive_columns:
+                archive.execute(STATEMENTS['add_archive_column'].format(table=table, name=name,
+                                                                        type=type_))
+        archive.execute(STATEMENTS['create_archive_index'].format(table=table))
+        archive.commit()
+        return [name for name, _ in main_columns]
+
+    def copy_rows(self, conn, archive, table, column, values):
+        """
+        Copy the rows of `table` whose `column` is in `values` into the archive
+        """
+        names = self.sync_archive_table(conn, archive, table)
+        columns = ', '.join(names)
+        rows = conn.execute(STATEMENTS['retention_rows'].format(
+            columns=columns, table=table, column=column,
+            placeholders=','.join('?' * len(values))), values).fetchall()
+        archive.executemany(STATEMENTS['archive_rows'].format(
+            table=table, columns=columns, placeholders=','.join('?' * len(names))), rows)
+
+    def archive(self, conn, archive, policy):
+        """
+        Move matching rows batch by batch: copy them and their children into
+        the archive first, then delete them from the database in one short
+        write. A crash in between only copies the batch again, INSERT OR
+        REPLACE keeps one row.
+        """
+        names = self.sync_archive_table(conn, archive, policy.table)
+        columns = ', '.join(names)
+        id_index = names.index('id')
+        candidates = STATEMENTS['retention_candidates'].format(
+            columns=columns, table=policy.table, timestamp_column=policy.timestamp_column,
+            condition=policy.condition or '1')
+        insert = STATEMENTS['archive_rows'].format(
+            table=policy.table, columns=columns, placeholders=','.join('?' * len(names)))
+        age = f'-{policy.max_age_days} days'
+        moved = 0
+
+        while True:
+            rows = conn.execute(candidates, (age, self.batch_size)).fetchall()
+            if not rows:
+                return moved
+
+            archive.executemany(insert, rows)
+            ids = [row[id_index] for row in rows]
+            for table, column in policy.children:
+                self.copy_rows(conn, archive, table, column, ids)
+            archive.commit()
+
+            def write(cursor):
+                delete = STATEMENTS['retention_delete']
+                placeholders = ','.join('?' * len(ids))
+                for table, column in policy.children:
+                    cursor.execute(delete.format(table=table, column=column,
+                                                 placeholders=placeholders), ids)
+                cursor.execute(delete.format(table=policy.table, column='id',
+                                             placeholders=placeholders), ids)
+                # Setelah induknya: trigger DELETE menulis ke tabel ini
+                for table, column in policy.forget:
+                    cursor.execute(delete.format(table=table, column=column,
+                                                 placeholders=placeholders), ids)
+
+            self.db_manager.writer.execute(write)
+            moved += len(ids)
+
+            # Beri kesempatan penulis lain di antara batch
+            time.sleep(self.pause)
+
+    @staticmethod
+    def needs_conversion(conn):
+        """
+        True for databases created before auto_vacuum was enabled
+        """
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2
+
+    @staticmethod
+    def freelist_count(conn):
+        return conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    def vacuum(self):
+        """
+        Release free pages, `vacuum_step` pages per writer transaction.
+        sqlite3 only steps incremental_vacuum once per execute(), which
+        frees a single page, so it is repeated until the step is done.
+        """
+        def write(cursor):
+            free = self.freelist_count(cursor)
+            target = max(free - self.vacuum_step, 0)
+            while free > target:
+                cursor.execute(f'PRAGMA incremental_vacuum({self.vacuum_step})')
+                remaining = self.freelist_count(cursor)
+                if remaining >= free:
+                    return 0
+                free = remaining
+            return free
+
+        while self.db_manager.writer.execute(write):
+            time.sleep(self.pause)
+
+    def convert_auto_vacuum(self):
+        """
+        Switch a database created before auto_vacuum was enabled to
+        incremental mode with one full VACUUM, which also releases every
+        free page. Writers wait for it, so it only runs from run(), on the
+        maintenance thread. Returns True when a conversion ran.
+        """
+        conn = self.db_manager.get_connection()
+        try:
+            if not self.needs_conversion(conn):
+                return False
+            start = time.perf_counter()
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+        Logger.info(f'Retention: Converted {self.db_manager.db_name} to incremental auto_vacuum '
+                    f'in {(time.perf_counter() - start) * 1000:.0f} ms')
+        return True
+
+class BackupManager:
+    """
+    Online snapshots of the database with the sqlite3 backup API.
+
+    The copy runs `pages` pages per step on its own connection and sleeps
+    between steps, so writers and the UI keep running. Snapshots are
+    written to a .part file and get their .sha256 file before they are
+    renamed, so a snapshot without one was never finished; only the newest
+    `keep` are kept. restore() verifies the checksum, copies the snapshot
+    back into the live database in one step and lets the DatabaseManager
+    upgrade it with restored().
+    """
+    def __init__(self, db_manager, directory=BACKUP_DIR, keep=BACKUP_KEEP,
+                 pages=BACKUP_STEP_PAGES, pause=0.005):
+        self.db_manager = db_manager
+        self.directory = directory
+        self.keep = keep
+        self.pages = pages
+        self.pause = pause
+        self.lock = threading.Lock()
+
+    def backup(self):
+        """
+        Write a new snapshot, rotate the old ones and return its path
+        """
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(self.db_manager.db_name))[0]
+            path = os.path.join(self.directory,
+                                f"{stem}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.db")
+            partial = path + '.part'
+
+            start = time.perf_counter()
+            source = sqlite3.connect(self.db_manager.db_name, timeout=DB_BUSY_TIMEOUT,
+                                     isolation_level=None)
+            target = sqlite3.connect(partial)
+            try:
+                # Tahan satu snapshot WAL selama backup; tanpa ini setiap commit
+                # dari koneksi lain membuat backup mulai lagi dari awal
+                source.execute('BEGIN')
+                source.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+                source.backup(target, pages=self.pages, progress=self.step)
+                source.execute('COMMIT')
+                # Satu file utuh tanpa -wal, supaya checksum tetap berlaku
+                target.execute('PRAGMA journal_mode = DELETE')
+            except BaseException:
+                target.close()
+                os.remove(partial)
+                raise
+            finally:
+                source.close()
+            target.close()
+
+            checksum = self.checksum(partial)
+            with open(partial, 'rb') as f:
+                os.fsync(f.fileno())
+            # Checksum dulu: snapshot tanpa .sha256 tidak dihitung oleh snapshots() dan due()
+            with open(path + '.sha256', 'w', encoding='utf-8') as f:
+                f.write(f'{checksum}  {os.path.basename(path)}\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(partial, path)
+            self.rotate()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.record('db.backup', elapsed_ms, bytes=os.path.getsize(path))
+        Logger.info(f'Backup: Saved {path} in {elapsed_ms:.0f} ms')
+        return path
+
+    def step(self, status, remaining, total):
+        # Dipanggil setelah setiap langkah; beri waktu untuk UI dan penulis
+        time.sleep(self.pause)
+
+    def run_in_background(self):
+        def run():
+            try:
+                self.backup()
+            except Exception as e:
+                Logger.exception(f'Backup: Failed: {e}')
+                metrics.record('error', 1, where='backup', error=str(e))
+
+        thread = threading.Thread(target=run, daemon=True, name='db-backup')
+        thread.start()
+        return thread
+
+    def due(self, interval=BACKUP_INTERVAL):
+        """
+        True when the newest snapshot is older than `interval` seconds
         """
-        self.store = JsonStore('device_info.json')
-        
-    def get_device_id(self):
+        snapshots = self.snapshots()
+        return not snapshots or time.time() - os.path.getmtime(snapshots[0]) > interval
+
+    def snapshots(self):
         """
-        Generate or retrieve a unique device identifier using a combination of available system information
+        Paths of the finished snapshots, newest first
         """
-        import platform as platform_lib
-        
-        def generate_device_hash():
-            
-            system_info = [
-                platform_lib.system(),           
-                platform_lib.machine(),        
-                platform_lib.processor(),        
-                str(os.getenv('USER', '')),    
-                str(os.getenv('HOME', '')),     
-            ]
-            
-            system_str = '|'.join(filter(None, system_info))
-            return hashlib.sha256(system_str.encode('utf-8')).hexdigest()
-            
-        if not self.store.exists('device_id'):
-            device_id = str(uuid.uuid4())
-            self.store.put('device_id', value=device_id)
-        else:
-            device_id = self.store.get('device_id')['value']
+        if not os.path.isdir(self.directory):
+            return []
+        stem = os.path.splitext(os.path.basename(self.db_manager.db_name))[0]
+        files = set(os.listdir(self.directory))
+        names = [name for name in files
+                 if name.startswith(stem + '-') and name.endswith('.db') and name + '.sha256' in files]
+        return [os.path.join(self.directory, name) for name in sorted(names, reverse=True)]
 
+    def rotate(self):
+        for path in self.snapshots()[self.keep:]:
+            for name in (path, path + '.sha256'):
+                if os.path.exists(name):
+                    os.remove(name)
 
+    @staticmethod
+    def checksum(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
 
-    def save_user_session(self, user_data):
+    def verify(self, path):
         """
-        Save user session data securely
+        True when the snapshot still matches its recorded checksum
         """
-        self.store.put('user_session', 
-                      device_id=self.get_device_id(),
-                      user_data=user_data,
-                      is_logged_in=True)
+        try:
+            with open(path + '.sha256', encoding='utf-8') as f:
+                expected = f.read().split()[0]
+        except (OSError, IndexError):
+            return False
+        return os.path.exists(path) and hmac.compare_digest(self.checksum(path), expected)
 
-    def clear_session(self):
+    def restore(self, path=None):
         """
-        Clear stored session data
+        Copy a snapshot (the newest valid one by default) back into the
+        live database and return its path. Queued writes wait until the
+        copy is done; open read connections see the restored data. An
+        older snapshot is migrated to the current schema afterwards.
         """
-        if self.store.exists('user_session'):
-            self.store.delete('user_session')
+        with self.lock:
+            if path is None:
+                path = next((snapshot for snapshot in self.snapshots() if self.verify(snapshot)), None)
+                if path is None:
+                    raise FileNotFoundError(f'No valid snapshot in {self.directory}')
+            elif not self.verify(path):
+                raise ValueError(f'Checksum of {path} does not match')
 
-    def is_logged_in(self):
+            start = time.perf_counter()
+            source = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            target = sqlite3.connect(self.db_manager.db_name, timeout=DB_BUSY_TIMEOUT)
+            try:
+                # Satu langkah: satu kunci tulis, bukan restart di tengah jalan
+                source.backup(target)
+            finally:
+                source.close()
+                target.close()
+            self.db_manager.restored()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.record('db.restore', elapsed_ms)
+        Logger.info(f'Backup: Restored {path} in {elapsed_ms:.0f} ms')
+        return path
+
+class NotificationTransport:
+    """
+    Base class for the channels used to notify emergency contacts.
+    send() must raise an exception when the message could not be delivered.
+    """
+    def send(self, phone, message):
+        raise NotImplementedError
+
+class SmsTransport(NotificationTransport):
+    """
+    Send notifications as SMS through the phone
+    """
+    def send(self, phone, message):
+        plyer.sms.send(recipient=phone, message=message)
+
+class FakeTransport(NotificationTransport):
+    """
+    Local transport that only records messages, used for testing.
+    The first `fail_times` sends to every phone raise an error;
+    `script` sets that number per phone instead.
+    """
+    def __init__(self, fail_times=0, latency=0, script=None):
+        self.fail_times = fail_times
+        self.script = script or {}
+        self.latency = latency
+        self.sent = []
+        self.failures = {}
+        self.lock = threading.Lock()
+
+    def send(self, phone, message):
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            failures = self.failures.get(phone, 0)
+            if failures < self.script.get(phone, self.fail_times):
+                self.failures[phone] = failures + 1
+                raise ConnectionError(f'Fake delivery to {phone} failed')
+            self.sent.append((phone, message))
+
+class EmergencyNotifier:
+    """
+    Notify all emergency contacts of a user concurrently
+    """
+    def __init__(self, db_manager, transport, max_workers=8, max_attempts=3, retry_delay=0.5):
+        self.db_manager = db_manager
+        self.transport = transport
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='notifier')
+
+    @staticmethod
+    def normalize_phone(phone):
         """
-        Check if there's an active session
+        Convert +62 / 62 / 0 prefixed numbers to one local format
         """
-        return (self.store.exists('user_session') and 
-                self.store.get('user_session')['is_logged_in'])
+        phone = re.sub(r'[\s\-()]', '', phone or '')
+        if phone.startswith('+62'):
+            return '0' + phone[3:]
+        if phone.startswith('62'):
+            return '0' + phone[2:]
+        return phone
 
-    def get_stored_user(self):
+    def notify(self, event_id, contacts, message):
         """
-        Get stored user data if available
+        Send `message` to every contact and wait for the results.
+        Contacts are ContactRow tuples; duplicate numbers and
+        contacts already reached for this event are skipped.
+        Returns a dict of phone -> delivery status.
         """
-        if self.is_logged_in():
-            return self.store.get('user_session')['user_data']
-        return None
+        delivered = {
+            delivery.phone for delivery in self.db_manager.get_deliveries(event_id)
+            if delivery.status == 'delivered'
+        }
 
-class SecurityUtils:
-     
-    @staticmethod
-    def hash_password(password, salt=None):
+        phones = []
+        for contact in sorted(contacts, key=lambda c: c.priority):
+            phone = self.normalize_phone(contact.phone)
+            if phone and phone not in phones and phone not in delivered:
+                phones.append(phone)
+
+        started = time.perf_counter()
+        futures = {
+            phone: self.executor.submit(self.deliver, event_id, phone, message, started)
+            for phone in phones
+        }
+        return {phone: future.result() for phone, future in futures.items()}
+
+    def notify_in_background(self, event_id, contacts, message):
         """
-        Securely hash passwords using PBKDF2 with SHA-256
+        Run notify() without blocking the caller
         """
-        if not salt:
-            salt = uuid.uuid4().hex
-        
-        pwdhash = hashlib.pbkdf2_hmac('sha256', 
-                                      password.encode('utf-8'), 
-                                      salt.encode('utf-8'), 
-                                      100000)
-        return f"{salt}${pwdhash.hex()}"
+        thread = threading.Thread(target=self.notify,
+                                  args=(event_id, contacts, message),
+                                  daemon=True)
+        thread.start()
+        return thread
 
-    @staticmethod
-    def verify_password(stored_password, provided_password):
+    def deliver(self, event_id, phone, message, started):
         """
-        Verify a stored password against one provided by user
+        Send one message with retries and record the outcome
         """
-        salt, pwdhash = stored_password.split('$')
-        return SecurityUtils.hash_password(provided_password, salt) == stored_password
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.transport.send(phone, message)
+                latency_ms = (time.perf_counter() - started) * 1000
+                self.db_manager.record_delivery(event_id, phone, 'delivered',
+                                                attempt, latency_ms)
+                return 'delivered'
+            except Exception as e:
+                error = str(e)
+                if attempt < self.max_attempts:
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
 
-    @staticmethod
-    def validate_password(password):
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.db_manager.record_delivery(event_id, phone, 'failed',
+                                        self.max_attempts, latency_ms, error)
+        return 'failed'
+
+class NewsSyncServer:
+    """
+    Server side of the delta news sync. A request names the last change
+    number the device has seen from each shard; the response holds the
+    news changed since then and the ids of news that were deleted or are
+    no longer public (tombstones), at most `batch_size` changes, and the
+    new number per shard, as zlib compressed JSON. With
+    ShardedDatabaseManager it serves the changes of every shard.
+    """
+    def __init__(self, db_manager, batch_size=SYNC_BATCH_SIZE, level=SYNC_COMPRESSION_LEVEL):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.level = level
+
+    def handle(self, request):
+        since = json.loads(request)['since']
+        if not isinstance(since, dict):
+            # Klien lama mengirim satu nomor, yaitu nomor shard 0
+            since = {'0': int(since)}
+        changes = self.db_manager.get_news_changes(since, self.batch_size + 1)
+        more = len(changes) > self.batch_size
+        changes = changes[:self.batch_size]
+
+        rows, deleted = [], []
+        marks = dict(since)
+        for shard, seq, news_id, status, *columns in changes:
+            if status == 'approved':
+                rows.append([news_id, *columns])
+            else:
+                deleted.append(news_id)
+            marks[shard] = seq
+        payload = {'rows': rows, 'deleted': deleted, 'mark': marks, 'more': more}
+        if rows:
+            payload['columns'] = SYNC_NEWS_COLUMNS
+        return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), self.level)
+
+class SyncTransport:
+    """
+    Base class for the channels used to reach the sync server.
+    exchange() sends the request bytes and returns the response bytes.
+    """
+    def exchange(self, request):
+        raise NotImplementedError
+
+class LocalSyncTransport(SyncTransport):
+    """
+    Stand-in for the network that calls a NewsSyncServer in the same
+    process and counts the bytes sent and received, used for testing
+    """
+    def __init__(self, server):
+        self.server = server
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def exchange(self, request):
+        response = self.server.handle(request)
+        self.bytes_sent += len(request)
+        self.bytes_received += len(response)
+        return response
+
+class NewsSyncClient:
+    """
+    Keep the local news feed up to date with a sync server, downloading
+    only what changed since the last sync. The news are kept under `name`
+    and their server id, next to the news written on this device, so use
+    one name per server.
+    """
+    def __init__(self, db_manager, transport, name='news'):
+        self.db_manager = db_manager
+        self.transport = transport
+        self.name = name
+
+    def sync(self):
         """
-        Validate password strength:
-        - Minimum 8 characters
-        - At least one uppercase letter
-        - At least one lowercase letter
-        - At least one number
-        - At least one special character
+        Fetch batches until the server has nothing newer and return a report
+        of the rows, tombstones and bytes of this sync
         """
-        if len(password) < 8:
-            return False, "Password must be at least 8 characters long"
-        
-        if not re.search(r'[A-Z]', password):
-            return False, "Password must contain at least one uppercase letter"
-        
-        if not re.search(r'[a-z]', password):
-            return False, "Password must contain at least one lowercase letter"
-        
-        if not re.search(r'\d', password):
-            return False, "Password must contain at least one number"
-        
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-            return False, "Password must contain at least one special character"
-        
-        return True, "Password is strong"
+        report = {'batches': 0, 'rows': 0, 'deleted': 0, 'bytes_sent': 0, 'bytes_received': 0,
+                  'json_bytes': 0}
+        start = time.perf_counter()
+        marks = self.db_manager.get_sync_marks(self.name)
+        while True:
+            request = json.dumps({'since': marks}).encode('utf-8')
+            response = self.transport.exchange(request)
+            body = zlib.decompress(response)
+            payload = json.loads(body)
+            if payload['rows'] and list(payload['columns']) != list(SYNC_NEWS_COLUMNS):
+                raise ValueError(f"Unexpected sync columns: {payload['columns']}")
 
-    @staticmethod
-    def validate_phone_number(phone):
+            # Satu transaksi per batch, tanda ikut disimpan: sync yang terputus lanjut dari sini
+            self.db_manager.apply_news_changes(self.name, payload['rows'], payload['deleted'],
+                                               payload['mark'])
+            marks = payload['mark']
+            report['batches'] += 1
+            report['rows'] += len(payload['rows'])
+            report['deleted'] += len(payload['deleted'])
+            report['bytes_sent'] += len(request)
+            report['bytes_received'] += len(response)
+            report['json_bytes'] += len(body)
+            if not payload['more']:
+                break
+
+        report['ms'] = (time.perf_counter() - start) * 1000
+        metrics.record('sync.bytes', report['bytes_received'], source=self.name,
+                       rows=report['rows'], deleted=report['deleted'])
+        Logger.info(f'NewsSync: {report}')
+        return report
+
+class ResponderDirectory:
+    """
+    Police, fire and medical stations with their direct numbers.
+
+    Stations of each type are indexed in a grid of `cell_size` degrees with
+    their coordinates in NumPy arrays. nearest_responders() searches rings of
+    cells around the caller and stops once no unsearched cell can hold a
+    closer station, so a lookup only touches a few cells even with 100k
+    stations. Without NumPy every lookup scans all stations of the type.
+    """
+    brute_force_limit = 2048
+    max_rings = 64
+
+    def __init__(self, stations=(), cell_size=GEOCELL_SIZE):
+        self.cell_size = cell_size
+        self.stations_by_type = {}
+        for station in stations:
+            self.stations_by_type.setdefault(station.emergency_type, []).append(station)
+        self.indexes = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_database(cls, db_manager, **kwargs):
         """
-        Validate phone number format
-        Supports international and local formats
+        Load the stations of the responders table, see DatabaseManager.import_responders
         """
-        phone_regex = r'^(\+62|62|^0)(\d{9,12})$'
-        return re.match(phone_regex, phone) is not None
+        return cls(db_manager.get_responders(), **kwargs)
 
+    def __len__(self):
+        return sum(len(stations) for stations in self.stations_by_type.values())
 
-    @staticmethod
-    def get_device_hash(device_id, user_id):
+    def build(self):
         """
-        Create a unique hash for device-user combination
+        Index the stations; done on the first lookup unless called before
         """
-        combined = f"{device_id}{user_id}".encode('utf-8')
-        return hashlib.sha256(combined).hexdigest()
+        with self.lock:
+            if self.indexes is None:
+                self.indexes = {emergency_type: self.build_index(items)
+                                for emergency_type, items in self.stations_by_type.items()}
+        return self.indexes
 
-class DatabaseManager:
-    def register_user(self, phone, name, password, email=None):
+    def build_index(self, stations):
         """
-    Register a new user in the database.
-    """
+        Return (stations, latitudes, longitudes, cells) where cells maps a
+        (row, col) grid cell to the positions of its stations
+        """
+        if not numpy:
+            return stations, None, None, None
 
-        try:
-            hashed_password = SecurityUtils.hash_password(password)
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO users (phone, name, password, email)
-                    VALUES (?, ?, ?, ?)
-                ''', (phone, name, hashed_password, email))
-                conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False 
-          
-    def get_connection(self):
-      """
-       Create and return a connection to the SQLite database.
-      """
-      return sqlite3.connect(self.db_name)
+        latitudes = numpy.array([station.latitude for station in stations], dtype=numpy.float64)
+        longitudes = numpy.array([station.longitude for station in stations], dtype=numpy.float64)
+        rows = numpy.floor(latitudes / self.cell_size).astype(numpy.int64)
+        cols = numpy.floor(longitudes / self.cell_size).astype(numpy.int64)
+
+        order = numpy.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        starts = numpy.flatnonzero((numpy.diff(rows) != 0) | (numpy.diff(cols) != 0)) + 1
+        bounds = zip(numpy.concatenate(([0], starts)), numpy.concatenate((starts, [len(order)])))
+        cells = {(int(rows[start]), int(cols[start])): order[start:end] for start, end in bounds}
+        return stations, latitudes, longitudes, cells
 
-    def __init__(self, db_name='emergency_app.db'):
+    @staticmethod
+    def ring(row, col, radius):
         """
-        Initialize database connection and create tables
+        Cells at exactly `radius` cells from (row, col)
         """
-        self.db_name = db_name
-        self.create_tables()
-    def create_tables(self):
+        if radius == 0:
+            return [(row, col)]
+        cells = []
+        for offset in range(-radius, radius + 1):
+            cells.append((row - radius, col + offset))
+            cells.append((row + radius, col + offset))
+        for offset in range(-radius + 1, radius):
+            cells.append((row + offset, col - radius))
+            cells.append((row + offset, col + radius))
+        return cells
+
+    def nearest_responders(self, latitude, longitude, emergency_type, k=3):
         """
-         Create necessary tables with enhanced schema
+        Get the k stations of a type closest to a coordinate, nearest first,
+        with distance_km set
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-           
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                password TEXT NOT NULL,
-                email TEXT,
-                emergency_contact_1 TEXT,
-                emergency_contact_2 TEXT,
-                registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_login DATETIME,
-                login_attempts INTEGER DEFAULT 0,
-                is_locked BOOLEAN DEFAULT 0,
-                lock_time DATETIME
-            )
-            ''')
+        indexes = self.indexes if self.indexes is not None else self.build()
+        index = indexes.get(emergency_type)
+        if index is None or k <= 0:
+            return []
+        stations, latitudes, longitudes, cells = index
+        k = min(k, len(stations))
+        # Jarak equirectangular, cukup akurat untuk jarak puluhan km
+        km_per_lon = KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
 
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS news (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                category TEXT,
-                author_id INTEGER,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                image_path TEXT,
-                status TEXT DEFAULT 'pending',
-                FOREIGN KEY(author_id) REFERENCES users(id)
-            )
-            ''')
+        if cells is None:
+            nearest = heapq.nsmallest(k, stations, key=lambda s: math.hypot(
+                (s.latitude - latitude) * KM_PER_DEGREE, (s.longitude - longitude) * km_per_lon))
+            return [self.with_distance(s, math.hypot((s.latitude - latitude) * KM_PER_DEGREE,
+                                                     (s.longitude - longitude) * km_per_lon))
+                    for s in nearest]
 
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                emergency_type TEXT,
-                location TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'initiated',
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            ''')
+        candidates = None
+        if len(stations) > self.brute_force_limit:
+            row = math.floor(latitude / self.cell_size)
+            col = math.floor(longitude / self.cell_size)
+            # Sel di luar cincin r berjarak minimal r sel dari penelepon
+            km_per_cell = self.cell_size * min(KM_PER_DEGREE, km_per_lon)
+            found = []
+            count = 0
+            for radius in range(self.max_rings):
+                for cell in self.ring(row, col, radius):
+                    positions = cells.get(cell)
+                    if positions is not None:
+                        found.append(positions)
+                        count += len(positions)
+                if count >= k:
+                    positions = numpy.concatenate(found)
+                    distances = self.distances(latitude, longitude, latitudes[positions],
+                                               longitudes[positions], km_per_lon)
+                    if numpy.partition(distances, k - 1)[k - 1] <= radius * km_per_cell:
+                        candidates = positions, distances
+                        break
 
-            conn.commit()
-        
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS device_auth (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                device_id TEXT NOT NULL,
-                device_hash TEXT NOT NULL,
-                last_access DATETIME DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1,
-                FOREIGN KEY(user_id) REFERENCES users(id),
-                UNIQUE(user_id, device_id)
-            )
-            ''')
-            conn.commit()
-    def authenticate_user(self, phone, password):
+        if candidates is None:
+            positions = numpy.arange(len(stations))
+            candidates = positions, self.distances(latitude, longitude, latitudes,
+                                                   longitudes, km_per_lon)
+
+        positions, distances = candidates
+        best = numpy.argpartition(distances, k - 1)[:k] if k < len(distances) else numpy.arange(len(distances))
+        best = best[numpy.argsort(distances[best])]
+        return [self.with_distance(stations[positions[i]], float(distances[i])) for i in best]
+
+    @staticmethod
+    def distances(latitude, longitude, latitudes, longitudes, km_per_lon):
+        return numpy.hypot((latitudes - latitude) * KM_PER_DEGREE,
+                           (longitudes - longitude) * km_per_lon)
+
+    @staticmethod
+    def with_distance(station, distance_km):
+        return Responder(station.emergency_type, station.name, station.phone,
+                         station.latitude, station.longitude, distance_km)
+
+class IncrementalBuilder:
+    """
+    Build widgets a slice at a time on the Kivy Clock.
+
+    Work is a generator that builds one widget (or row) per step and yields.
+    Every frame the builder runs steps for at most `budget_ms`, always the
+    lowest priority number first, so a long list never blocks the frame.
+    A step is only started when it fits in what is left of the budget,
+    judged by the slowest step of the slice so far. VISIBLE work gets its
+    first slice right away, inside schedule().
+    """
+    VISIBLE = 0
+    BACKGROUND = 1
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS):
+        self.budget = budget_ms / 1000
+        self.jobs = []
+        self.sequence = 0
+        self.event = None
+        self.longest_slice_ms = 0
+
+    @property
+    def pending(self):
+        return bool(self.jobs)
+
+    def schedule(self, owner, work, priority=BACKGROUND):
         """
-         Authenticate user with phone number and password.
-         """
-        with self.get_connection() as conn:
-             cursor = conn.cursor()
-             cursor.execute('SELECT password FROM users WHERE phone = ?', (phone,))
-             result = cursor.fetchone()
-        if result and SecurityUtils.verify_password(result[0], password):
-            return True
-        return False
+        Queue the generator `work` for `owner` (usually the screen)
+        """
+        self.sequence += 1
+        heapq.heappush(self.jobs, [priority, self.sequence, owner, work])
+        if priority == self.VISIBLE:
+            self.step(0)
+        if self.jobs and self.event is None:
+            self.event = Clock.schedule_interval(self.step, 0)
 
-    def register_device(self, user_id, device_id):
+    def cancel(self, owner):
         """
-        Register a device for automatic login
+        Drop the unfinished work of `owner`, e.g. before it reloads a list
         """
-        device_hash = SecurityUtils.get_device_hash(device_id, user_id)
-        
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        self.jobs = [job for job in self.jobs if job[2] is not owner]
+        heapq.heapify(self.jobs)
+
+    def finish(self, owner):
+        """
+        Run the remaining work of `owner` now, for code that reads its widgets
+        """
+        for job in sorted(job for job in self.jobs if job[2] is owner):
+            for _ in job[3]:
+                pass
+        self.cancel(owner)
+
+    def step(self, dt):
+        start = time.perf_counter()
+        deadline = start + self.budget
+        slowest_step = 0
+        # Minimal satu langkah per frame supaya pekerjaan tetap maju
+        while self.jobs:
+            job = self.jobs[0]
+            step_start = time.perf_counter()
             try:
-                cursor.execute('''
-                INSERT OR REPLACE INTO device_auth 
-                (user_id, device_id, device_hash, last_access, is_active)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP, 1)
-                ''', (user_id, device_id, device_hash))
-                conn.commit()
-                return True
-            except sqlite3.Error:
-                return False
-    
+                done = next(job[3], StopIteration) is StopIteration
+            except Exception:
+                Logger.exception('IncrementalBuilder: build step failed')
+                done = True
+            if done and self.jobs and self.jobs[0] is job:
+                heapq.heappop(self.jobs)
+            now = time.perf_counter()
+            slowest_step = max(slowest_step, now - step_start)
+            # Berhenti sebelum langkah berikutnya melewati batas, bukan sesudahnya
+            if now + slowest_step > deadline:
+                break
 
-    def get_user_by_device(self, device_id):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.longest_slice_ms = max(self.longest_slice_ms, elapsed_ms)
+        metrics.observe('ui.build_slice', elapsed_ms)
+        if not self.jobs:
+            self.stop()
+
+    def drain(self):
         """
-        Get user data if device is registered
+        Run all queued work now
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-            SELECT u.id, u.phone, u.name, u.email, u.emergency_contact_1, 
-                   u.emergency_contact_2
-            FROM users u
-            JOIN device_auth d ON u.id = d.user_id
-            WHERE d.device_id = ? AND d.is_active = 1
-            ''', (device_id,))
-            result = cursor.fetchone()
-            
-            if result:
-                return {
-                    'id': result[0],
-                    'phone': result[1],
-                    'name': result[2],
-                    'email': result[3],
-                    'emergency_contact_1': result[4],
-                    'emergency_contact_2': result[5]
-                }
-            return None
+        while self.jobs:
+            job = heapq.heappop(self.jobs)
+            for _ in job[3]:
+                pass
+        self.stop()
+
+    def stop(self):
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+
+def visible_rows(row_height):
+    """
+    How many rows of `row_height` fit on the window, plus one partly shown
+    """
+    return int(Window.height // row_height) + 1
 
 class BaseScreen(Screen):
     """
@@ -332,23 +3230,17 @@ class BaseScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.device_manager = DeviceManager()
-        self.db_manager = DatabaseManager()
+        self.db_manager = None
 
-    def check_auto_login(self):
+    @property
+    def session(self):
+        return App.get_running_app().session
+
+    def get_current_user(self):
         """
-        Check if automatic login is possible
+        Get data of the logged in user
         """
-        if self.device_manager.is_logged_in():
-            return True
-            
-        device_id = self.device_manager.get_device_id()
-        user_data = self.db_manager.get_user_by_device(device_id)
-        
-        if user_data:
-            self.device_manager.save_user_session(user_data)
-            return True
-            
-        return False
+        return self.session.current_user()
     
     def show_popup(self, title, message):
         """
@@ -359,22 +3251,16 @@ class BaseScreen(Screen):
         close_button = Button(text='Close', size_hint=(1, 0.2))
         popup_layout.add_widget(close_button)
 
-        popup = Popup(title=title, content=popup_layout, size_hint=(0.8, 0.4))
+        popup = uix_popup.Popup(title=title, content=popup_layout, size_hint=(0.8, 0.4))
         close_button.bind(on_press=popup.dismiss)
         popup.open()
 
-    def on_enter(self):
-        """
-        Called when screen is entered
-        """
-        if self.check_auto_login():
-            self.manager.current = 'MainMenu'
-
 class LandingScreen(BaseScreen):
-    def __init__(self, db_manager, device_manager, **kwargs):
+    def __init__(self, db_manager, device_manager, async_db, **kwargs):
         super().__init__(**kwargs)
         self.db_manager = db_manager
         self.device_manager = device_manager
+        self.async_db = async_db
 
         layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
         
@@ -433,10 +3319,26 @@ class LandingScreen(BaseScreen):
             self.show_popup('Error', 'Invalid phone number')
             return
         
-        if self.db_manager.authenticate_user(phone, password):
+        self.async_db.call(self.session.authenticate, phone, password,
+                           self.device_manager.get_device_id(),
+                           callback=self.on_login_result,
+                           on_error=lambda e: self.show_popup('Error', f'Could not login: {e}'))
+
+    def on_login_result(self, user):
+        if user:
+            self.session.issue(user)
             self.manager.current = 'main_menu'
         else:
             self.show_popup('Login Failed', 'Invalid credentials')
+
+    def on_enter(self):
+        """
+        Skip the login form while the device has a valid session
+        """
+        # Saat build() layar ini dimasuki sebelum main_menu ditambahkan;
+        # on_start memeriksa sesi lagi setelahnya
+        if self.manager.has_screen('main_menu') and self.session.current_user():
+            self.manager.current = 'main_menu'
     
     def go_to_register(self, instance):
         self.manager.current = 'register'
@@ -452,10 +3354,13 @@ class LandingScreen(BaseScreen):
             self.rect = Rectangle(size=self.size, pos=self.pos)
 
 class RegisterScreen(BaseScreen):
-    def __init__(self, db_manager, device_manager, **kwargs):
+    def __init__(self, db_manager, device_manager, async_db, **kwargs):
         super().__init__(**kwargs)
         self.db_manager = db_manager
         self.device_manager = device_manager
+        self.async_db = async_db
+        # Lokasi saat mendaftar menentukan wilayah (shard) berita pengguna
+        self.coordinates = (None, None)
         
         layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
         
@@ -557,7 +3462,37 @@ class RegisterScreen(BaseScreen):
             return
         
         
-        if self.db_manager.register_user(phone, name, password, email):
+        region = self.db_manager.region_for_point(*self.coordinates)
+        self.async_db.call(self.db_manager.register_user, phone, name, password, email, region,
+                           callback=self.on_register_result,
+                           on_error=lambda e: self.show_popup('Error', f'Could not register: {e}'))
+
+    def on_enter(self):
+        """
+        Ask for one location fix while the form is filled in. Without GPS
+        the user is registered without a region and uses the default shard.
+        """
+        try:
+            plyer.gps.configure(on_location=self.on_location)
+            plyer.gps.start()
+        except Exception as e:
+            Logger.info(f'RegisterScreen: No location for the region: {e}')
+
+    def on_location(self, **kwargs):
+        self.coordinates = (kwargs.get('lat'), kwargs.get('lon'))
+        Clock.schedule_once(lambda dt: self.stop_gps())
+
+    def on_leave(self):
+        self.stop_gps()
+
+    def stop_gps(self):
+        try:
+            plyer.gps.stop()
+        except Exception:
+            pass
+
+    def on_register_result(self, registered):
+        if registered:
             self.show_popup('Success', 'Registration Successful')
             self.manager.current = 'landing'
         else:
@@ -625,6 +3560,7 @@ class MainMenuScreen(BaseScreen):
         self.manager.current = 'profile'
     
     def logout(self, instance):
+        self.session.logout()
         self.manager.current = 'landing'
 
     def on_size(self, *args):
@@ -638,10 +3574,19 @@ class MainMenuScreen(BaseScreen):
             self.rect = Rectangle(size=self.size, pos=self.pos)
 
 class EmergencyScreen(BaseScreen):
-    def __init__(self, db_manager, device_manager, **kwargs):
+    def __init__(self, db_manager, device_manager, notifier, async_db, responders, journal, **kwargs):
         super().__init__(**kwargs)
         self.db_manager = db_manager
         self.device_manager = device_manager
+        self.notifier = notifier
+        self.async_db = async_db
+        self.responders = responders
+        self.journal = journal
+        self.last_location = None
+        self.last_coordinates = (None, None)
+        self.gps_running = False
+        self.pending_call = None
+        self.pending_event = None
         
        
         layout = GridLayout(cols=1, padding=dp(20), spacing=dp(10))
@@ -680,30 +3625,185 @@ class EmergencyScreen(BaseScreen):
         self.add_widget(layout)
     
     def call_police(self, instance):
+        # Nomor polisi di Indonesia
+        self.dial_emergency('police', 'police')
+
+    def call_fire(self, instance):
+        # Nomor pemadam kebakaran di Indonesia
+        self.dial_emergency('fire', 'fire department')
+
+    def call_medical(self, instance):
+        # Nomor ambulans di Indonesia
+        self.dial_emergency('medical', 'medical emergency')
+
+    def on_enter(self):
+        """
+        Track the location while the buttons are shown, so a call goes to
+        the nearest station and the journal, the incident rollups and the
+        shard of the emergency get its coordinates
+        """
         try:
-            call.makecall('110')  # Nomor polisi di Indonesia
+            plyer.gps.configure(on_location=self.on_location)
+            plyer.gps.start()
+            self.gps_running = True
         except Exception as e:
-            self.show_popup('Error', f'Could not call police: {e}')
+            Logger.info(f'EmergencyScreen: No GPS, calls use the last known location: {e}')
+            self.gps_running = False
 
-    def call_fire(self, instance):
+    def on_leave(self):
+        self.place_pending_call()
+        # Posisi terakhir tetap dipakai sebentar, lihat needs_location
+        if self.last_coordinates[0] is not None:
+            try:
+                self.device_manager.save_last_location(*self.last_coordinates)
+            except Exception as e:
+                Logger.exception(f'EmergencyScreen: Could not save the location: {e}')
+            self.last_coordinates = (None, None)
+            self.last_location = None
+        if self.gps_running:
+            try:
+                plyer.gps.stop()
+            except Exception:
+                pass
+            self.gps_running = False
+
+    def dial_emergency(self, emergency_type, service_name):
+        """
+        Call as soon as the location is known. Without a fix, the last
+        saved one is used; without that either, the call waits at most
+        LOCATION_TIMEOUT seconds for the first GPS fix. A second tap
+        dials right away.
+        """
+        tapped = time.perf_counter()
+        if self.pending_call is None and self.needs_location():
+            self.pending_call = (emergency_type, service_name, tapped)
+            self.pending_event = Clock.schedule_once(lambda dt: self.place_pending_call(),
+                                                     LOCATION_TIMEOUT)
+            return
+        self.cancel_pending_call()
+        self.place_call(emergency_type, service_name, tapped)
+
+    def needs_location(self):
+        """
+        True when there is no usable location yet but GPS may still deliver one
+        """
+        if self.last_coordinates[0] is not None:
+            return False
         try:
-            call.makecall('113')  # Nomor pemadam kebakaran di Indonesia
+            last = self.device_manager.get_last_location()
         except Exception as e:
-            self.show_popup('Error', f'Could not call fire department: {e}')
+            Logger.exception(f'EmergencyScreen: Could not read the last location: {e}')
+            last = None
+        if last is not None:
+            self.set_location(*last)
+            return False
+        return self.gps_running
 
-    def call_medical(self, instance):
+    def place_pending_call(self):
+        if self.pending_call is not None:
+            call = self.pending_call
+            self.cancel_pending_call()
+            self.place_call(*call)
+
+    def cancel_pending_call(self):
+        if self.pending_event is not None:
+            self.pending_event.cancel()
+        self.pending_call = None
+        self.pending_event = None
+
+    def place_call(self, emergency_type, service_name, tapped):
+        """
+        Journal the emergency, call the emergency number and then notify
+        contacts, measuring tap-to-dial latency. Each step fails on its own;
+        only a failing call itself stops the call.
+        """
+        user = None
+        try:
+            user = self.get_current_user()
+        except Exception as e:
+            Logger.exception(f'EmergencyScreen: Could not get user: {e}')
+            metrics.record('error', 1, where='dial_emergency.user', error=str(e))
+        journal_id = self.write_journal(user, emergency_type)
+
+        try:
+            number = self.emergency_number(emergency_type)
+        except Exception as e:
+            metrics.record('error', 1, where='dial_emergency.number', error=str(e))
+            number = EMERGENCY_NUMBERS[emergency_type]
+        try:
+            plyer.call.makecall(number)
+            metrics.record('emergency.tap_to_dial', (time.perf_counter() - tapped) * 1000,
+                           type=emergency_type)
+        except Exception as e:
+            metrics.record('error', 1, where='dial_emergency', error=str(e))
+            self.show_popup('Error', f'Could not call {service_name}, dial {number}: {e}')
+
+        try:
+            self.notify_contacts(user, emergency_type, journal_id)
+        except Exception as e:
+            Logger.exception(f'EmergencyScreen: Could not notify contacts: {e}')
+            metrics.record('error', 1, where='dial_emergency.notify', error=str(e))
+
+    def emergency_number(self, emergency_type):
+        """
+        Direct number of the nearest station when the location is known and a
+        station is close enough, otherwise the national number
+        """
+        latitude, longitude = self.last_coordinates
+        if latitude is not None and longitude is not None:
+            nearest = self.responders.nearest_responders(latitude, longitude, emergency_type, k=1)
+            if nearest and nearest[0].distance_km <= RESPONDER_MAX_DISTANCE_KM:
+                return nearest[0].phone
+        return EMERGENCY_NUMBERS[emergency_type]
+
+    def write_journal(self, user, emergency_type):
+        """
+        Save the emergency to the journal before dialing; a failing journal
+        must never stop the call
+        """
+        latitude, longitude = self.last_coordinates
         try:
-            call.makecall('119')  # Nomor pemadam kebakaran di Indonesia
+            return self.journal.append(user.id if user else None, emergency_type, latitude, longitude)
         except Exception as e:
-            self.show_popup('Error', f'Could not call medical emergency: {e}')
+            Logger.exception(f'EmergencyScreen: Could not write journal: {e}')
+            metrics.record('error', 1, where='write_journal', error=str(e))
+            return None
+
+    def notify_contacts(self, user, emergency_type, journal_id=None):
+        """
+        Log the emergency and alert the user's emergency contacts in the background.
+        The log and the contact lookup run concurrently and do not delay the call.
+        """
+        if not user:
+            return
+
+        latitude, longitude = self.last_coordinates
+        location = self.last_location
+
+        def send(results):
+            event_id, contacts = results
+            if not contacts:
+                return
+
+            message = f"EMERGENCY: {user.name} needs {emergency_type} assistance."
+            if location:
+                message += f" Location: {location}"
+            self.notifier.notify_in_background(event_id, contacts, message)
+
+        self.async_db.gather([
+            (self.db_manager.log_emergency, user.id, emergency_type, location, latitude, longitude,
+             journal_id),
+            (self.db_manager.get_emergency_contacts, user.id),
+        ], callback=send, on_error=lambda e: metrics.record('error', 1, where='notify_contacts',
+                                                             error=str(e)))
     
     def share_location(self, instance):
         
-        if gps:
+        if plyer:
             try:
                 
-                gps.configure(on_location=self.on_location)
-                gps.start()
+                plyer.gps.configure(on_location=self.on_location)
+                plyer.gps.start()
             except Exception as e:
                 self.show_popup('GPS Error', f'Could not get location: {str(e)}')
         else:
@@ -711,9 +3811,24 @@ class EmergencyScreen(BaseScreen):
             self.show_popup('GPS Error', 'GPS not available')
     
     def on_location(self, **kwargs):
-        
-        location_str = f"Lat: {kwargs.get('lat', 'N/A')}, Lon: {kwargs.get('lon', 'N/A')}"
-        self.show_popup('Location', location_str)
+        # Android memanggil dari thread lain; widget dan panggilan hanya di thread utama
+        latitude, longitude = kwargs.get('lat'), kwargs.get('lon')
+        if latitude is not None and longitude is not None:
+            Clock.schedule_once(lambda dt: self.on_fix(latitude, longitude))
+
+    def on_fix(self, latitude, longitude):
+        first = self.last_coordinates[0] is None
+        self.set_location(latitude, longitude)
+        if first:
+            try:
+                self.device_manager.save_last_location(latitude, longitude)
+            except Exception as e:
+                Logger.exception(f'EmergencyScreen: Could not save the location: {e}')
+        self.place_pending_call()
+
+    def set_location(self, latitude, longitude):
+        self.last_location = f"Lat: {latitude}, Lon: {longitude}"
+        self.last_coordinates = (latitude, longitude)
     
     def go_back(self, instance):
         self.manager.current = 'main_menu'
@@ -728,19 +3843,53 @@ class EmergencyScreen(BaseScreen):
             Color(0, 0.8, 0.8, 1)
             self.rect = Rectangle(size=self.size, pos=self.pos)
 
+class NewsRow(ButtonBehavior, Label):
+    """
+    One row of the news feed. The RecycleView keeps only enough of these
+    for the rows on screen and sets text, news_id and open_news from the
+    data of the row that is shown.
+    """
+    news_id = NumericProperty(0)
+    open_news = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('markup', True)
+        super().__init__(**kwargs)
+
+    def on_release(self):
+        if self.open_news and self.news_id:
+            self.open_news(self.news_id)
+
+
 class NewsScreen(BaseScreen):
-    def __init__(self, db_manager, **kwargs):
+    def __init__(self, db_manager, async_db, **kwargs):
         super().__init__(**kwargs)
         self.db_manager = db_manager
+        self.async_db = async_db
+        # Deskripsi lengkap hanya dimuat saat berita dibuka
+        self.details = LRUCache(DETAIL_CACHE_SIZE)
+        # Halaman feed: (created_at, id) baris terakhir, dan nomor muat ulang
+        # supaya hasil query lama yang datang terlambat diabaikan
+        self.cursor = None
+        self.generation = 0
+        self.loading = False
+        self.exhausted = True
+        self.scroll_top = None
 
         layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
 
-        self.scroll_view = ScrollView()
-        self.news_layout = BoxLayout(orientation='vertical', size_hint_y=None)
-        self.news_layout.bind(minimum_height=self.news_layout.setter('height'))
-
-        self.scroll_view.add_widget(self.news_layout)
-        layout.add_widget(self.scroll_view)
+        # Hanya baris yang terlihat punya widget; berita lain cukup satu dict di data
+        self.feed = RecycleView()
+        feed_layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                       default_size=(None, dp(FEED_ROW_HEIGHT)),
+                                       default_size_hint=(1, None))
+        feed_layout.bind(minimum_height=feed_layout.setter('height'))
+        feed_layout.bind(height=self.keep_scroll_position)
+        self.feed.add_widget(feed_layout)
+        # viewclass disimpan di layout manager, jadi baru bisa diatur setelah add_widget
+        self.feed.viewclass = NewsRow
+        self.feed.bind(scroll_y=self.on_feed_scroll)
+        layout.add_widget(self.feed)
 
         button_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(10))
 
@@ -758,6 +3907,13 @@ class NewsScreen(BaseScreen):
                               on_press=self.go_add_news
                               )
         
+        moderate_btn = Button(text='Moderate',
+                              background_color=(1,1,1,1),
+                              color=(0,0,0,1),
+                              background_normal="",
+                              on_press=self.go_moderation
+                              )
+
         back_btn = Button(text='Back to Menu',
                           background_color=(1,1,1,1),
                           color=(0,0,0,1),
@@ -767,6 +3923,7 @@ class NewsScreen(BaseScreen):
         
         button_layout.add_widget(view_news_btn)
         button_layout.add_widget(add_news_btn)
+        button_layout.add_widget(moderate_btn)
         button_layout.add_widget(back_btn)
         
         layout.add_widget(button_layout)
@@ -775,71 +3932,104 @@ class NewsScreen(BaseScreen):
     
 
     def load_news(self, instance):
-        self.news_layout.clear_widgets()
+        self.generation += 1
+        self.cursor = None
+        self.loading = False
+        self.exhausted = False
+        self.feed.data = []
+        self.feed.scroll_y = 1
+        self.load_page()
 
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''SELECT title, description, category, created_at, id FROM news  ORDER BY created_at DESC''')
-            news_items = cursor.fetchall()
+    def load_page(self):
+        """
+        Fetch the next FEED_PAGE_ROWS news on the AsyncDatabase pool
+        """
+        if self.loading or self.exhausted:
+            return
+        self.loading = True
+        generation = self.generation
+        self.async_db.call(self.db_manager.get_news_feed, FEED_SNIPPET_LENGTH, FEED_PAGE_ROWS,
+                           self.cursor,
+                           callback=lambda news_items: self.show_page(generation, news_items),
+                           on_error=lambda e: self.page_failed(generation, e))
 
-            if not news_items:
-                no_news_label = Label(
-                    text='No news available',
-                    size_hint_y=None,
-                    height=dp(50)
-                )
-                self.news_layout.add_widget(no_news_label)
-            else:
-                for item in news_items:
-                    news_item = BoxLayout(
-                        orientation='vertical',
-                        size_hint_y=None,
-                        height=dp(150),
-                        padding=dp(10),
-                        spacing=dp(10),
-                    )
-
-                    title_label = Label(
-                        text=f'[b]{item[0]}[/b]',
-                        markup=True,
-                        size_hint_y=None,
-                        height=dp(40)
-                    )
-
-                    news_item.add_widget(title_label)
-                    news_item.bind(on_touch_down=lambda instance, touch, news_id=item[4]: 
-                        self.on_news_click(instance, touch, news_id)
-                    )
-                    self.news_layout.add_widget(news_item)
-
-    def on_news_click(self, instance, touch, news_id):
-        if instance.collide_point(*touch.pos):
-            self.show_news_details(news_id)
+    def show_page(self, generation, news_items):
+        if generation != self.generation:
+            return
+        self.loading = False
+        if len(news_items) < FEED_PAGE_ROWS:
+            self.exhausted = True
+        if news_items:
+            last = news_items[-1]
+            self.cursor = (last.created_at, last.id)
+            # Posisi gulir disimpan sebagai jarak dari atas, karena scroll_y
+            # adalah pecahan yang menggeser baris yang sedang dibaca saat daftar memanjang
+            hidden = max(self.feed.layout_manager.height - self.feed.height, 0)
+            self.scroll_top = (1 - self.feed.scroll_y) * hidden
+            self.feed.data.extend(self.feed_row(item) for item in news_items)
+        elif not self.feed.data:
+            self.feed.data = [{'text': 'No news available', 'news_id': 0, 'open_news': None}]
 
-    def show_news_details(self, news_id):
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''SELECT title, description, category, created_at FROM news WHERE id = ?''', (news_id,))
-            news_item = cursor.fetchone()
+    def page_failed(self, generation, error):
+        if generation != self.generation:
+            return
+        self.loading = False
+        metrics.record('error', 1, where='news_feed', error=str(error))
+        self.show_popup('Error', f'Could not load news: {error}')
+
+    def keep_scroll_position(self, feed_layout, height):
+        if self.scroll_top is None:
+            return
+        hidden = max(height - self.feed.height, 0)
+        scroll_top, self.scroll_top = self.scroll_top, None
+        if hidden:
+            self.feed.scroll_y = max(0, 1 - scroll_top / hidden)
+
+    def on_feed_scroll(self, feed, scroll_y):
+        # scroll_y 0 adalah dasar daftar; muat halaman berikutnya satu layar sebelumnya
+        hidden = max(feed.layout_manager.height - feed.height, 0)
+        if scroll_y * hidden < feed.height:
+            self.load_page()
+
+    def feed_row(self, item):
+        return {'text': self.feed_title(item, snippet=True), 'news_id': item.id,
+                'open_news': self.show_news_details}
+
+    @staticmethod
+    def feed_title(item, snippet=False):
+        text = f'[b]{escape_markup(item.title)}[/b]'
+        if item.report_count > 1:
+            text += f' ({item.report_count} reports)'
+        if snippet and item.snippet:
+            ellipsis = '...' if len(item.snippet) >= FEED_SNIPPET_LENGTH else ''
+            text += f'\n{escape_markup(item.snippet)}{ellipsis}'
+        return text
 
+    def show_news_details(self, news_id):
+        news_item = self.details.get(news_id)
+        if news_item is None:
+            news_item = self.db_manager.get_news(news_id)
             if news_item:
-                content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
-                title_label = Label(text=f'[b]{news_item[0]}[/b]', markup=True, size_hint_y=None, height=dp(40))
-                desc_label = Label(text=news_item[1], size_hint_y=None, height=dp(200), text_size=(Window.width - dp(40), None))
-                category_label = Label(text=f'Category: {news_item[2]}', size_hint_y=None, height=dp(30))
-                date_label = Label(text=f'Created at: {news_item[3]}', size_hint_y=None, height=dp(30))
+                self.details.put(news_id, news_item)
 
-                content.add_widget(title_label)
-                content.add_widget(desc_label)
-                content.add_widget(category_label)
-                content.add_widget(date_label)
+        if news_item:
+            content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
+            title_label = Label(text=f'[b]{escape_markup(news_item.title)}[/b]', markup=True, size_hint_y=None, height=dp(40))
+            desc_label = Label(text=news_item.description, size_hint_y=None, height=dp(200), text_size=(Window.width - dp(40), None))
+            category_label = Label(text=f'Category: {news_item.category}', size_hint_y=None, height=dp(30))
+            date_label = Label(text=f'Created at: {news_item.created_at}', size_hint_y=None, height=dp(30))
 
-                close_button = Button(text="Close", size_hint_y=None, height=dp(40))
-                close_button.bind(on_press=lambda _: self.close_popup())
-                content.add_widget(close_button)
+            content.add_widget(title_label)
+            content.add_widget(desc_label)
+            content.add_widget(category_label)
+            content.add_widget(date_label)
 
-                self.popup = Popup(title="News Details", content=content, size_hint=(0.8, 0.8))
-                self.popup.open()
+            close_button = Button(text="Close", size_hint_y=None, height=dp(40))
+            close_button.bind(on_press=lambda _: self.close_popup())
+            content.add_widget(close_button)
+
+            self.popup = uix_popup.Popup(title="News Details", content=content, size_hint=(0.8, 0.8))
+            self.popup.open()
 
     def close_popup(self):
         if hasattr(self, 'popup') and self.popup:
@@ -848,6 +4038,13 @@ class NewsScreen(BaseScreen):
     def go_add_news(self, instance):
        
         self.manager.current = 'add_news'
+
+    def go_moderation(self, instance):
+        user = self.get_current_user()
+        if not user or not user.is_moderator:
+            self.show_popup('Moderation', 'Only moderators can review news')
+            return
+        self.manager.current = 'moderation'
     
     def go_back(self, instance):
         self.manager.current = 'main_menu'
@@ -980,14 +4177,11 @@ class AddNewsScreen(BaseScreen):
         
         
         try:
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                INSERT INTO news 
-                (title, description, category, status, created_at) 
-                VALUES (?, ?, ?, ?, ?)
-                ''', (title, description, category, 'approved', datetime.now()))
-                conn.commit()
+            user = self.get_current_user()
+            self.db_manager.submit_news(
+                title, description, category,
+                author_id=user.id if user else None
+            )
             
             
             self.title_input.text = ''
@@ -1013,10 +4207,145 @@ class AddNewsScreen(BaseScreen):
             Color(0, 0.8, 0.8, 1)
             self.rect = Rectangle(size=self.size, pos=self.pos)
 
+class ModerationScreen(BaseScreen):
+    def __init__(self, db_manager, builder, **kwargs):
+        super().__init__(**kwargs)
+        self.db_manager = db_manager
+        self.builder = builder
+        self.pending_ids = []
+
+        layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
+
+        self.scroll_view = ScrollView()
+        self.pending_layout = BoxLayout(orientation='vertical', size_hint_y=None)
+        self.pending_layout.bind(minimum_height=self.pending_layout.setter('height'))
+
+        self.scroll_view.add_widget(self.pending_layout)
+        layout.add_widget(self.scroll_view)
+
+        button_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(10))
+
+        # Hanya berita yang dimuat di layar ini (paling banyak 100), bukan seluruh antrean
+        self.approve_all_btn = Button(text='Approve Shown',
+                                 background_color=(1,1,1,1),
+                                 color=(0,0,0,1),
+                                 background_normal="",
+                                 on_press=lambda x: self.moderate(self.pending_ids, 'approved')
+                                 )
+
+        self.reject_all_btn = Button(text='Reject Shown',
+                                background_color=(1,1,1,1),
+                                color=(0,0,0,1),
+                                background_normal="",
+                                on_press=lambda x: self.moderate(self.pending_ids, 'rejected')
+                                )
+
+        back_btn = Button(text='Back to News',
+                          background_color=(1,1,1,1),
+                          color=(0,0,0,1),
+                          background_normal="",
+                          on_press=self.go_back
+                          )
+
+        button_layout.add_widget(self.approve_all_btn)
+        button_layout.add_widget(self.reject_all_btn)
+        button_layout.add_widget(back_btn)
+
+        layout.add_widget(button_layout)
+
+        self.add_widget(layout)
+
+    def on_enter(self):
+        user = self.get_current_user()
+        if not user or not user.is_moderator:
+            self.manager.current = 'news'
+            return
+        self.load_pending()
+
+    def load_pending(self):
+        self.builder.cancel(self)
+        self.pending_layout.clear_widgets()
+
+        news_items = self.db_manager.get_pending_news()
+        self.pending_ids = [item.id for item in news_items]
+        self.approve_all_btn.text = f'Approve {len(self.pending_ids)} Shown'
+        self.reject_all_btn.text = f'Reject {len(self.pending_ids)} Shown'
+
+        if not news_items:
+            self.pending_layout.add_widget(
+                Label(text='No news waiting for review', size_hint_y=None, height=dp(50))
+            )
+            return
+
+        visible = visible_rows(dp(60))
+        self.builder.schedule(self, self.build_pending_rows(news_items[:visible]),
+                              IncrementalBuilder.VISIBLE)
+        self.builder.schedule(self, self.build_pending_rows(news_items[visible:]))
+
+    def build_pending_rows(self, news_items):
+        for item in news_items:
+            row_layout = BoxLayout(orientation='horizontal', size_hint_y=None,
+                                   height=dp(60), spacing=dp(10))
+
+            title_label = Label(
+                text=f'{NewsScreen.feed_title(item)}\n{escape_markup(item.category or "")}',
+                markup=True,
+                size_hint_x=0.6
+            )
+
+            accept_btn = Button(
+                background_normal='app_frs2/terima.jpg',
+                size_hint_x=0.2,
+                on_press=lambda x, news_id=item.id: self.moderate([news_id], 'approved')
+            )
+
+            reject_btn = Button(
+                background_normal='app_frs2/tolak.jpg',
+                size_hint_x=0.2,
+                on_press=lambda x, news_id=item.id: self.moderate([news_id], 'rejected')
+            )
+
+            row_layout.add_widget(title_label)
+            row_layout.add_widget(accept_btn)
+            row_layout.add_widget(reject_btn)
+            self.pending_layout.add_widget(row_layout)
+            yield
+
+    def moderate(self, news_ids, new_status):
+        if not news_ids:
+            return
+
+        try:
+            user = self.get_current_user()
+            self.db_manager.moderate_news(
+                news_ids, new_status,
+                moderator_id=user.id if user else None
+            )
+            self.load_pending()
+        except PermissionError as e:
+            self.show_popup('Moderation', str(e))
+        except Exception as e:
+            self.show_popup('Error', f'Could not moderate news: {str(e)}')
+
+    def go_back(self, instance):
+        self.manager.current = 'news'
+
+    def on_size(self, *args):
+        with self.canvas.before:
+            Color(0, 0.8, 0.8, 1)
+            self.rect = Rectangle(size=self.size, pos=self.pos)
+
+    def on_pos(self, *args):
+        with self.canvas.before:
+            Color(0, 0.8, 0.8, 1)
+            self.rect = Rectangle(size=self.size, pos=self.pos)
+
 class ProfileScreen(BaseScreen):
-    def __init__(self, db_manager, **kwargs):
+    def __init__(self, db_manager, async_db, builder, **kwargs):
         super().__init__(**kwargs)
         self.db_manager = db_manager
+        self.async_db = async_db
+        self.builder = builder
         self.edit_mode = False
         
         
@@ -1078,40 +4407,37 @@ class ProfileScreen(BaseScreen):
     
     def load_profile(self):
         
+        self.builder.cancel(self)
+        self.profile_layout.clear_widgets()
+        user = self.session.current_user()
+        if user is None:
+            self.manager.current = 'landing'
+            return
+        # Baca ulang dari database supaya perubahan profil terbaru ikut tampil
+        self.async_db.call(self.db_manager.get_user_by_phone, user.phone,
+                           callback=self.show_profile,
+                           on_error=lambda e: self.show_popup('Error', f'Could not load profile: {e}'))
+
+    def show_profile(self, user):
+        self.builder.cancel(self)
         self.profile_layout.clear_widgets()
-        
         try:
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                SELECT name, phone, email, registration_date
-                FROM users
-                WHERE phone = ?
-                LIMIT 1
-                ''', (self.manager.get_screen('landing').phone_input.text,))
-                user = cursor.fetchone()
-            
             if user:
-                name, phone, email, reg_date = user
-                
                 self.original_user_data = {
-                    'name': name,
-                    'phone': phone,
-                    'email': email or '',
-                    'registration_date': reg_date
+                    'name': user.name,
+                    'phone': user.phone,
+                    'email': user.email or '',
+                    'registration_date': user.registration_date
                 }
                 
                 
-                self.profile_widgets = [
-                    self.create_profile_row('Name', name),
-                    self.create_profile_row('Phone', phone),
-                    self.create_profile_row('Email', email or 'Not provided'),
-                    self.create_profile_row('Registered', reg_date)
-                ]
-                
-                
-                for widget in self.profile_widgets:
-                    self.profile_layout.add_widget(widget)
+                self.profile_widgets = []
+                self.builder.schedule(self, self.build_profile_rows([
+                    ('Name', user.name),
+                    ('Phone', user.phone),
+                    ('Email', user.email or 'Not provided'),
+                    ('Registered', user.registration_date)
+                ]), IncrementalBuilder.VISIBLE)
             
             else:
                 self.profile_layout.add_widget(
@@ -1121,6 +4447,13 @@ class ProfileScreen(BaseScreen):
         except Exception as e:
             self.show_popup('Error', f'Could not load profile: {str(e)}')
     
+    def build_profile_rows(self, fields):
+        for label, value in fields:
+            widget = self.create_profile_row(label, value)
+            self.profile_widgets.append(widget)
+            self.profile_layout.add_widget(widget)
+            yield
+
     def create_profile_row(self, label, value):
         
         row_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40))
@@ -1151,6 +4484,7 @@ class ProfileScreen(BaseScreen):
         return row_layout
     
     def toggle_edit_mode(self, instance):
+        self.builder.finish(self)
         self.edit_mode = not self.edit_mode
         
         if self.edit_mode:
@@ -1200,25 +4534,21 @@ class ProfileScreen(BaseScreen):
                 return
             
             
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                UPDATE users
-                SET name = ?, email = ?
-                WHERE phone = ?
-                ''', (
-                    new_data['name'], 
-                    new_data['email'], 
-                    self.original_user_data['phone']
-                ))
-                conn.commit()
-            
-            
-            self.toggle_edit_mode(instance)
-            self.show_popup('Success', 'Profile updated successfully')
+            self.async_db.call(
+                self.db_manager.update_profile,
+                self.original_user_data['phone'],
+                new_data['name'], 
+                new_data['email'],
+                callback=lambda changed: self.on_profile_saved(instance),
+                on_error=lambda e: self.show_popup('Error', f'Could not save profile: {e}')
+            )
         
         except Exception as e:
             self.show_popup('Error', f'Could not save profile: {str(e)}')
+
+    def on_profile_saved(self, instance):
+        self.toggle_edit_mode(instance)
+        self.show_popup('Success', 'Profile updated successfully')
     
     def go_emergency_contacts(self, instance):
         self.manager.current = 'emergency_contacts'
@@ -1237,64 +4567,51 @@ class ProfileScreen(BaseScreen):
             self.rect = Rectangle(size=self.size, pos=self.pos)
 
 class EmergencyContactsScreen(BaseScreen):
-    def emergency_call():
-        call.makecall("000")  
-
-    def __init__(self, db_manager, **kwargs):
+    def __init__(self, db_manager, async_db, **kwargs):
         super().__init__(**kwargs)
         self.db_manager = db_manager
+        self.async_db = async_db
+        self.contact_rows = []
         
         layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
         
+        self.scroll_view = ScrollView()
+        self.contacts_layout = BoxLayout(orientation='vertical', size_hint_y=None, spacing=dp(10))
+        self.contacts_layout.bind(minimum_height=self.contacts_layout.setter('height'))
         
-        contact1_layout = BoxLayout(size_hint_y=None, height=dp(50))
-        self.contact1_input = TextInput(
-            hint_text='Emergency Contact 1 Phone', 
-            multiline=False,
-            size_hint_x=0.7
-        )
-        add_contact1_btn = Button(text='Save', 
-                                  size_hint_x=0.3, 
-                                  on_press=lambda x: self.save_contact(1),
-                                  background_color=(1,1,1,1),
-                                  color=(0,0,0,1),
-                                  background_normal=""
-                                  )
-                                  
-        contact1_layout.add_widget(self.contact1_input)
-        contact1_layout.add_widget(add_contact1_btn)
-        layout.add_widget(contact1_layout)
+        self.scroll_view.add_widget(self.contacts_layout)
+        layout.add_widget(self.scroll_view)
         
-       
-        contact2_layout = BoxLayout(size_hint_y=None, height=dp(50))
-        self.contact2_input = TextInput(
-            hint_text='Emergency Contact 2 Phone', 
-            multiline=False,
-            size_hint_x=0.7
+        button_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(10))
+        
+        add_contact_btn = Button(
+            text='Add Contact', 
+            on_press=lambda x: self.add_contact_row(),
+            background_color=(1,1,1,1),
+            color=(0,0,0,1),
+            background_normal=""
             )
-        add_contact2_btn = Button(
+        
+        save_btn = Button(
             text='Save', 
-            size_hint_x=0.3, 
-            on_press=lambda x: self.save_contact(2),
+            on_press=self.save_contacts,
             background_color=(1,1,1,1),
             color=(0,0,0,1),
             background_normal=""
             )
-        contact2_layout.add_widget(self.contact2_input)
-        contact2_layout.add_widget(add_contact2_btn)
-        layout.add_widget(contact2_layout)
-        
         
         back_btn = Button(
             text='Back to Profile', 
-            size_hint_y=None, 
-            height=dp(50),
             background_color=(1,1,1,1),
             color=(0,0,0,1),
             background_normal="",
             on_press=self.go_back
             )
-        layout.add_widget(back_btn)
+        
+        button_layout.add_widget(add_contact_btn)
+        button_layout.add_widget(save_btn)
+        button_layout.add_widget(back_btn)
+        layout.add_widget(button_layout)
         
         self.add_widget(layout)
     
@@ -1303,52 +4620,94 @@ class EmergencyContactsScreen(BaseScreen):
         self.load_contacts()
     
     def load_contacts(self):
+        self.contacts_layout.clear_widgets()
+        self.contact_rows = []
+        
         try:
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                SELECT emergency_contact_1, emergency_contact_2 
-                FROM users 
-                WHERE phone = ?
-                ''', (self.manager.get_screen('landing').phone_input.text,))
-                contacts = cursor.fetchone()
-            
-            if contacts:
-                self.contact1_input.text = contacts[0] or ''
-                self.contact2_input.text = contacts[1] or ''
+            user = self.get_current_user()
         except Exception as e:
             self.show_popup('Error', f'Could not load contacts: {str(e)}')
+            return
+
+        if not user:
+            self.show_contacts([])
+            return
+
+        self.async_db.call(self.db_manager.get_emergency_contacts, user.id,
+                           callback=self.show_contacts,
+                           on_error=lambda e: self.show_popup('Error', f'Could not load contacts: {e}'))
+
+    def show_contacts(self, contacts):
+        self.contacts_layout.clear_widgets()
+        self.contact_rows = []
+        for contact in contacts:
+            self.add_contact_row(contact.phone, contact.label)
+        
+        if not contacts:
+            self.add_contact_row()
     
-    def save_contact(self, contact_number):
-        phone = self.manager.get_screen('landing').phone_input.text
-        contact = (self.contact1_input.text if contact_number == 1 
-                   else self.contact2_input.text)
+    def add_contact_row(self, phone='', label=''):
+        number = len(self.contact_rows) + 1
+        row_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(5))
+        
+        phone_input = TextInput(
+            text=phone,
+            hint_text=f'Emergency Contact {number} Phone', 
+            multiline=False,
+            size_hint_x=0.45
+        )
+        label_input = TextInput(
+            text=label or '',
+            hint_text='Name', 
+            multiline=False,
+            size_hint_x=0.35
+        )
+        remove_btn = Button(
+            text='Remove', 
+            size_hint_x=0.2, 
+            background_color=(1,1,1,1),
+            color=(0,0,0,1),
+            background_normal=""
+            )
         
+        row = (row_layout, phone_input, label_input)
+        remove_btn.bind(on_press=lambda x: self.remove_contact_row(row))
         
-        if not SecurityUtils.validate_phone_number(contact):
-            self.show_popup('Error', 'Invalid phone number')
-            return
+        row_layout.add_widget(phone_input)
+        row_layout.add_widget(label_input)
+        row_layout.add_widget(remove_btn)
+        self.contacts_layout.add_widget(row_layout)
+        self.contact_rows.append(row)
+    
+    def remove_contact_row(self, row):
+        self.contacts_layout.remove_widget(row[0])
+        self.contact_rows.remove(row)
+    
+    def save_contacts(self, instance):
+        contacts = []
+        for row_layout, phone_input, label_input in self.contact_rows:
+            contact = phone_input.text.strip()
+            if not contact:
+                continue
+            
+            if not SecurityUtils.validate_phone_number(contact):
+                self.show_popup('Error', f'Invalid phone number: {contact}')
+                return
+            contacts.append((contact, label_input.text.strip() or None))
         
         try:
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                if contact_number == 1:
-                    cursor.execute('''
-                    UPDATE users 
-                    SET emergency_contact_1 = ? 
-                    WHERE phone = ?
-                    ''', (contact, phone))
-                else:
-                    cursor.execute('''
-                    UPDATE users 
-                    SET emergency_contact_2 = ? 
-                    WHERE phone = ?
-                    ''', (contact, phone))
-                conn.commit()
+            user = self.get_current_user()
+            if not user:
+                self.show_popup('Error', 'Please login first')
+                return
             
-            self.show_popup('Success', f'Emergency Contact {contact_number} saved')
+            self.async_db.call(
+                self.db_manager.save_emergency_contacts, user.id, contacts,
+                callback=lambda result: self.show_popup('Success', f'{len(contacts)} emergency contacts saved'),
+                on_error=lambda e: self.show_popup('Error', f'Could not save contacts: {e}')
+            )
         except Exception as e:
-            self.show_popup('Error', f'Could not save contact: {str(e)}')
+            self.show_popup('Error', f'Could not save contacts: {str(e)}')
     
     def go_back(self, instance):
         self.manager.current = 'profile'
@@ -1366,49 +4725,137 @@ class EmergencyContactsScreen(BaseScreen):
 class EmergencyApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.db_manager = DatabaseManager()
+        self.db_manager = open_database()
         self.device_manager = DeviceManager()
+        self.notifier = EmergencyNotifier(self.db_manager, SmsTransport())
+        self.async_db = AsyncDatabase(self.db_manager)
+        self.session = SessionManager(self.db_manager, self.device_manager)
+        self.session.load_denylist()
+        try:
+            self.db_manager.import_responders()
+        except Exception as e:
+            Logger.exception(f'EmergencyApp: Could not import responders: {e}')
+            metrics.record('error', 1, where='import_responders', error=str(e))
+        self.responders = ResponderDirectory.from_database(self.db_manager)
+        self.builder = IncrementalBuilder()
+        self.journal = EmergencyJournal(metrics=metrics)
+        self.replay_journal()
+        # Satu arsip dan satu set backup per file database
+        self.retention = [RetentionManager(db) if not db.shard_index else
+                          RetentionManager(db, f'{os.path.splitext(db.db_name)[0]}_archive.db')
+                          for db in self.db_manager.databases()]
+        self.backups = [BackupManager(db) for db in self.db_manager.databases()]
 
     def build(self):
         
         sm = ScreenManager()
 
-        sm.add_widget(LandingScreen(self.db_manager, self.device_manager, name='landing'))
-        sm.add_widget(RegisterScreen(self.db_manager, self.device_manager, name='register'))
+        sm.add_widget(LandingScreen(self.db_manager, self.device_manager, self.async_db, name='landing'))
+        sm.add_widget(RegisterScreen(self.db_manager, self.device_manager, self.async_db, name='register'))
         sm.add_widget(MainMenuScreen(self.db_manager, self.device_manager, name='main_menu'))
-        sm.add_widget(EmergencyScreen(self.db_manager, self.device_manager, name='emergency'))
-        sm.add_widget(NewsScreen(self.db_manager, name='news'))
+        sm.add_widget(EmergencyScreen(self.db_manager, self.device_manager, self.notifier, self.async_db,
+                                     self.responders, self.journal, name='emergency'))
+        sm.add_widget(NewsScreen(self.db_manager, self.async_db, name='news'))
         sm.add_widget(AddNewsScreen(self.db_manager, name='add_news'))
-        sm.add_widget(ProfileScreen(self.db_manager, name='profile'))
-        sm.add_widget(EmergencyContactsScreen(self.db_manager, name='emergency_contacts'))
+        sm.add_widget(ModerationScreen(self.db_manager, self.builder, name='moderation'))
+        sm.add_widget(ProfileScreen(self.db_manager, self.async_db, self.builder, name='profile'))
+        sm.add_widget(EmergencyContactsScreen(self.db_manager, self.async_db, name='emergency_contacts'))
 
         self.screen_manager = sm
 
+        if metrics.enabled:
+            self.instrument(sm)
+
         return sm
 
+    def instrument(self, sm):
+        """
+        Record screen transition times and a frame-time histogram
+        """
+        self.transition_start = None
+
+        def on_current(instance, value):
+            self.transition_start = time.perf_counter()
+
+        def on_enter(screen):
+            if self.transition_start is not None:
+                metrics.record('ui.screen_transition',
+                               (time.perf_counter() - self.transition_start) * 1000,
+                               screen=screen.name)
+                self.transition_start = None
+
+        def on_frame(dt):
+            metrics.observe('ui.frame_time', dt * 1000)
+
+        sm.bind(current=on_current)
+        for screen in sm.screens:
+            screen.bind(on_enter=on_enter)
+        Clock.schedule_interval(on_frame, 0)
+
+    def on_stop(self):
+        if metrics.enabled:
+            metrics.export_jsonl(os.getenv('EMERGENCY_METRICS_FILE', 'metrics.jsonl'))
+        self.async_db.close()
+        self.journal.close()
+        self.db_manager.close()
+
+    def replay_journal(self):
+        """
+        Log emergencies from the journal that a crash kept out of the database
+        """
+        try:
+            replayed = self.journal.replay(self.db_manager)
+        except Exception as e:
+            Logger.exception(f'EmergencyApp: Could not replay emergency journal: {e}')
+            metrics.record('error', 1, where='replay_journal', error=str(e))
+            return
+        if replayed:
+            Logger.info(f'EmergencyApp: Recovered {replayed} emergency event(s) from the journal')
+
     def on_start(self):
         """
         Dipanggil setelah aplikasi mulai.
         Periksa apakah pengguna dapat login otomatis.
         """
         self.check_auto_login()
+        Clock.schedule_once(lambda dt: self.preload(), 0.5)
+        # Arsipkan data lama setelah aplikasi tampil
+        Clock.schedule_once(lambda dt: self.run_maintenance(), 30)
+
+    def run_maintenance(self):
+        """
+        Archive old rows now and back up databases without a recent snapshot
+        a little later, one thread per database
+        """
+        for retention in self.retention:
+            retention.run_in_background()
+        for backups in self.backups:
+            if backups.due():
+                Clock.schedule_once(lambda dt, backups=backups: backups.run_in_background(), 30)
+
+    def preload(self):
+        """
+        Load plyer, NumPy and the responder index in the background once the
+        first frame is shown, so the first emergency call does not wait for them
+        """
+        def load():
+            for module in (plyer, numpy):
+                bool(module)
+            self.responders.build()
+
+        threading.Thread(target=load, name='preload', daemon=True).start()
 
     def check_auto_login(self):
      try:
-        if self.device_manager.is_logged_in():
+        if self.session.current_user():
             self.screen_manager.current = 'main_menu'
         else:
-            device_id = self.device_manager.get_device_id()
-            user_data = self.db_manager.get_user_by_device(device_id)
-
-            if user_data:
-                self.device_manager.save_user_session(user_data)
-                self.screen_manager.current = 'main_menu'
-            else:
-                self.screen_manager.current = 'landing'
+            self.screen_manager.current = 'landing'
      except Exception as e:
-        print(f"Error during auto-login: {e}")
+        Logger.exception(f"EmergencyApp: Error during auto-login: {e}")
+        metrics.record('error', 1, where='check_auto_login', error=str(e))
         self.screen_manager.current = 'landing'
 
 if __name__ == "__main__":
-    EmergencyApp().run()   
+    # Jalankan di event loop asyncio supaya coroutine AsyncDatabase bisa di-await
+    asyncio.run(EmergencyApp().async_run(async_lib='asyncio'))   
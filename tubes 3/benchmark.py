@@ -0,0 +1,824 @@
+"""
+Benchmark the DatabaseManager and SecurityUtils hot paths.
+
+Runs headless against temporary databases seeded with `--sizes` rows and
+prints min / median / mean time and operations per second for every case.
+
+    python benchmark.py --sizes 1000,10000,100000 --save benchmark_baseline.json
+    python benchmark.py --sizes 1000,10000,100000 --compare benchmark_baseline.json
+    python benchmark.py --sizes 100000 --suites models
+
+The 'models' suite also reports the memory held per news item.
+
+With --compare the run fails (exit code 1) when the median of a case is
+slower than the baseline by more than --tolerance.
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tubes 3.py')
+
+SUITES = {}
+
+
+def load_app():
+    """
+    Import 'Tubes 3.py' as a module without starting the app
+    """
+    spec = importlib.util.spec_from_file_location('tubes3', APP_PATH)
+    app = importlib.util.module_from_spec(spec)
+    sys.modules['tubes3'] = app
+    spec.loader.exec_module(app)
+    return app
+
+
+def suite(name, sized=True):
+    """
+    Register a benchmark suite, a generator yielding results.
+    Suites that are not `sized` run once with size 0.
+    """
+    def register(func):
+        func.sized = sized
+        SUITES[name] = func
+        return func
+    return register
+
+
+def bench(name, size, func, rounds=50, max_time=1.0):
+    """
+    Call func() up to `rounds` times, stopping early after `max_time` seconds
+    """
+    timings = []
+    started = time.perf_counter()
+    for index in range(rounds):
+        start = time.perf_counter()
+        func(index)
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - started > max_time:
+            break
+
+    median = statistics.median(timings)
+    return {
+        'name': name,
+        'size': size,
+        'rounds': len(timings),
+        'min_ms': min(timings) * 1000,
+        'median_ms': median * 1000,
+        'mean_ms': statistics.mean(timings) * 1000,
+        'ops_per_sec': 1 / median if median else float('inf'),
+    }
+
+
+def seed_database(app, path, size):
+    """
+    Create a DatabaseManager on `path` filled with `size` users, devices,
+    news and emergency contacts
+    """
+    db = app.DatabaseManager(path)
+    password = app.SecurityUtils.hash_password('Passw0rd!')
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+        INSERT INTO users (phone, name, password) VALUES (?, ?, ?)
+        ''', ((f'08{i:010d}', f'User {i}', password) for i in range(size)))
+        cursor.executemany('''
+        INSERT INTO device_auth (user_id, device_id, device_hash) VALUES (?, ?, ?)
+        ''', ((i + 1, f'device-{i}', f'hash-{i}') for i in range(size)))
+        cursor.executemany('''
+        INSERT INTO news (title, description, category, status, created_at)
+        VALUES (?, ?, ?, ?, datetime('now', ?))
+        ''', ((f'News {i}', f'Description of report {i}', 'Local',
+               'approved' if i % 2 else 'pending', f'-{i} seconds')
+              for i in range(size)))
+        cursor.executemany('''
+        INSERT INTO emergency_contacts (user_id, phone, label, priority) VALUES (?, ?, ?, ?)
+        ''', ((i + 1, f'0811{i:08d}', 'Family', 1) for i in range(size)))
+        conn.commit()
+    return db
+
+
+@suite('db')
+def database_suite(app, size, workdir, options):
+    db = seed_database(app, os.path.join(workdir, f'db_{size}.db'), size)
+    rounds = options.rounds
+
+    yield bench('register_user', size,
+                lambda i: db.register_user(f'0899{size:04d}{i:05d}', 'New', 'Passw0rd!'),
+                rounds=rounds)
+    yield bench('authenticate_user', size,
+                lambda i: db.authenticate_user(f'08{i * 7 % size:010d}', 'Passw0rd!'),
+                rounds=rounds)
+    yield bench('get_user_by_device', size,
+                lambda i: db.get_user_by_device(f'device-{i * 7919 % size}'),
+                rounds=rounds)
+    yield bench('submit_news_dedupe', size,
+                lambda i: db.submit_news(f'Report {size}-{i}', f'Flooding near gate {i * 7919 % size}',
+                                         'Local'),
+                rounds=rounds)
+    yield bench('get_approved_news', size,
+                lambda i: db.get_approved_news(),
+                rounds=rounds)
+    yield bench('get_news', size,
+                lambda i: db.get_news(i * 7919 % size + 1),
+                rounds=rounds)
+    yield bench('save_emergency_contacts', size,
+                lambda i: db.save_emergency_contacts(
+                    i * 7919 % size + 1, [('081234567890', 'Family'), ('081298765432', 'Friend')]),
+                rounds=rounds)
+
+
+def seed_emergency_logs(app, db, size):
+    """
+    Bulk load `size` synthetic incidents spread over 30 days and a few cities,
+    then backfill the rollups once. Returns the backfill time in ms.
+    """
+    rng = random.Random(size)
+    cities = [(-6.2, 106.8), (-6.9, 107.6), (-7.25, 112.75), (3.6, 98.7), (-8.65, 115.2)]
+    types = ['police', 'fire', 'medical']
+
+    def rows():
+        for i in range(size):
+            lat, lon = rng.choice(cities)
+            lat += rng.gauss(0, 0.05)
+            lon += rng.gauss(0, 0.05)
+            yield (i % 1000 + 1, types[i % 3], lat, lon, app.geocell(lat, lon),
+                   f'-{rng.randrange(30 * 24 * 60)} minutes')
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DROP TRIGGER IF EXISTS trg_emergency_rollup')
+        cursor.executemany('''
+        INSERT INTO emergency_logs
+        (user_id, emergency_type, latitude, longitude, geocell, timestamp)
+        VALUES (?, ?, ?, ?, ?, datetime('now', ?))
+        ''', rows())
+        conn.commit()
+
+        start = time.perf_counter()
+        app.EmergencyAnalytics.backfill_rollups(cursor)
+        app.EmergencyAnalytics.create_rollups(cursor)
+        conn.commit()
+    return (time.perf_counter() - start) * 1000
+
+
+@suite('analytics')
+def analytics_suite(app, size, workdir, options):
+    db = app.DatabaseManager(os.path.join(workdir, f'analytics_{size}.db'))
+    backfill_ms = seed_emergency_logs(app, db, size)
+    analytics = app.EmergencyAnalytics(db)
+    rounds = options.rounds
+
+    yield {'name': 'rollup_backfill', 'size': size, 'rounds': 1, 'min_ms': backfill_ms,
+           'median_ms': backfill_ms, 'mean_ms': backfill_ms, 'ops_per_sec': 1000 / backfill_ms}
+
+    def raw_query(sql):
+        with db.get_connection() as conn:
+            return conn.execute(sql).fetchall()
+
+    yield bench('raw_incidents_by_type', size, lambda i: raw_query('''
+        SELECT emergency_type, COUNT(*) FROM emergency_logs
+        GROUP BY emergency_type ORDER BY 2 DESC'''), rounds=rounds, max_time=5)
+    yield bench('rollup_incidents_by_type', size,
+                lambda i: analytics.incidents_by_type(), rounds=rounds)
+    yield bench('raw_incidents_by_hour', size, lambda i: raw_query('''
+        SELECT strftime('%H', timestamp), COUNT(*) FROM emergency_logs
+        GROUP BY 1 ORDER BY 1'''), rounds=rounds, max_time=5)
+    yield bench('rollup_incidents_by_hour', size,
+                lambda i: analytics.incidents_by_hour(), rounds=rounds)
+    yield bench('raw_incidents_by_region', size, lambda i: raw_query('''
+        SELECT geocell, COUNT(*) FROM emergency_logs
+        GROUP BY geocell ORDER BY 2 DESC LIMIT 20'''), rounds=rounds, max_time=5)
+    yield bench('rollup_incidents_by_region', size,
+                lambda i: analytics.incidents_by_region(), rounds=rounds)
+    yield bench('log_emergency_with_rollup', size,
+                lambda i: db.log_emergency(1, 'fire', None, -6.9, 107.6), rounds=rounds)
+
+
+def burst(threads, writes_per_thread, write):
+    """
+    Run `write` from several threads at once and return writes per second
+    """
+    def worker():
+        for _ in range(writes_per_thread):
+            write()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return threads * writes_per_thread / (time.perf_counter() - start)
+
+
+@suite('writes')
+def writes_suite(app, size, workdir, options):
+    """
+    `size` small writes from 16 threads: one connection and commit per write
+    versus the shared WriteCoordinator with group commit
+    """
+    db = app.DatabaseManager(os.path.join(workdir, f'writes_{size}.db'))
+    threads = 16
+    per_thread = max(size // threads, 1)
+
+    def direct_write():
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO emergency_logs (user_id, emergency_type) VALUES (1, 'fire')")
+            conn.commit()
+
+    for name, write in (('burst_direct_commit', direct_write),
+                        ('burst_group_commit', lambda: db.log_emergency(1, 'fire'))):
+        ops = burst(threads, per_thread, write)
+        yield {'name': name, 'size': size, 'rounds': 1, 'min_ms': 1000 / ops,
+               'median_ms': 1000 / ops, 'mean_ms': 1000 / ops, 'ops_per_sec': ops}
+
+
+@suite('journal')
+def journal_suite(app, size, workdir, options):
+    """
+    Cost of journaling an emergency before the call versus logging it in
+    SQLite, and replay of `size` records with a corrupt record in the
+    middle and torn writes followed by more records. No valid record before
+    or after the damage may be lost.
+    """
+    db = app.DatabaseManager(os.path.join(workdir, f'journal_{size}.db'))
+    journal = app.EmergencyJournal(os.path.join(workdir, f'emergency_{size}.journal'))
+
+    yield bench('journal_append_fsync', size,
+                lambda i: journal.append(1, 'fire', -6.9, 107.6), rounds=options.rounds)
+    yield bench('log_emergency', size,
+                lambda i: db.log_emergency(1, 'fire', None, -6.9, 107.6), rounds=options.rounds)
+    journal.close()
+    with open(journal.path, 'wb'):
+        pass
+
+    journal_ids = [journal.append(i % 50 or None, 'medical', -6.9, None) for i in range(size)]
+    # Ulang yang terakhir lewat log_emergency, seperti panggilan yang sempat tercatat normal
+    db.log_emergency(1, 'medical', journal_id=journal_ids[-1])
+    journal.close()
+    with open(journal.path, 'r+b') as f:
+        f.seek(app.EmergencyJournal.size * (size // 2) + 8)
+        f.write(b'\xff')
+        f.seek(0, os.SEEK_END)
+        f.write(b'EJ\x01')
+    # append() membuang record yang terpotong di akhir file lebih dulu
+    journal_ids += [journal.append(1, 'police') for _ in range(3)]
+    journal.close()
+
+    # Seperti versi lama yang terus menulis setelah record yang terpotong
+    other = app.EmergencyJournal(os.path.join(workdir, f'other_{size}.journal'))
+    journal_ids += [other.append(2, 'fire') for _ in range(2)]
+    other.close()
+    with open(other.path, 'rb') as f:
+        tail = f.read()
+    with open(journal.path, 'ab') as f:
+        f.write(b'EJ\x01' + tail)
+
+    entries, damaged = journal.read()
+    start = time.perf_counter()
+    added = journal.replay(db)
+    replay_ms = (time.perf_counter() - start) * 1000
+    total = size + 5
+    if ([entry.journal_id for entry in entries] != journal_ids[:size // 2] + journal_ids[size // 2 + 1:]
+            or damaged != 2 or added != total - 2):
+        raise AssertionError(f'journal replay: {len(entries)} read, {damaged} damaged, '
+                             f'{added} added of {total} records')
+    if journal.read() != ([], 0) or journal.replay(db) != 0:
+        raise AssertionError('journal replay: journal not emptied after replay')
+    yield {'name': 'journal_replay_torn', 'size': size, 'rounds': 1, 'min_ms': replay_ms,
+           'median_ms': replay_ms, 'mean_ms': replay_ms, 'ops_per_sec': size * 1000 / replay_ms}
+
+
+def frame_stalls(stop, frame_ms=16.7):
+    """
+    Stand in for the UI thread: wake up every frame until `stop` is set and
+    return the worst lateness in ms
+    """
+    worst = 0
+    expected = time.perf_counter() + frame_ms / 1000
+    while not stop.is_set():
+        time.sleep(max(expected - time.perf_counter(), 0))
+        now = time.perf_counter()
+        worst = max(worst, (now - expected) * 1000)
+        expected = now + frame_ms / 1000
+    return worst
+
+
+@suite('backup')
+def backup_suite(app, size, workdir, options):
+    """
+    Online backup of a seeded database while a frame loop and a writer
+    keep running, checksum verification and restore of the snapshot.
+    A snapshot without a checksum file must not count as finished, and a
+    snapshot of the previous schema version must be migrated on restore.
+    """
+    db = seed_database(app, os.path.join(workdir, f'backup_{size}.db'), size)
+    backups = app.BackupManager(db, os.path.join(workdir, f'backups_{size}'), keep=2)
+
+    stop = threading.Event()
+    stalls = []
+    write_ms = []
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            db.log_emergency(1, 'fire')
+            write_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=lambda: stalls.append(frame_stalls(stop))),
+               threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    path = backups.backup()
+    backup_ms = (time.perf_counter() - start) * 1000
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    megabytes = os.path.getsize(path) / 1e6
+    yield {'name': 'backup_online', 'size': size, 'rounds': 1, 'min_ms': backup_ms,
+           'median_ms': backup_ms, 'mean_ms': backup_ms, 'ops_per_sec': megabytes * 1000 / backup_ms}
+    yield {'name': 'backup_worst_frame_stall', 'size': size, 'rounds': 1, 'min_ms': stalls[0],
+           'median_ms': stalls[0], 'mean_ms': stalls[0], 'ops_per_sec': 0}
+    yield {'name': 'backup_concurrent_write', 'size': size, 'rounds': len(write_ms),
+           'min_ms': min(write_ms), 'median_ms': statistics.median(write_ms),
+           'mean_ms': statistics.fmean(write_ms), 'ops_per_sec': 1000 / statistics.fmean(write_ms)}
+    yield bench('backup_verify', size, lambda i: backups.verify(path), rounds=options.rounds)
+
+    for _ in range(2):
+        backups.backup()
+    if len(backups.snapshots()) != 2 or os.path.exists(path):
+        raise AssertionError(f'backup rotation kept {backups.snapshots()}')
+
+    with db.get_connection() as conn:
+        conn.execute('DELETE FROM news')
+        conn.commit()
+    start = time.perf_counter()
+    backups.restore()
+    restore_ms = (time.perf_counter() - start) * 1000
+    if len(db.get_approved_news()) != size // 2:
+        raise AssertionError('backup restore: news not restored')
+    yield {'name': 'backup_restore', 'size': size, 'rounds': 1, 'min_ms': restore_ms,
+           'median_ms': restore_ms, 'mean_ms': restore_ms, 'ops_per_sec': megabytes * 1000 / restore_ms}
+
+    # Seperti backup yang terputus antara os.replace dan penulisan checksum
+    newest = backups.snapshots()[0]
+    unfinished = newest[:-3] + '9.db'
+    shutil.copyfile(newest, unfinished)
+    if backups.snapshots()[0] != newest:
+        raise AssertionError('backup: snapshot without checksum counted as finished')
+    os.remove(unfinished)
+
+    # Snapshot dari versi sebelum migrasi 8
+    with db.get_connection() as conn:
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+    old = sqlite3.connect(newest)
+    old.execute('DROP INDEX idx_news_remote')
+    old.execute('ALTER TABLE news DROP COLUMN remote_id')
+    old.execute('ALTER TABLE news DROP COLUMN sync_source')
+    old.execute('PRAGMA user_version = 7')
+    old.commit()
+    old.close()
+    with open(newest + '.sha256', 'w', encoding='utf-8') as f:
+        f.write(f'{backups.checksum(newest)}  {os.path.basename(newest)}\n')
+    backups.restore(newest)
+    with db.get_connection() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(news)')}
+    if version != current or 'sync_source' not in columns:
+        raise AssertionError(f'backup restore: old snapshot not migrated (version {version})')
+
+
+def shard_map(app, workdir, count, size):
+    """
+    ShardMap of `count` regions, each a band of latitude south of Bandung
+    """
+    shards = {f'region{i}': os.path.join(workdir, f'shard_{size}_{count}_{i}.db') for i in range(count)}
+    bounds = {f'region{i}': (-7.0 - i, 100, -6.0 - i, 120) for i in range(count)}
+    return app.ShardMap(shards, bounds)
+
+
+def shard_writer(app, shards, region, writes, barrier, results):
+    """
+    One writer process, like the server of a region: log `writes`
+    emergencies located in `region` and report their latencies
+    """
+    db = app.ShardedDatabaseManager(shards)
+    south, west, north, east = shards.bounds[region]
+    barrier.wait()
+    latencies = []
+    for _ in range(writes):
+        start = time.perf_counter()
+        db.log_emergency(1, 'fire', None, (south + north) / 2, (west + east) / 2)
+        latencies.append((time.perf_counter() - start) * 1000)
+    db.close()
+    results.put(latencies)
+
+
+@suite('shards')
+def shards_suite(app, size, workdir, options):
+    """
+    `size` emergency logs from 4 writer processes, one per region, with
+    the regions mapped onto 1, 2 and 4 shards, and the global news feed
+    read across the attached shards. With one shard the writers wait for
+    each other's SQLite write lock, which shows in the worst latency.
+    Writes per second are not expected to grow with the shard count:
+    the writers are CPU-bound and share the cores, whatever the number
+    of files they write to.
+    """
+    context = multiprocessing.get_context('fork')
+    writers = 4
+    per_writer = max(size // writers, 1)
+    for count in (1, 2, 4):
+        shards = shard_map(app, workdir, count, size)
+        app.ShardedDatabaseManager(shards).close()
+
+        barrier = context.Barrier(writers + 1)
+        results = context.Queue()
+        processes = [context.Process(target=shard_writer,
+                                     args=(app, shards, shards.regions[i % count], per_writer,
+                                           barrier, results))
+                     for i in range(writers)]
+        for process in processes:
+            process.start()
+        barrier.wait()
+        start = time.perf_counter()
+        latencies = sorted(ms for _ in processes for ms in results.get())
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        yield {'name': f'log_emergency_{count}_shards', 'size': size, 'rounds': len(latencies),
+               'min_ms': latencies[0], 'median_ms': statistics.median(latencies),
+               'mean_ms': statistics.fmean(latencies), 'ops_per_sec': len(latencies) / elapsed}
+        yield {'name': f'log_emergency_{count}_shards_worst', 'size': size, 'rounds': 1,
+               'min_ms': latencies[-1], 'median_ms': latencies[-1], 'mean_ms': latencies[-1],
+               'ops_per_sec': 0}
+
+        db = app.ShardedDatabaseManager(shards)
+        for shard in db.shards.values():
+            with shard.get_connection() as conn:
+                conn.executemany('''
+                INSERT INTO news (title, description, category, status, created_at)
+                VALUES (?, ?, 'Local', 'approved', datetime('now', ?))
+                ''', ((f'News {i}', 'Description', f'-{i} seconds') for i in range(size // count)))
+                conn.commit()
+        feed = db.get_news_feed()
+        if len(feed) != size // count * count or feed != sorted(feed, key=lambda item: item.created_at,
+                                                                  reverse=True):
+            raise AssertionError(f'sharded feed: {len(feed)} rows out of order or missing')
+        yield bench(f'global_news_feed_{count}_shards', size, lambda i: db.get_news_feed(),
+                    rounds=options.rounds, max_time=5)
+        db.close()
+
+
+@suite('sync')
+def sync_suite(app, size, workdir, options):
+    """
+    Bytes and time of a full first sync, a delta after 1% of the news
+    changed and a sync with nothing new, against re-downloading every
+    public news item as JSON. After every sync the device must hold
+    exactly the public news of the server, and its own news, whose ids
+    collide with those of the server, must be left alone.
+    """
+    server_db = seed_database(app, os.path.join(workdir, f'sync_server_{size}.db'), size)
+    device_db = app.DatabaseManager(os.path.join(workdir, f'sync_device_{size}.db'))
+    transport = app.LocalSyncTransport(app.NewsSyncServer(server_db))
+    client = app.NewsSyncClient(device_db, transport)
+    # Berita lokal dengan id 1-4, sama dengan id berita di server
+    for i in range(4):
+        device_db.submit_news(f'Local {i}', 'Written on this device', 'Local', deduplicate=False)
+    with device_db.get_connection() as conn:
+        conn.execute("UPDATE news SET status = 'approved' WHERE id > 2")
+        conn.commit()
+
+    def full_download():
+        columns = ', '.join(app.SYNC_NEWS_COLUMNS)
+        with server_db.get_connection() as conn:
+            rows = conn.execute(f"SELECT {columns} FROM news WHERE status = 'approved'").fetchall()
+        return len(json.dumps(rows, separators=(',', ':')).encode('utf-8'))
+
+    def public_news(db):
+        columns = ', '.join(app.SYNC_NEWS_COLUMNS)
+        with db.get_connection() as conn:
+            return conn.execute(f"SELECT {columns} FROM news WHERE status = 'approved' ORDER BY id").fetchall()
+
+    def synced_news(db):
+        columns = ', '.join(('remote_id',) + app.SYNC_NEWS_COLUMNS[1:])
+        with db.get_connection() as conn:
+            return conn.execute(f"SELECT {columns} FROM news WHERE sync_source = ? ORDER BY remote_id",
+                                (client.name,)).fetchall()
+
+    def local_news(db):
+        with db.get_connection() as conn:
+            return conn.execute('SELECT id, title, status FROM news WHERE sync_source IS NULL '
+                                'ORDER BY id').fetchall()
+
+    local = local_news(device_db)
+
+    def change_news(count):
+        approved = [row[0] for row in public_news(server_db)]
+        pending = [news.id for news in server_db.get_pending_news(count)]
+        server_db.set_moderator(1)
+        server_db.approve_news(pending[:count // 2], 1)
+        with server_db.get_connection() as conn:
+            conn.executemany('DELETE FROM news WHERE id = ?', ((news_id,) for news_id in approved[:count // 4]))
+            conn.executemany('UPDATE news SET report_count = report_count + 1 WHERE id = ?',
+                             ((news_id,) for news_id in approved[count // 4:count // 2]))
+            conn.commit()
+
+    for name, prepare in (('sync_first', None), ('sync_delta_1pct', lambda: change_news(size // 100)),
+                          ('sync_no_changes', None)):
+        if prepare:
+            prepare()
+        report = client.sync()
+        if synced_news(device_db) != public_news(server_db):
+            raise AssertionError(f'{name}: device news differ from the server after sync')
+        if local_news(device_db) != local:
+            raise AssertionError(f'{name}: sync changed the news written on the device')
+        full_bytes = full_download()
+        yield {'name': name, 'size': size, 'rounds': report['batches'], 'min_ms': report['ms'],
+               'median_ms': report['ms'], 'mean_ms': report['ms'],
+               'ops_per_sec': (report['rows'] + report['deleted']) * 1000 / report['ms'],
+               'bytes_per_item': report['bytes_received'] / max(report['rows'] + report['deleted'], 1)}
+        print(f"{name}: {report['rows']} rows, {report['deleted']} tombstones, "
+              f"{report['bytes_sent']} B sent, {report['bytes_received']} B received "
+              f"({report['json_bytes']} B JSON), full download {full_bytes} B")
+
+
+@suite('notify', sized=False)
+def notify_suite(app, size, workdir, options):
+    """
+    EmergencyNotifier against a scripted FakeTransport: one contact that
+    answers at once, one that fails once and one that never answers.
+    Raises unless every contact ends with the expected status and number
+    of attempts, and a second notify only retries the failed contact.
+    """
+    db = app.DatabaseManager(os.path.join(workdir, 'notify.db'))
+    ok, flaky, dead = '081200000001', '081200000002', '081200000003'
+    contacts = [app.ContactRow(ok, 'Family', 1), app.ContactRow('+6281200000002', 'Friend', 2),
+                app.ContactRow(dead, 'Work', 3), app.ContactRow(ok, 'Duplicate', 4)]
+    transport = app.FakeTransport(script={flaky: 1, dead: 99})
+    notifier = app.EmergencyNotifier(db, transport, max_attempts=3, retry_delay=0.001)
+    event_id = db.log_emergency(1, 'fire')
+
+    start = time.perf_counter()
+    statuses = notifier.notify(event_id, contacts, 'EMERGENCY')
+    notify_ms = (time.perf_counter() - start) * 1000
+    expected = {ok: ('delivered', 1), flaky: ('delivered', 2), dead: ('failed', 3)}
+    deliveries = {row.phone: (row.status, row.attempts) for row in db.get_deliveries(event_id)}
+    if statuses != {phone: status for phone, (status, _) in expected.items()} or deliveries != expected:
+        raise AssertionError(f'notify: got {statuses} and deliveries {deliveries}')
+    if sorted(phone for phone, _ in transport.sent) != [ok, flaky]:
+        raise AssertionError(f'notify: sent {transport.sent}')
+
+    statuses = notifier.notify(event_id, contacts, 'EMERGENCY')
+    if statuses != {dead: 'failed'} or len(transport.sent) != 2:
+        raise AssertionError(f'notify again: got {statuses}, sent {transport.sent}')
+    notifier.executor.shutdown()
+    yield {'name': 'notify_scripted_retries', 'size': size, 'rounds': 1, 'min_ms': notify_ms,
+           'median_ms': notify_ms, 'mean_ms': notify_ms, 'ops_per_sec': 3000 / notify_ms}
+
+
+def measure_memory(build):
+    """
+    Call build() and return its result and the bytes it kept allocated
+    """
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    value = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, after - before
+
+
+@suite('models')
+def models_suite(app, size, workdir, options):
+    """
+    Load `size` news items as plain tuples, dicts and NewsItem models and
+    compare load time and memory per item
+    """
+    path = os.path.join(workdir, f'models_{size}.db')
+    app.DatabaseManager(path).close()
+    categories = ['Local', 'Traffic', 'Weather', 'Crime', 'Health']
+
+    conn = sqlite3.connect(path)
+    conn.executemany('''
+    INSERT INTO news (title, description, category, status, created_at)
+    VALUES (?, ?, ?, 'approved', datetime('now', ?))
+    ''', ((f'News {i}', f'Description of report {i}', categories[i % 5], f'-{i} seconds')
+          for i in range(size)))
+    conn.commit()
+
+    sql = app.STATEMENTS['approved_news'].sql
+    columns = app.NewsItem.__slots__
+    loaders = {
+        'news_as_tuples': lambda: conn.execute(sql).fetchall(),
+        'news_as_dicts': lambda: [dict(zip(columns, row)) for row in conn.execute(sql)],
+        'news_as_models': lambda: [app.NewsItem.from_row(row) for row in conn.execute(sql)],
+    }
+
+    for name, load in loaders.items():
+        items, allocated = measure_memory(load)
+        del items
+        result = bench(name, size, lambda i: load(), rounds=min(options.rounds, 10), max_time=5)
+        result['bytes_per_item'] = allocated / size
+        yield result
+    conn.close()
+
+
+@suite('feed')
+def feed_suite(app, size, workdir, options):
+    """
+    News feed with 5 KB descriptions: every column versus the projected
+    feed query, with and without a snippet, and the first and last page
+    the news screen loads
+    """
+    path = os.path.join(workdir, f'feed_{size}.db')
+    db = app.DatabaseManager(path)
+    rng = random.Random(size)
+    words = ['fire', 'flood', 'road', 'closed', 'smoke', 'near', 'market', 'bridge', 'help', 'water']
+
+    with db.get_connection() as conn:
+        conn.executemany('''
+        INSERT INTO news (title, description, category, status, created_at)
+        VALUES (?, ?, 'Local', 'approved', datetime('now', ?))
+        ''', ((f'News {i}', ' '.join(rng.choice(words) for _ in range(900))[:5000], f'-{i} seconds')
+              for i in range(size)))
+        conn.commit()
+
+    loaders = {
+        'feed_all_columns': db.get_approved_news,
+        'feed_projected': lambda: db.get_news_feed(0),
+        'feed_projected_snippet': lambda: db.get_news_feed(app.FEED_SNIPPET_LENGTH),
+    }
+    for name, load in loaders.items():
+        items, allocated = measure_memory(load)
+        del items
+        result = bench(name, size, lambda i: load(), rounds=min(options.rounds, 10), max_time=5)
+        result['bytes_per_item'] = allocated / size
+        yield result
+
+    # Halaman terakhir lewat keyset harus secepat halaman pertama
+    feed = db.get_news_feed(0)
+    before_last = feed[-app.FEED_PAGE_ROWS - 1] if len(feed) > app.FEED_PAGE_ROWS else None
+    pages = {
+        'feed_first_page': lambda: db.get_news_feed(app.FEED_SNIPPET_LENGTH, app.FEED_PAGE_ROWS),
+        'feed_last_page': lambda: db.get_news_feed(
+            app.FEED_SNIPPET_LENGTH, app.FEED_PAGE_ROWS,
+            (before_last.created_at, before_last.id) if before_last else None),
+    }
+    for name, load in pages.items():
+        yield bench(name, size, lambda i: load(), rounds=min(options.rounds, 10), max_time=5)
+    db.close()
+
+
+@suite('responders')
+def responders_suite(app, size, workdir, options):
+    """
+    nearest_responders() over `size` synthetic stations spread over Indonesia,
+    grid index versus scanning every station
+    """
+    rng = random.Random(size)
+    types = ['police', 'fire', 'medical']
+    stations = [app.Responder(types[i % 3], f'Station {i}', f'0{i:011d}',
+                              rng.uniform(-11, 6), rng.uniform(95, 141))
+                for i in range(size)]
+    directory = app.ResponderDirectory(stations)
+    scan = app.ResponderDirectory(stations)
+    scan.brute_force_limit = size
+    directory.build()
+    scan.build()
+
+    callers = [(rng.uniform(-8, -6), rng.uniform(106, 113)) for _ in range(1000)]
+
+    yield bench('nearest_responders_grid', size,
+                lambda i: directory.nearest_responders(*callers[i % 1000], types[i % 3], k=3),
+                rounds=options.rounds * 20)
+    yield bench('nearest_responders_scan', size,
+                lambda i: scan.nearest_responders(*callers[i % 1000], types[i % 3], k=3),
+                rounds=options.rounds * 20)
+
+
+@suite('security', sized=False)
+def security_suite(app, size, workdir, options):
+    passwords = ['short', 'alllowercase1!', 'NoDigits!!', 'Passw0rd!'] * 25
+    phones = ['081234567890', '+6281234567890', '12345', '0812-3456'] * 25
+
+    yield bench('validate_password_x100', size,
+                lambda i: [app.SecurityUtils.validate_password(p) for p in passwords],
+                rounds=options.rounds)
+    yield bench('validate_phone_number_x100', size,
+                lambda i: [app.SecurityUtils.validate_phone_number(p) for p in phones],
+                rounds=options.rounds)
+    yield bench('hash_password', size,
+                lambda i: app.SecurityUtils.hash_password('Passw0rd!'),
+                rounds=options.rounds)
+
+
+@suite('credentials', sized=False)
+def credentials_suite(app, size, workdir, options):
+    """
+    Login throughput of CredentialService with one worker and one per core
+    """
+    import credential_service
+
+    stored_password = app.SecurityUtils.hash_password('Passw0rd!')
+    for workers in sorted({1, os.cpu_count() or 1}):
+        with credential_service.CredentialService(workers, queue_timeout=5) as service:
+            service.warm_up()
+            report = credential_service.generate_load(service, workers * 4, workers * 20,
+                                                      stored_password)
+        ms = 1000 / report['logins_per_sec']
+        yield {'name': f'verify_password_{workers}_workers', 'size': size,
+               'rounds': report['completed'], 'min_ms': ms, 'median_ms': ms, 'mean_ms': ms,
+               'ops_per_sec': report['logins_per_sec']}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return the cases whose median got slower than the baseline allows
+    """
+    previous = {(r['name'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['name'], result['size']))
+        if old and result['median_ms'] > old['median_ms'] * (1 + tolerance):
+            regressions.append((result, old))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'name':<32}{'size':>10}{'rounds':>8}{'min ms':>12}{'median ms':>12}{'mean ms':>12}"
+          f"{'ops/s':>12}{'bytes/item':>12}")
+    for r in results:
+        memory = f"{r['bytes_per_item']:>12.0f}" if 'bytes_per_item' in r else ''
+        print(f"{r['name']:<32}{r['size']:>10}{r['rounds']:>8}{r['min_ms']:>12.3f}"
+              f"{r['median_ms']:>12.3f}{r['mean_ms']:>12.3f}{r['ops_per_sec']:>12.1f}{memory}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000',
+                        help='comma separated row counts to seed, e.g. 1000,1000000')
+    parser.add_argument('--suites', default=','.join(SUITES),
+                        help=f'suites to run ({", ".join(SUITES)})')
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--save', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', help='fail when slower than this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown of the median, 0.25 = 25%%')
+    options = parser.parse_args(argv)
+
+    app = load_app()
+    sizes = [int(size) for size in options.sizes.split(',')]
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in options.suites.split(','):
+            run = SUITES[name]
+            for size in (sizes if run.sized else [0]):
+                for result in run(app, size, workdir, options):
+                    results.append(result)
+
+    print_results(results)
+
+    if options.save:
+        with open(options.save, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'results': results}, f, indent=2)
+
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.tolerance)
+        for result, old in regressions:
+            print(f"REGRESSION {result['name']}[{result['size']}]: "
+                  f"{old['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Credential verification service for a multi-user backend.
+
+PBKDF2 with 100k iterations is CPU bound, so a server checking logins on
+threads is limited by the GIL to about one core. CredentialService runs
+hash_password and verify_password in a ProcessPoolExecutor with one
+process per core. The hashing itself is SecurityUtils from
+security_utils.py, the module the app uses too, so both always produce
+the same hashes. It does not import Kivy, so workers start headless.
+
+Backpressure: at most `max_pending` requests are queued or running. A new
+request waits up to `queue_timeout` seconds for a free slot and then fails
+with Overloaded. Every request also has a deadline. A request that is
+still queued when its deadline passes is dropped before hashing, and the
+caller gets DeadlineExceeded.
+
+The load generator runs concurrent logins against the service:
+
+    python credential_service.py --workers 4 --clients 32 --requests 400
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from security_utils import SecurityUtils
+
+DEFAULT_DEADLINE = 2.0  # detik
+
+
+class Overloaded(Exception):
+    """
+    Raised when the queue stays full for longer than queue_timeout
+    """
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request did not finish before its deadline
+    """
+
+
+# Fungsi tingkat modul supaya bisa dikirim ke proses pekerja
+def hash_password(password, salt=None):
+    return SecurityUtils.hash_password(password, salt)
+
+
+def verify_password(stored_password, provided_password):
+    return SecurityUtils.verify_password(stored_password, provided_password)
+
+
+def run_before(deadline, func, *args):
+    """
+    Worker side: skip the work when the deadline passed while queued.
+    time.monotonic() is system wide, so it can be compared across processes.
+    """
+    if time.monotonic() > deadline:
+        return DeadlineExceeded
+    return func(*args)
+
+
+class CredentialService:
+    def __init__(self, workers=None, max_pending=None, queue_timeout=0.1,
+                 deadline=DEFAULT_DEADLINE):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def submit(self, func, *args, deadline=None):
+        """
+        Queue func(*args) on the pool and return (future, deadline)
+        """
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            raise Overloaded(f'{self.max_pending} credential checks pending')
+
+        expires = time.monotonic() + (self.deadline if deadline is None else deadline)
+        try:
+            future = self.executor.submit(run_before, expires, func, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        return future, expires
+
+    def result(self, future, expires):
+        """
+        Wait for a request until its deadline
+        """
+        try:
+            result = future.result(timeout=max(expires - time.monotonic(), 0))
+        except TimeoutError:
+            future.cancel()
+            raise DeadlineExceeded('credential check timed out') from None
+        if result is DeadlineExceeded:
+            raise DeadlineExceeded('credential check expired in the queue')
+        return result
+
+    def verify(self, stored_password, provided_password, deadline=None):
+        return self.result(*self.submit(verify_password, stored_password,
+                                        provided_password, deadline=deadline))
+
+    def hash(self, password, deadline=None):
+        return self.result(*self.submit(hash_password, password, deadline=deadline))
+
+    def warm_up(self):
+        """
+        Start all worker processes before the first real request
+        """
+        futures = [self.executor.submit(time.sleep, 0.01) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_load(service, clients, requests, stored_password, password='Passw0rd!'):
+    """
+    Run `requests` logins from `clients` threads and return a report with
+    throughput, latency percentiles and the number of rejected requests
+    """
+    latencies = []
+    errors = {'overloaded': 0, 'deadline': 0}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                service.verify(stored_password, password)
+            except Overloaded:
+                with lock:
+                    errors['overloaded'] += 1
+                continue
+            except DeadlineExceeded:
+                with lock:
+                    errors['deadline'] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'workers': service.workers,
+        'clients': clients,
+        'completed': len(latencies),
+        'logins_per_sec': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) if latencies else None,
+        'p99_ms': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else None,
+        **errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--max-pending', type=int)
+    parser.add_argument('--queue-timeout', type=float, default=1.0)
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE)
+    options = parser.parse_args(argv)
+
+    stored_password = hash_password('Passw0rd!')
+    print(f"{'workers':>8}{'clients':>9}{'done':>7}{'logins/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'overload':>10}{'deadline':>10}")
+    for workers in sorted({1, options.workers}):
+        with CredentialService(workers, options.max_pending, options.queue_timeout,
+                               options.deadline) as service:
+            service.warm_up()
+            r = generate_load(service, options.clients, options.requests, stored_password)
+        p50 = f"{r['p50_ms']:>9.1f}" if r['completed'] else f"{'-':>9}"
+        p99 = f"{r['p99_ms']:>9.1f}" if r['completed'] else f"{'-':>9}"
+        print(f"{r['workers']:>8}{r['clients']:>9}{r['completed']:>7}{r['logins_per_sec']:>10.1f}"
+              f"{p50}{p99}{r['overloaded']:>10}{r['deadline']:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
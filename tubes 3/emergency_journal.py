@@ -0,0 +1,151 @@
+"""
+Crash-safe journal of emergency events.
+
+Used by the full app and by the SOS launch mode (app_frs.py), which
+writes to it before anything else is loaded. It imports only the
+standard library: no Kivy, no sqlite3 and not the app module.
+"""
+import logging
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+JOURNAL_PATH = 'emergency.journal'
+
+# Logger Kivy adalah logger 'kivy' milik modul logging, jadi Kivy tidak perlu diimpor
+Logger = logging.getLogger('kivy')
+
+JournalEntry = namedtuple('JournalEntry', 'journal_id user_id emergency_type timestamp latitude longitude')
+
+
+class EmergencyJournal:
+    """
+    Append-only file of emergency events, written and fsync'd before the
+    call is dialed, so an emergency is not lost when the app crashes or is
+    killed during the call.
+
+    Records have a fixed size, start with `magic` and end with a CRC32 of
+    the rest. append() cuts off a torn record left at the end by a crash
+    before writing behind it, and read() skips a corrupt record and finds
+    the next one by its magic, so the records after it are kept. replay()
+    copies the records into emergency_logs on the next start. Every record
+    has a random journal_id, kept in emergency_logs too, so an event that
+    was also logged normally is not added twice.
+
+    Damaged records are counted in `metrics` (a PerformanceMetrics) when
+    one is given.
+    """
+    magic = b'EJ'
+    version = 1
+    # magic, versi, journal_id, user_id (-1 = tidak ada), waktu, lat, lon (NaN = tidak ada), jenis
+    record = struct.Struct('<2sBxqqddd16s')
+    size = record.size + 4
+
+    def __init__(self, path=JOURNAL_PATH, metrics=None):
+        self.path = path
+        self.metrics = metrics
+        self.fd = None
+        self.lock = threading.Lock()
+
+    def append(self, user_id, emergency_type, latitude=None, longitude=None):
+        """
+        Write one event to disk and return its journal_id
+        """
+        journal_id = int.from_bytes(os.urandom(8), 'little') >> 1
+        body = self.record.pack(
+            self.magic, self.version, journal_id, -1 if user_id is None else user_id, time.time(),
+            math.nan if latitude is None else latitude, math.nan if longitude is None else longitude,
+            emergency_type.encode('utf-8')[:16])
+        data = body + struct.pack('<I', zlib.crc32(body))
+
+        with self.lock:
+            if self.fd is None:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                self.truncate_torn_tail()
+            os.write(self.fd, data)
+            # fdatasync cukup: ukuran file ikut disimpan, waktu akses tidak perlu
+            getattr(os, 'fdatasync', os.fsync)(self.fd)
+        return journal_id
+
+    def truncate_torn_tail(self):
+        """
+        Drop a partial record at the end of the file, so new records start
+        at a multiple of `size` again
+        """
+        length = os.fstat(self.fd).st_size
+        torn = length % self.size
+        if torn:
+            os.ftruncate(self.fd, length - torn)
+            Logger.warning(f'EmergencyJournal: Dropped a torn record of {torn} bytes')
+            self.record_error(1, 'journal_append', 'torn record')
+
+    def read(self):
+        """
+        Return (entries, damaged) with the valid records of the journal and
+        the number of records that were torn or corrupt
+        """
+        if not os.path.exists(self.path):
+            return [], 0
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        entries = []
+        damaged = 0
+        skipping = False
+        offset = 0
+        while offset < len(data):
+            chunk = data[offset:offset + self.size]
+            body, checksum = chunk[:self.record.size], chunk[self.record.size:]
+            if (len(chunk) < self.size or body[:2] != self.magic
+                    or struct.unpack('<I', checksum)[0] != zlib.crc32(body)):
+                if not skipping:
+                    damaged += 1
+                    skipping = True
+                # Cari record berikutnya; CRC menolak magic yang kebetulan ada di data
+                offset = data.find(self.magic, offset + 1)
+                if offset < 0:
+                    break
+                continue
+            skipping = False
+            offset += self.size
+            _, _, journal_id, user_id, timestamp, latitude, longitude, emergency_type = \
+                self.record.unpack(body)
+            entries.append(JournalEntry(
+                journal_id, None if user_id == -1 else user_id,
+                emergency_type.rstrip(b'\0').decode('utf-8', 'replace'), timestamp,
+                None if math.isnan(latitude) else latitude,
+                None if math.isnan(longitude) else longitude))
+        return entries, damaged
+
+    def replay(self, db_manager):
+        """
+        Copy the journal into emergency_logs and empty it.
+        Returns the number of events that were not logged yet.
+        """
+        with self.lock:
+            entries, damaged = self.read()
+            if not entries and not damaged:
+                return 0
+            added = db_manager.replay_emergencies(entries)
+            # Kosongkan setelah commit; kalau gagal, jurnal dibaca lagi saat start berikutnya
+            with open(self.path, 'r+b') as f:
+                f.truncate(0)
+                os.fsync(f.fileno())
+        if damaged:
+            Logger.warning(f'EmergencyJournal: Skipped {damaged} damaged record(s)')
+            self.record_error(damaged, 'journal_replay', 'damaged record')
+        return added
+
+    def record_error(self, count, where, error):
+        if self.metrics is not None:
+            self.metrics.record('error', count, where=where, error=error)
+
+    def close(self):
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
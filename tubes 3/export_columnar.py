@@ -0,0 +1,204 @@
+"""
+Export emergency_logs and news from emergency_app.db to columnar files.
+
+Rows are streamed in chunks ordered by id, so memory stays bounded by
+--chunk-size. Every chunk becomes one part file:
+
+    <output>/<table>/part-<first id>-<last id>.parquet   (pyarrow installed)
+    <output>/<table>/part-<first id>-<last id>.npz       (NumPy fallback)
+
+Timestamps are exported as int64 seconds since the epoch and category-like
+columns (category, status, emergency_type, geocell) are dictionary-encoded.
+The last exported id of each table is kept in <output>/_watermark.json, so
+running the exporter again only writes rows added since the previous run.
+
+    python export_columnar.py --db emergency_app.db --output export/
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import urllib.parse
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TABLES = ('news', 'emergency_logs')
+CATEGORY_COLUMNS = {'category', 'status', 'emergency_type', 'geocell'}
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def column_types(conn, table):
+    """
+    Map every column of `table` to int, float, timestamp, category or text
+    """
+    columns = []
+    for _, name, declared, *_ in conn.execute(f'PRAGMA table_info({table})'):
+        declared = (declared or '').upper()
+        if name in CATEGORY_COLUMNS:
+            kind = 'category'
+        elif declared in ('DATETIME', 'TIMESTAMP', 'DATE'):
+            kind = 'timestamp'
+        elif 'INT' in declared or declared == 'BOOLEAN':
+            kind = 'int'
+        elif declared in ('REAL', 'FLOAT', 'DOUBLE'):
+            kind = 'float'
+        else:
+            kind = 'text'
+        columns.append((name, kind))
+    return columns
+
+
+def select_chunks(conn, table, columns, after_id, chunk_size):
+    """
+    Yield lists of rows with id > after_id, `chunk_size` rows at a time
+    """
+    select = ', '.join(
+        f"CAST(strftime('%s', {name}) AS INTEGER)" if kind == 'timestamp' else name
+        for name, kind in columns
+    )
+    sql = f'SELECT {select} FROM {table} WHERE id > ? ORDER BY id LIMIT ?'
+
+    while True:
+        rows = conn.execute(sql, (after_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def write_parquet(path, columns, rows):
+    arrays = []
+    for index, (name, kind) in enumerate(columns):
+        values = [row[index] for row in rows]
+        if kind in ('int', 'timestamp'):
+            array = pyarrow.array(values, type=pyarrow.int64())
+        elif kind == 'float':
+            array = pyarrow.array(values, type=pyarrow.float64())
+        elif kind == 'category':
+            array = pyarrow.array(values, type=pyarrow.string()).dictionary_encode()
+        else:
+            array = pyarrow.array(values, type=pyarrow.string())
+        arrays.append(array)
+
+    table = pyarrow.Table.from_arrays(arrays, names=[name for name, _ in columns])
+    pyarrow.parquet.write_table(table, path, compression='zstd')
+
+
+def write_npz(path, columns, rows):
+    """
+    Numeric columns become arrays with a `<name>.valid` mask for NULLs,
+    categories become `<name>.codes` (-1 = NULL) and `<name>.categories`,
+    and text is stored Arrow style as `<name>.data` bytes plus `<name>.offsets`.
+    """
+    arrays = {}
+    for index, (name, kind) in enumerate(columns):
+        values = [row[index] for row in rows]
+
+        if kind in ('int', 'timestamp', 'float'):
+            dtype = numpy.float64 if kind == 'float' else numpy.int64
+            arrays[f'{name}.valid'] = numpy.array([v is not None for v in values])
+            arrays[name] = numpy.array([0 if v is None else v for v in values], dtype=dtype)
+
+        elif kind == 'category':
+            categories = {}
+            codes = [-1 if v is None else categories.setdefault(v, len(categories)) for v in values]
+            arrays[f'{name}.codes'] = numpy.array(codes, dtype=numpy.int32)
+            arrays[f'{name}.categories'] = numpy.array(list(categories), dtype=str)
+
+        else:
+            encoded = [b'' if v is None else str(v).encode('utf-8') for v in values]
+            offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+            numpy.cumsum([len(v) for v in encoded], out=offsets[1:])
+            arrays[f'{name}.data'] = numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8)
+            arrays[f'{name}.offsets'] = offsets
+            arrays[f'{name}.valid'] = numpy.array([v is not None for v in values])
+
+    with open(path, 'wb') as f:
+        numpy.savez_compressed(f, **arrays)
+
+
+def load_watermark(output):
+    path = os.path.join(output, '_watermark.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_watermark(output, watermark):
+    path = os.path.join(output, '_watermark.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(watermark, f)
+    os.replace(path + '.tmp', path)
+
+
+def export(db_path, output, tables=TABLES, chunk_size=DEFAULT_CHUNK_SIZE, file_format=None):
+    """
+    Export new rows of `tables` and return the number of rows written per table
+    """
+    if file_format is None:
+        file_format = 'parquet' if pyarrow else 'npz'
+    if file_format == 'parquet' and pyarrow is None:
+        raise RuntimeError('pyarrow is not installed, use --format npz')
+    if file_format == 'npz' and numpy is None:
+        raise RuntimeError('numpy is not installed')
+    write = write_parquet if file_format == 'parquet' else write_npz
+
+    os.makedirs(output, exist_ok=True)
+    watermark = load_watermark(output)
+    exported = {}
+
+    conn = sqlite3.connect(f'file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        for table in tables:
+            columns = column_types(conn, table)
+            table_dir = os.path.join(output, table)
+            os.makedirs(table_dir, exist_ok=True)
+            exported[table] = 0
+
+            for rows in select_chunks(conn, table, columns, watermark.get(table, 0), chunk_size):
+                first_id, last_id = rows[0][0], rows[-1][0]
+                path = os.path.join(table_dir, f'part-{first_id:012d}-{last_id:012d}.{file_format}')
+                # Tulis ke file sementara dulu supaya part yang setengah jadi tidak terbaca
+                write(path + '.tmp', columns, rows)
+                os.replace(path + '.tmp', path)
+
+                watermark[table] = last_id
+                save_watermark(output, watermark)
+                exported[table] += len(rows)
+    finally:
+        conn.close()
+
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='emergency_app.db')
+    parser.add_argument('--output', default='export')
+    parser.add_argument('--tables', default=','.join(TABLES))
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--format', choices=('parquet', 'npz'),
+                        help='default: parquet when pyarrow is installed, otherwise npz')
+    options = parser.parse_args(argv)
+
+    exported = export(options.db, options.output, options.tables.split(','),
+                      options.chunk_size, options.format)
+    for table, count in exported.items():
+        print(f'{table}: {count} rows exported')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
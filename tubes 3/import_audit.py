@@ -0,0 +1,188 @@
+"""
+Startup import audit for EmergencyApp.
+
+Starts the app in a fresh interpreter with `python -X importtime`, builds
+the screens and renders the first frame, then reports:
+
+- the time from process start to the first frame,
+- the cumulative import time of every top-level module imported before
+  that frame, slowest first,
+- whether a module that must load lazily (plyer, NumPy, the popup
+  machinery) was imported anyway,
+- the images decoded for that frame.
+
+With --sos the SOS-only mode of app_frs.py is measured instead. It must
+not open the database or decode any image before its first frame.
+
+    python import_audit.py --top 20
+    python import_audit.py --budget-ms 600 --output import_report.json
+    python import_audit.py --sos --first-frame-budget-ms 300
+
+The run fails (exit code 1) when a lazy module was imported or an image
+decoded before the first frame, or when a budget is exceeded.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark import APP_PATH
+
+LAZY_MODULES = ('plyer', 'numpy', 'kivy.uix.popup')
+SOS_LAZY_MODULES = LAZY_MODULES + ('sqlite3', 'tubes3', 'kivy.storage.jsonstore')
+
+# Dijalankan di interpreter baru supaya tidak ada modul yang sudah termuat
+CHILD = '''
+import json, os, sys, time
+os.environ['KIVY_NO_ARGS'] = '1'
+os.environ['KIVY_NO_CONSOLELOG'] = '1'
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+app_dir, lazy_modules, mode = sys.argv[1], json.loads(sys.argv[2]), sys.argv[3]
+if mode == 'sos':
+    sys.path.insert(0, os.path.dirname(app_dir))
+    from app_frs import EmergencyApp
+    app = EmergencyApp()
+else:
+    sys.path.insert(0, app_dir)
+    from benchmark import load_app
+    app = load_app().EmergencyApp()
+from kivy.cache import Cache
+from kivy.clock import Clock
+from kivy.core.window import Window
+root = app.build()
+app.root = root
+Window.add_widget(root)
+Clock.tick()
+first_frame = time.time()
+loaded = sorted(name for name in lazy_modules if name in sys.modules)
+# Tekstur putih bawaan Kivy untuk glsl tidak dihitung
+images = sorted({str(key).split('|')[0] for key in getattr(Cache, '_objects', {}).get('kv.image', {})
+                 if 'glsl' not in str(key)})
+print(json.dumps({'first_frame': first_frame, 'loaded': loaded, 'images': images}))
+if mode != 'sos':
+    app.async_db.close()
+    app.db_manager.close()
+'''
+
+
+def parse_importtime(stderr):
+    """
+    Return (module, self_us, cumulative_us, depth) for every line written
+    by -X importtime
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def expand_entry(imports, entry):
+    """
+    Top-level imports, with `entry` replaced by the modules it imports itself
+    """
+    result = []
+    children = []
+    for item in imports:
+        # -X importtime menulis modul anak sebelum modul induknya
+        if item[3] == 0:
+            result.extend(children if item[0] == entry else [item])
+            children = []
+        elif item[3] == 1:
+            children.append(item)
+    return result
+
+
+def run_app(mode, lazy_modules, importtime=False):
+    """
+    Start the app in a fresh interpreter inside a temporary directory and
+    return (started, result, stderr) of the child
+    """
+    workdir = tempfile.mkdtemp(prefix='import_audit_')
+    app_dir = os.path.dirname(APP_PATH)
+    os.symlink(os.path.join(app_dir, 'app_frs2'), os.path.join(workdir, 'app_frs2'))
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else [])
+    try:
+        started = time.time()
+        child = subprocess.run(command + ['-c', CHILD, app_dir, json.dumps(lazy_modules), mode],
+                               cwd=workdir, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if child.returncode != 0 or not child.stdout.strip():
+        raise RuntimeError(f'app failed to start:\n{child.stderr[-2000:]}')
+    return started, json.loads(child.stdout.strip().splitlines()[-1]), child.stderr
+
+
+def audit(sos=False):
+    mode = 'sos' if sos else 'full'
+    lazy_modules = SOS_LAZY_MODULES if sos else LAZY_MODULES
+    _, result, stderr = run_app(mode, lazy_modules, importtime=True)
+    # -X importtime memperlambat startup, jadi waktu frame pertama diukur terpisah
+    started, timed, _ = run_app(mode, lazy_modules)
+
+    imports = parse_importtime(stderr)
+    top_level = sorted(expand_entry(imports, 'app_frs'), key=lambda i: i[2], reverse=True)
+    return {
+        'first_frame_ms': (timed['first_frame'] - started) * 1000,
+        'import_ms': sum(i[2] for i in top_level) / 1000,
+        'modules': [{'module': name, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000}
+                    for name, self_us, cumulative_us, _ in top_level],
+        'eager_lazy_modules': result['loaded'],
+        'images': result['images'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=25,
+                        help='how many modules to print')
+    parser.add_argument('--sos', action='store_true',
+                        help='measure the SOS-only mode instead of the full app')
+    parser.add_argument('--budget-ms', type=float,
+                        help='fail when imports before the first frame take longer')
+    parser.add_argument('--first-frame-budget-ms', type=float,
+                        help='fail when the first frame takes longer from process start')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    options = parser.parse_args(argv)
+
+    report = audit(options.sos)
+
+    print(f"{'module':<40}{'self ms':>10}{'cumul. ms':>11}")
+    for entry in report['modules'][:options.top]:
+        print(f"{entry['module']:<40}{entry['self_ms']:>10.1f}{entry['cumulative_ms']:>11.1f}")
+    print(f"\nimports before first frame: {report['import_ms']:.1f} ms (under -X importtime)")
+    print(f"process start to first frame: {report['first_frame_ms']:.1f} ms")
+    print(f"images decoded: {len(report['images'])}")
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if report['eager_lazy_modules']:
+        print(f"imported before the first frame: {', '.join(report['eager_lazy_modules'])}")
+        failed = True
+    if options.sos and report['images']:
+        print(f"images decoded before the first frame: {', '.join(report['images'])}")
+        failed = True
+    if options.budget_ms is not None and report['import_ms'] > options.budget_ms:
+        print(f'import time over budget of {options.budget_ms:.0f} ms')
+        failed = True
+    if (options.first_frame_budget_ms is not None
+            and report['first_frame_ms'] > options.first_frame_budget_ms):
+        print(f'first frame over budget of {options.first_frame_budget_ms:.0f} ms')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
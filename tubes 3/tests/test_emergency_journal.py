@@ -0,0 +1,137 @@
+"""
+Torn records, corrupt records and replay of the emergency journal
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emergency_journal import EmergencyJournal
+
+
+class FakeDatabase:
+    """
+    emergency_logs with the unique journal_id of the real schema
+    """
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('''
+        CREATE TABLE emergency_logs (
+            user_id INTEGER, emergency_type TEXT, latitude REAL, longitude REAL,
+            journal_id INTEGER UNIQUE
+        )
+        ''')
+
+    def replay_emergencies(self, entries):
+        if self.fail:
+            raise sqlite3.OperationalError('database is locked')
+        before = self.conn.total_changes
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO emergency_logs VALUES (?, ?, ?, ?, ?)',
+            [(e.user_id, e.emergency_type, e.latitude, e.longitude, e.journal_id) for e in entries])
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def logged(self):
+        return self.conn.execute('SELECT user_id, emergency_type FROM emergency_logs ORDER BY rowid').fetchall()
+
+
+class EmergencyJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'emergency.journal')
+        self.journal = EmergencyJournal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        self.directory.cleanup()
+
+    def append_all(self, count):
+        return [self.journal.append(user_id, 'fire', -6.9, 107.6) for user_id in range(count)]
+
+    def test_round_trip(self):
+        journal_id = self.journal.append(7, 'ambulance', -6.2, 106.8)
+        self.journal.append(None, 'sos')
+
+        entries, damaged = self.journal.read()
+        self.assertEqual(damaged, 0)
+        self.assertEqual([(e.journal_id, e.user_id, e.emergency_type, e.latitude, e.longitude)
+                          for e in entries[:1]], [(journal_id, 7, 'ambulance', -6.2, 106.8)])
+        self.assertEqual((entries[1].user_id, entries[1].latitude, entries[1].longitude),
+                         (None, None, None))
+
+    def test_torn_tail_is_dropped_before_the_next_append(self):
+        self.append_all(3)
+        self.journal.close()
+        # Crash di tengah penulisan record keempat
+        with open(self.path, 'ab') as f:
+            f.write(b'EJ' + b'\x01' * 10)
+
+        journal = EmergencyJournal(self.path)
+        journal.append(99, 'police')
+        journal.close()
+
+        self.assertEqual(os.path.getsize(self.path), 4 * EmergencyJournal.size)
+        entries, damaged = self.journal.read()
+        self.assertEqual(damaged, 0)
+        self.assertEqual([e.user_id for e in entries], [0, 1, 2, 99])
+
+    def test_torn_tail_is_counted_when_read(self):
+        self.append_all(2)
+        with open(self.path, 'ab') as f:
+            f.write(b'EJ\x01')
+
+        entries, damaged = self.journal.read()
+        self.assertEqual([e.user_id for e in entries], [0, 1])
+        self.assertEqual(damaged, 1)
+
+    def test_corrupt_record_keeps_the_records_after_it(self):
+        self.append_all(5)
+        with open(self.path, 'r+b') as f:
+            f.seek(EmergencyJournal.size * 2 + 8)
+            f.write(b'\xff\xff\xff\xff')
+
+        entries, damaged = self.journal.read()
+        self.assertEqual([e.user_id for e in entries], [0, 1, 3, 4])
+        self.assertEqual(damaged, 1)
+
+    def test_replay_logs_each_event_once_and_empties_the_journal(self):
+        database = FakeDatabase()
+        self.journal.append(1, 'fire')
+        # Sudah tercatat normal sebelum aplikasi mati
+        database.replay_emergencies(self.journal.read()[0])
+        self.journal.append(2, 'sos')
+
+        self.assertEqual(self.journal.replay(database), 1)
+        self.assertEqual(database.logged(), [(1, 'fire'), (2, 'sos')])
+        self.assertEqual(os.path.getsize(self.path), 0)
+        self.assertEqual(self.journal.replay(database), 0)
+
+    def test_replay_skips_damaged_records(self):
+        database = FakeDatabase()
+        self.append_all(3)
+        with open(self.path, 'r+b') as f:
+            f.seek(EmergencyJournal.size + 4)
+            f.write(b'\x00' * 8)
+
+        self.assertEqual(self.journal.replay(database), 2)
+        self.assertEqual(database.logged(), [(0, 'fire'), (2, 'fire')])
+
+    def test_failed_replay_keeps_the_journal(self):
+        self.append_all(2)
+        size = os.path.getsize(self.path)
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.journal.replay(FakeDatabase(fail=True))
+        self.assertEqual(os.path.getsize(self.path), size)
+
+        database = FakeDatabase()
+        self.assertEqual(self.journal.replay(database), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
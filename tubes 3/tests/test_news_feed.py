@@ -0,0 +1,115 @@
+"""
+The news feed is read a page at a time and built within the frame budget
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Tubes 3.py')
+
+
+def load_app():
+    """
+    Import 'Tubes 3.py' as the module 'tubes3' without starting it
+    """
+    if 'tubes3' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('tubes3', APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['tubes3'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['tubes3']
+
+
+tubes = load_app()
+
+
+class FeedPagingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = tubes.DatabaseManager(os.path.join(self.directory.name, 'emergency_app.db'))
+        with self.db.get_connection() as conn:
+            # Banyak berita dengan waktu yang sama, seperti impor atau sinkronisasi
+            conn.executemany('''
+            INSERT INTO news (title, description, category, status, created_at)
+            VALUES (?, 'Description', 'Local', ?, ?)
+            ''', [(f'News {i}', 'rejected' if i % 7 == 0 else 'approved',
+                   f'2026-10-0{1 + i % 3} 08:00:00') for i in range(50)])
+            conn.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_pages_follow_the_full_feed(self):
+        pages = []
+        after = None
+        while True:
+            page = self.db.get_news_feed(tubes.FEED_SNIPPET_LENGTH, 8, after)
+            if not page:
+                break
+            pages.append(page)
+            after = (page[-1].created_at, page[-1].id)
+
+        feed = self.db.get_news_feed()
+        self.assertEqual([item.id for page in pages for item in page], [item.id for item in feed])
+        self.assertEqual(len(feed), 42)
+        self.assertTrue(all(len(page) == 8 for page in pages[:-1]))
+        self.assertEqual(pages[0][0].snippet, 'Description')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+
+class BuilderBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.time = tubes.time
+        tubes.time = types.SimpleNamespace(perf_counter=self.clock.perf_counter)
+        self.builder = tubes.IncrementalBuilder(budget_ms=6)
+
+    def tearDown(self):
+        self.builder.stop()
+        tubes.time = self.time
+
+    def work(self, steps_ms, done):
+        for step_ms in steps_ms:
+            self.clock.now += step_ms / 1000
+            done.append(step_ms)
+            yield
+
+    def test_step_that_would_overrun_waits_for_the_next_frame(self):
+        done = []
+        self.builder.schedule(self, self.work([4, 4, 1, 1, 1], done))
+
+        self.builder.step(0)
+        self.assertEqual(done, [4])
+        self.builder.step(0)
+        self.assertEqual(done, [4, 4])
+        self.assertLessEqual(self.builder.longest_slice_ms, 6)
+
+        self.builder.step(0)
+        self.assertEqual(done, [4, 4, 1, 1, 1])
+        self.assertFalse(self.builder.pending)
+
+    def test_slow_step_still_runs_alone(self):
+        done = []
+        self.builder.schedule(self, self.work([9, 1], done))
+
+        self.builder.step(0)
+        self.assertEqual(done, [9])
+        self.builder.step(0)
+        self.assertEqual(done, [9, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
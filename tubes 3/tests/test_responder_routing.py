@@ -0,0 +1,185 @@
+"""
+Emergency calls go to the nearest station once the location is known
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Tubes 3.py')
+
+
+def load_app():
+    """
+    Import 'Tubes 3.py' as the module 'tubes3' without starting it
+    """
+    if 'tubes3' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('tubes3', APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['tubes3'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['tubes3']
+
+
+tubes = load_app()
+
+from kivy.clock import Clock
+
+BANDUNG = (-6.914, 107.609)
+
+
+class FakeGps:
+    def __init__(self):
+        self.on_location = None
+        self.running = False
+
+    def configure(self, on_location):
+        self.on_location = on_location
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class FakeDeviceManager:
+    def __init__(self, last_location=None):
+        self.last_location = last_location
+        self.saved = []
+
+    def get_last_location(self, max_age=None):
+        return self.last_location
+
+    def save_last_location(self, latitude, longitude):
+        self.saved.append((latitude, longitude))
+
+
+class ResponderRoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # BaseScreen membuka device_info.json di folder kerja
+        os.chdir(self.directory.name)
+
+        self.calls = []
+        self.gps = FakeGps()
+        self.plyer = tubes.plyer
+        tubes.plyer = types.SimpleNamespace(
+            gps=self.gps, call=types.SimpleNamespace(makecall=self.calls.append))
+
+        responders = tubes.ResponderDirectory([
+            tubes.Responder('police', 'Polsek Sumur Bandung', '0221000001', -6.917, 107.611),
+            tubes.Responder('police', 'Polsek Cimahi', '0221000002', -6.872, 107.542),
+            tubes.Responder('fire', 'Damkar Bandung', '0221000003', -6.921, 107.602),
+            tubes.Responder('fire', 'Damkar Jakarta Pusat', '0211000004', -6.178, 106.830),
+        ])
+        self.journal = tubes.EmergencyJournal(os.path.join(self.directory.name, 'emergency.journal'))
+        self.device_manager = FakeDeviceManager()
+        self.screen = tubes.EmergencyScreen(None, self.device_manager, None, None, responders,
+                                            self.journal, name='emergency')
+        # Tanpa aplikasi yang berjalan tidak ada sesi; panggilan tetap jalan tanpa pengguna
+        self.screen.get_current_user = lambda: None
+
+    def tearDown(self):
+        tubes.plyer = self.plyer
+        self.journal.close()
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def fix(self, latitude, longitude):
+        self.gps.on_location(lat=latitude, lon=longitude)
+        Clock.tick()
+
+    def test_call_goes_to_the_nearest_station(self):
+        self.screen.on_enter()
+        self.fix(*BANDUNG)
+
+        self.screen.call_police(None)
+        self.screen.call_fire(None)
+
+        self.assertEqual(self.calls, ['0221000001', '0221000003'])
+        entries, _ = self.journal.read()
+        self.assertEqual([(e.emergency_type, e.latitude, e.longitude) for e in entries],
+                         [('police', *BANDUNG), ('fire', *BANDUNG)])
+
+    def test_station_too_far_away_uses_the_national_number(self):
+        self.screen.on_enter()
+        self.fix(-7.80, 110.36)
+
+        self.screen.call_fire(None)
+
+        self.assertEqual(self.calls, [tubes.EMERGENCY_NUMBERS['fire']])
+
+    def test_call_waits_for_the_first_fix(self):
+        self.screen.on_enter()
+        self.screen.call_police(None)
+        self.assertEqual(self.calls, [])
+
+        self.fix(-6.875, 107.545)
+
+        self.assertEqual(self.calls, ['0221000002'])
+        self.assertEqual(self.device_manager.saved, [(-6.875, 107.545)])
+
+    def test_call_without_a_fix_dials_after_the_timeout(self):
+        self.screen.on_enter()
+        self.screen.call_police(None)
+
+        # Seperti event Clock setelah LOCATION_TIMEOUT
+        self.screen.place_pending_call()
+        self.fix(*BANDUNG)
+
+        self.assertEqual(self.calls, [tubes.EMERGENCY_NUMBERS['police']])
+
+    def test_last_known_location_is_used_without_waiting(self):
+        self.device_manager.last_location = BANDUNG
+        self.screen.on_enter()
+
+        self.screen.call_fire(None)
+
+        self.assertEqual(self.calls, ['0221000003'])
+
+
+class ResponderImportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = tubes.DatabaseManager(os.path.join(self.directory.name, 'emergency_app.db'))
+        self.csv_path = os.path.join(self.directory.name, 'responders.csv')
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def write_csv(self, *rows):
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write('type,name,phone,latitude,longitude\n')
+            f.writelines(f'{row}\n' for row in rows)
+
+    def test_stations_are_imported_once_and_loaded_from_the_database(self):
+        self.write_csv('police,Polsek A,0221000001,-6.917,107.611',
+                       'medical,RS B,0221000005,-6.900,107.620')
+
+        self.assertEqual(self.db.import_responders(self.csv_path), 2)
+        self.assertEqual(self.db.import_responders(self.csv_path), 0)
+
+        directory = tubes.ResponderDirectory.from_database(self.db)
+        nearest = directory.nearest_responders(*BANDUNG, 'medical', k=1)
+        self.assertEqual([(r.name, r.phone) for r in nearest], [('RS B', '0221000005')])
+
+    def test_changed_file_updates_stations(self):
+        self.write_csv('police,Polsek A,0221000001,-6.917,107.611')
+        self.db.import_responders(self.csv_path)
+        self.write_csv('police,Polsek A Baru,0221000001,-6.920,107.615')
+        os.utime(self.csv_path, (0, os.path.getmtime(self.csv_path) + 10))
+
+        self.assertEqual(self.db.import_responders(self.csv_path), 1)
+        self.assertEqual([(r.name, r.latitude) for r in self.db.get_responders()],
+                         [('Polsek A Baru', -6.920)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Delta news sync between sharded databases: a change log and a mark per shard
+"""
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Tubes 3.py')
+
+
+def load_app():
+    """
+    Import 'Tubes 3.py' as the module 'tubes3' without starting it
+    """
+    if 'tubes3' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('tubes3', APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['tubes3'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['tubes3']
+
+
+tubes = load_app()
+
+REGIONS = ('bandung', 'jakarta')
+
+
+class ShardedSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = self.sharded('server')
+        self.device = self.sharded('device')
+        self.client = tubes.NewsSyncClient(
+            self.device, tubes.LocalSyncTransport(tubes.NewsSyncServer(self.server, batch_size=4)))
+        self.news = {region: [self.publish(region, f'{region} {i}') for i in range(5)]
+                     for region in REGIONS}
+
+    def tearDown(self):
+        self.server.close()
+        self.device.close()
+        self.directory.cleanup()
+
+    def sharded(self, name):
+        return tubes.ShardedDatabaseManager(tubes.ShardMap(
+            {region: os.path.join(self.directory.name, f'{name}_{region}.db') for region in REGIONS}))
+
+    def publish(self, region, title):
+        shard = self.server.shards[region]
+        news_id = shard.submit_news(title, 'Description', 'Local', deduplicate=False)
+        self.execute(shard, "UPDATE news SET status = 'approved' WHERE id = ?", news_id)
+        return news_id
+
+    @staticmethod
+    def execute(db, sql, *parameters):
+        with db.get_connection() as conn:
+            conn.execute(sql, parameters)
+            conn.commit()
+
+    def server_news(self):
+        return sorted((news.id, news.title, news.report_count) for news in self.server.get_approved_news())
+
+    def device_news(self):
+        """
+        Synced news per device shard as {region: [(server id, title, reports)]}
+        """
+        result = {}
+        for region, shard in self.device.shards.items():
+            with shard.get_connection() as conn:
+                result[region] = conn.execute(
+                    'SELECT remote_id, title, report_count FROM news WHERE sync_source = ? '
+                    'ORDER BY remote_id', (self.client.name,)).fetchall()
+        return result
+
+    def assert_in_sync(self):
+        device_news = self.device_news()
+        self.assertEqual(sorted(row for rows in device_news.values() for row in rows), self.server_news())
+        for index, region in enumerate(REGIONS):
+            self.assertTrue(all(remote_id >> tubes.SHARD_ID_BITS == index
+                                for remote_id, _, _ in device_news[region]))
+
+    def test_first_sync_reads_every_shard(self):
+        report = self.client.sync()
+
+        self.assertEqual(report['rows'], 10)
+        self.assert_in_sync()
+        self.assertEqual(self.device.get_sync_marks(self.client.name), {'0': 5, '1': 5})
+
+    def test_delta_sync_per_shard(self):
+        self.client.sync()
+        bandung, jakarta = self.news['bandung'], self.news['jakarta']
+        self.execute(self.server.shards['jakarta'], 'DELETE FROM news WHERE id = ?', jakarta[0])
+        self.execute(self.server.shards['bandung'],
+                     'UPDATE news SET report_count = report_count + 1 WHERE id = ?', bandung[1])
+        self.publish('jakarta', 'jakarta 5')
+
+        report = self.client.sync()
+
+        self.assertEqual((report['rows'], report['deleted']), (2, 1))
+        self.assert_in_sync()
+        self.assertEqual(self.client.sync()['rows'], 0)
+
+    def test_mark_from_before_sharding_is_shard_zero(self):
+        self.device.apply_news_changes(self.client.name, [], [], {'0': 3})
+
+        with self.device.get_connection() as conn:
+            self.assertEqual(conn.execute('SELECT name, value FROM sync_state').fetchall(),
+                             [(self.client.name, 3)])
+        self.assertEqual(self.device.get_sync_marks(self.client.name), {'0': 3})
+
+    def test_request_with_a_single_mark(self):
+        server = tubes.NewsSyncServer(self.server)
+        payload = json.loads(zlib.decompress(server.handle(json.dumps({'since': 5}).encode('utf-8'))))
+
+        self.assertEqual([row[0] for row in payload['rows']], self.news['jakarta'])
+        self.assertEqual(payload['mark'], {'0': 5, '1': 5})
+
+    def test_rows_synced_into_the_home_shard_move_to_their_own(self):
+        jakarta = self.news['jakarta'][0]
+        row = [jakarta, 'jakarta 0', 'Description', 'Local', '2026-10-01 08:00:00', 1, None]
+        # Seperti sinkronisasi sebelum berita disebar per shard
+        self.device.shards['bandung'].apply_news_changes(self.client.name, [row], [], {})
+
+        self.client.sync()
+
+        self.assert_in_sync()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+The SOS launch mode journals an emergency before it dials
+"""
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import app_frs
+from emergency_journal import EmergencyJournal
+
+
+class SosJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = app_frs.EmergencyApp()
+        self.app.journal = EmergencyJournal(os.path.join(self.directory.name, 'emergency.journal'))
+        self.app.popup = lambda title, text: None
+        self.calls = []
+
+        def makecall(tel):
+            # Isi jurnal saat panggilan dimulai
+            self.calls.append((tel, self.app.journal.read()[0]))
+
+        self.app.plyer = types.SimpleNamespace(call=types.SimpleNamespace(makecall=makecall))
+
+    def tearDown(self):
+        self.app.journal.close()
+        self.directory.cleanup()
+
+    def test_sos_is_journaled_before_the_call(self):
+        self.app.coordinates = (-6.9, 107.6)
+        self.app.send_sos(None)
+
+        (number, entries), = self.calls
+        self.assertEqual(number, app_frs.SOS_NUMBER)
+        self.assertEqual([(e.emergency_type, e.latitude, e.longitude) for e in entries],
+                         [('sos', -6.9, 107.6)])
+        self.assertEqual(self.app.journal_id, entries[0].journal_id)
+
+    def test_failing_journal_still_dials(self):
+        def broken(*args):
+            raise OSError('disk full')
+
+        self.app.journal.append = broken
+        self.app.send_sos(None)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertIsNone(self.app.journal_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+"""
+Headless UI performance harness for EmergencyApp.
+
+Builds the real app in an offscreen window, walks a scripted navigation
+path and records for every transition the wall time, the number of widgets
+and canvas instructions on the screen and, with --memory, the Python memory
+allocated.
+
+    python ui_harness.py --rounds 3 --news 500 --output ui_report.json
+    python ui_harness.py --rounds 1 --news 500 --memory
+
+`first ms` is the time until the first screen of a list is shown, `fill`
+the frames IncrementalBuilder needed for the rest, `slice ms` its longest
+slice and `frame ms` the slowest frame after the first screen, layout and
+rendering included. The harness exits with status 1 when a slice is over
+FRAME_BUDGET_MS, so it can gate a change. tracemalloc makes building
+widgets several times slower, so --memory runs skip that check.
+
+Canvas instructions that keep growing between rounds point to graphics
+being added on every resize instead of updated, and a widget count that
+follows --news points to a feed that renders every row.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+
+from benchmark import APP_PATH, load_app
+
+NAVIGATION = ['landing', 'main_menu', 'emergency', 'news', 'add_news',
+              'profile', 'emergency_contacts']
+
+# Aksi yang dijalankan setelah layar tampil, seperti tombol yang ditekan pengguna
+SCREEN_ACTIONS = {
+    'news': lambda screen: screen.load_news(None),
+}
+
+TEST_PHONE = '081234567890'
+TEST_PASSWORD = 'Passw0rd!'
+
+
+def canvas_size(widget):
+    """
+    Count the canvas instructions of a widget and its children
+    """
+    total = 0
+    for child in widget.walk():
+        for canvas in (child.canvas.before, child.canvas, child.canvas.after):
+            total += len(canvas.children)
+    return total
+
+
+def kilobytes(value):
+    return f'{value:>10.1f}' if value is not None else f"{'-':>10}"
+
+
+def seed(app, news_count):
+    """
+    Register the test user as a moderator, log them in and add approved
+    news to the feed
+    """
+    app.db_manager.register_user(TEST_PHONE, 'Harness User', TEST_PASSWORD)
+    moderator = app.db_manager.get_user_by_phone(TEST_PHONE)
+    app.db_manager.set_moderator(moderator.id)
+    news_ids = [app.db_manager.submit_news(f'Report {i}', 'Description ' * 20, 'Local',
+                                           deduplicate=False)
+                for i in range(news_count)]
+    app.db_manager.approve_news(news_ids, moderator.id)
+    app.session.issue(app.session.authenticate(TEST_PHONE, TEST_PASSWORD,
+                                               app.device_manager.get_device_id()))
+
+
+def run_frames(clock, frames):
+    """
+    Tick the Clock `frames` times and return the slowest frame in ms
+    """
+    slowest = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        clock.tick()
+        slowest = max(slowest, time.perf_counter() - start)
+    return slowest * 1000
+
+
+def navigate(app, screen_name, clock, frames, resize=False):
+    """
+    Switch to a screen, run its action and let the layout settle.
+    With `resize` the window is rotated and back, like a phone would.
+    """
+    sm = app.screen_manager
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+
+    app.builder.longest_slice_ms = 0
+    start = time.perf_counter()
+    sm.current = screen_name
+    action = SCREEN_ACTIONS.get(screen_name)
+    if action:
+        action(sm.current_screen)
+    # Tunggu query yang dijalankan AsyncDatabase, hasilnya masuk di frame berikutnya
+    app.async_db.wait_idle()
+    run_frames(clock, frames)
+    first_screen_ms = (time.perf_counter() - start) * 1000
+    # IncrementalBuilder mengisi sisa daftar beberapa baris per frame
+    slowest_frame_ms = 0
+    fill_frames = 0
+    while app.builder.pending:
+        slowest_frame_ms = max(slowest_frame_ms, run_frames(clock, 1))
+        fill_frames += 1
+    if resize:
+        from kivy.core.window import Window
+        width, height = Window.size
+        for size in ((height, width), (width, height)):
+            Window.size = size
+            slowest_frame_ms = max(slowest_frame_ms, run_frames(clock, frames))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    alloc_kb = peak_kb = None
+    if tracing:
+        after, peak = tracemalloc.get_traced_memory()
+        alloc_kb, peak_kb = (after - before) / 1024, (peak - before) / 1024
+    screen = sm.current_screen
+    return {
+        'screen': screen_name,
+        'wall_ms': elapsed_ms,
+        'first_screen_ms': first_screen_ms,
+        'fill_frames': fill_frames,
+        'longest_slice_ms': app.builder.longest_slice_ms,
+        'slowest_frame_ms': slowest_frame_ms,
+        'widgets': sum(1 for _ in screen.walk()),
+        'canvas_instructions': canvas_size(screen),
+        'alloc_kb': alloc_kb,
+        'peak_kb': peak_kb,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='how many times to walk the navigation path')
+    parser.add_argument('--news', type=int, default=200,
+                        help='approved news rows to seed into the feed')
+    parser.add_argument('--frames', type=int, default=3,
+                        help='Clock frames to run after every transition')
+    parser.add_argument('--animated', action='store_true',
+                        help='keep the slide transition instead of switching instantly')
+    parser.add_argument('--resize', action='store_true',
+                        help='rotate the window on every screen')
+    parser.add_argument('--memory', action='store_true',
+                        help='trace Python allocations (slows the UI, so timings are not checked)')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    options = parser.parse_args(argv)
+    if options.output:
+        options.output = os.path.abspath(options.output)
+
+    workdir = tempfile.mkdtemp(prefix='ui_harness_')
+    app_dir = os.path.dirname(APP_PATH)
+    os.symlink(os.path.join(app_dir, 'app_frs2'), os.path.join(workdir, 'app_frs2'))
+    os.chdir(workdir)
+
+    try:
+        tubes = load_app()
+        from kivy.clock import Clock
+        from kivy.core.window import Window
+        from kivy.uix.screenmanager import NoTransition
+
+        if options.memory:
+            tracemalloc.start()
+        build_start = time.perf_counter()
+        app = tubes.EmergencyApp()
+        sm = app.build()
+        app.root = sm
+        Window.add_widget(sm)
+        run_frames(Clock, options.frames)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        if not options.animated:
+            sm.transition = NoTransition()
+        frames = options.frames if not options.animated else max(options.frames, 30)
+
+        seed(app, options.news)
+
+        report = {'build_ms': build_ms, 'news': options.news,
+                  'frame_budget_ms': tubes.FRAME_BUDGET_MS, 'rounds': []}
+        for round_number in range(options.rounds):
+            report['rounds'].append([navigate(app, name, Clock, frames, options.resize)
+                                       for name in NAVIGATION])
+        tracemalloc.stop()
+    finally:
+        os.chdir(app_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"build: {report['build_ms']:.1f} ms")
+    print(f"{'round':>5} {'screen':<20}{'wall ms':>10}{'first ms':>10}{'fill':>6}{'slice ms':>10}"
+          f"{'frame ms':>10}{'widgets':>9}{'canvas':>8}{'alloc KB':>10}{'peak KB':>10}")
+    over_budget = []
+    for round_number, transitions in enumerate(report['rounds'], 1):
+        for t in transitions:
+            print(f"{round_number:>5} {t['screen']:<20}{t['wall_ms']:>10.2f}{t['first_screen_ms']:>10.2f}"
+                  f"{t['fill_frames']:>6}{t['longest_slice_ms']:>10.2f}{t['slowest_frame_ms']:>10.2f}"
+                  f"{t['widgets']:>9}{t['canvas_instructions']:>8}"
+                  f"{kilobytes(t['alloc_kb'])}{kilobytes(t['peak_kb'])}")
+            if not options.memory and t['longest_slice_ms'] > report['frame_budget_ms']:
+                over_budget.append(t)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    for t in over_budget:
+        print(f"FAIL {t['screen']}: build slice of {t['longest_slice_ms']:.2f} ms "
+              f"over the {report['frame_budget_ms']} ms budget")
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())